@@ -19,6 +19,14 @@ seed.run()
 PYCODE
 fi
 
-echo "Starting Gunicorn..."
-exec gunicorn --bind 0.0.0.0:8000 --workers ${GUNICORN_WORKERS:-3} --timeout ${GUNICORN_TIMEOUT:-60} supermercado.wsgi:application
+# Las métricas acumuladas son por despliegue: se empieza de cero
+rm -rf "${DJANGO_METRICS_DIR:-/tmp/supermercado-metrics}"
+
+if [ "$DJANGO_SERVER" = "asgi" ]; then
+  # Lecturas del catálogo con vistas async; el resto sigue en el camino sync
+  echo "Starting Gunicorn (ASGI, uvicorn workers)..."
+  exec gunicorn --bind 0.0.0.0:8000 --workers ${GUNICORN_WORKERS:-3} --timeout ${GUNICORN_TIMEOUT:-60} --worker-class uvicorn.workers.UvicornWorker supermercado.asgi:application
+fi
 
+echo "Starting Gunicorn..."
+exec gunicorn --bind 0.0.0.0:8000 --workers ${GUNICORN_WORKERS:-3} --threads ${GUNICORN_THREADS:-1} --timeout ${GUNICORN_TIMEOUT:-60} supermercado.wsgi:application
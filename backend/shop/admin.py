@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Category, Product, SiteConfig, Order, OrderItem, Coupon, Announcement
+from .models import (
+    Category, Product, SiteConfig, Order, OrderItem, OrderTicket, Coupon, Announcement,
+    DailySales, ProductDailySales, CouponDailySales,
+)
 
 
 @admin.register(Category)
@@ -34,11 +37,20 @@ class OrderAdmin(admin.ModelAdmin):
     search_fields = ('name', 'phone')
 
 
+@admin.register(OrderTicket)
+class OrderTicketAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'order', 'attempts', 'created_at', 'processed_at')
+    list_filter = ('status',)
+    readonly_fields = ('payload', 'result', 'order', 'attempts', 'created_at', 'claimed_at', 'processed_at')
+
+
 @admin.register(Coupon)
 class CouponAdmin(admin.ModelAdmin):
-    list_display = ('code', 'type', 'amount', 'percent', 'percent_cap', 'min_subtotal', 'active')
+    list_display = ('code', 'type', 'amount', 'percent', 'percent_cap', 'min_subtotal', 'active', 'used_count')
     list_filter = ('type', 'active')
     search_fields = ('code',)
+    # Se recalcula desde CouponRedemption (manage.py reconcile_coupon_usage)
+    readonly_fields = ('used_count',)
 
 
 @admin.register(Announcement)
@@ -46,3 +58,33 @@ class AnnouncementAdmin(admin.ModelAdmin):
     list_display = ('title', 'active', 'start_at', 'end_at', 'created_at')
     list_filter = ('active',)
     search_fields = ('title', 'message')
+
+
+class RollupAdmin(admin.ModelAdmin):
+    """Read-only: the rows are maintained by shop/rollups.py."""
+    date_hierarchy = 'day'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(RollupAdmin):
+    list_display = ('day', 'orders', 'revenue', 'discount_total', 'shipping_total')
+
+
+@admin.register(ProductDailySales)
+class ProductDailySalesAdmin(RollupAdmin):
+    list_display = ('day', 'product', 'category', 'units', 'revenue')
+    list_filter = ('category',)
+    list_select_related = ('product', 'category')
+    search_fields = ('product__name',)
+
+
+@admin.register(CouponDailySales)
+class CouponDailySalesAdmin(RollupAdmin):
+    list_display = ('day', 'code', 'orders', 'discount_total')
+    search_fields = ('code',)
@@ -6,3 +6,5 @@ class ShopConfig(AppConfig):
     name = 'shop'
     verbose_name = 'Supermercado - Tienda'
 
+    def ready(self):
+        from . import coupons, metrics, rollups, snapshot  # noqa: F401  (conecta receptores)
@@ -0,0 +1,136 @@
+"""Native async views for the read-only storefront endpoints.
+
+Mounted in front of the DRF viewsets at the same URLs when
+``ASYNC_READS`` is on (the default under ``supermercado/asgi.py``). They
+return the same payloads, ETags and cache keys as the sync views, but read
+versions and cached payloads with the async cache API and the async ORM, so
+a request answered from cache never leaves the event loop (see
+``TwoTierCache.aget``). Cache misses on products, ``?with_counts`` and
+anything that is not a JSON GET (the browsable API) run the sync viewset
+in a thread. Writes never come here.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+
+from .models import ANNOUNCEMENT_GENERATION, CATALOG_GENERATION, Category, aget_generation, stock_window
+from .schedule import acache_until, anext_boundary, boundary_version
+from .serializers import AnnouncementSerializer, CategorySerializer, aget_site_config_data
+from .views import AnnouncementViewSet, CategoryViewSet, ProductViewSet, SiteConfigViewSet
+
+
+def sync_view(viewset, action, basename):
+    view = viewset.as_view({'get': action}, basename=basename)
+
+    @sync_to_async
+    def run(request, **kwargs):
+        return view(request, **kwargs).render()
+
+    return run
+
+
+sync_product_list = sync_view(ProductViewSet, 'list', 'product')
+sync_product_detail = sync_view(ProductViewSet, 'retrieve', 'product')
+sync_category_list = sync_view(CategoryViewSet, 'list', 'category')
+sync_config = sync_view(SiteConfigViewSet, 'list', 'config')
+sync_announcement_list = sync_view(AnnouncementViewSet, 'list', 'announcement')
+
+
+def wants_json(request):
+    """True for GET/HEAD requests DRF would answer with the JSON renderer."""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    fmt = request.GET.get('format')
+    if fmt is not None:
+        return fmt == 'json'
+    return 'text/html' not in request.headers.get('Accept', '')
+
+
+def check_validators(request, version, last_modified=None):
+    """``(etag, 304 response or None)`` for ``version``, like ``ConditionalGetMixin``."""
+    etag = quote_etag(f'{version}-json')
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return etag, response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+
+
+def json_response(data, etag, last_modified=None):
+    response = HttpResponse(JSONRenderer().render(data), content_type='application/json')
+    response['Vary'] = 'Accept'
+    set_validators(response, etag, last_modified)
+    return response
+
+
+async def products(request, pk=None):
+    action = 'list' if pk is None else 'retrieve'
+    sync = sync_product_list if pk is None else sync_product_detail
+    kwargs = {} if pk is None else {'pk': pk}
+    if not wants_json(request):
+        return await sync(request, **kwargs)
+    generation = await aget_generation(CATALOG_GENERATION)
+    boundary = await anext_boundary(*ProductViewSet.promotion_boundary(generation))
+    version = f'{generation}-{boundary_version(boundary)}-{stock_window()}'
+    etag, response = check_validators(request, f'products-{version}')
+    if response is not None:
+        return response
+    digest = ProductViewSet.cache_digest(request, 'product', action, pk or '', 'json')
+    data = await cache.aget(f'product:{version}:{digest}')
+    if data is None:
+        # Filtros, búsqueda y paginación los resuelve el viewset (y llena la caché)
+        return await sync(request, **kwargs)
+    return json_response(data, etag)
+
+
+async def categories(request):
+    if not wants_json(request) or request.GET.get('with_counts') in ('1', 'true'):
+        return await sync_category_list(request)
+    generation = await aget_generation(CATALOG_GENERATION)
+    etag, response = check_validators(request, f'categories-{generation}')
+    if response is not None:
+        return response
+    rows = [category async for category in Category.objects.all()]
+    # Filas sin URL guardada la arman con Cloudinary: fuera del event loop
+    data = await sync_to_async(
+        lambda: CategorySerializer(rows, many=True, context={'request': request}).data,
+        thread_sensitive=False,
+    )()
+    return json_response(data, etag)
+
+
+async def config(request):
+    if not wants_json(request):
+        return await sync_config(request)
+    data = await aget_site_config_data()
+    last_modified = SiteConfigViewSet.config_last_modified(data)
+    etag, response = check_validators(request, SiteConfigViewSet.config_version(data), last_modified)
+    if response is not None:
+        return response
+    return json_response(data, etag, last_modified)
+
+
+async def announcements(request):
+    if not wants_json(request):
+        return await sync_announcement_list(request)
+    generation = await aget_generation(ANNOUNCEMENT_GENERATION)
+    boundary = await anext_boundary(*AnnouncementViewSet.visibility_boundary(generation))
+    version = boundary_version(boundary)
+    etag, response = check_validators(request, f'announcements-{generation}-{version}')
+    if response is not None:
+        return response
+
+    async def build():
+        rows = [row async for row in AnnouncementViewSet().get_queryset()]
+        return AnnouncementSerializer(rows, many=True).data
+
+    data = await acache_until(f'announcements:list:{generation}:{version}', boundary, build)
+    return json_response(data, etag)
@@ -0,0 +1,331 @@
+"""Cache backends shared by all the gunicorn workers.
+
+``TwoTierCache`` (the ``default`` alias) keeps a bounded per-process LRU
+(L1) in front of a cache every worker can see (L2, the ``shared`` alias).
+Reads are served from L1 when possible; writes go to both tiers.
+
+Cross-worker consistency works like the generation counters: ``delete``,
+``incr``/``decr`` and ``clear`` also bump an epoch key in L2, and each
+process compares its epoch with L2 once per request (``request_started``)
+or every ``EPOCH_INTERVAL`` seconds outside requests, dropping its L1 when
+another worker changed something. ``set``/``add`` do not broadcast: in this
+app they only store values derived from the database after a miss, and
+invalidation always goes through ``delete`` or a generation bump.
+
+Under ASGI, ``aget`` answers L1 hits without leaving the event loop, and
+L2 calls run in worker threads instead of the single thread-sensitive one.
+
+``SharedFileCache`` is the default L2: Django's ``FileBasedCache`` with
+``add``/``incr`` made atomic across processes by a file lock, so
+``bump_generation`` never loses an increment.
+"""
+import os
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+from django.core.files.move import file_move_safe
+from django.core.signals import request_started
+from django.dispatch import receiver
+
+from .metrics import record_cache_lookup
+
+LOCK_STRIPES = 64
+
+
+class SharedFileCache(FileBasedCache):
+    """``FileBasedCache`` whose ``add`` and ``incr``/``decr`` are atomic across processes."""
+
+    @contextmanager
+    def key_lock(self, key, version=None):
+        fname = self._key_to_file(key, version)
+        # Un conjunto fijo de archivos de lock (no crece con las claves)
+        stripe = int(os.path.basename(fname)[:8], 16) % LOCK_STRIPES
+        lock_dir = os.path.join(self._dir, 'locks')
+        os.makedirs(lock_dir, 0o700, exist_ok=True)
+        with open(os.path.join(lock_dir, f'{stripe}.lock'), 'ab') as f:
+            locks.lock(f, locks.LOCK_EX)
+            try:
+                yield fname
+            finally:
+                locks.unlock(f)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self.key_lock(key, version):
+            return super().add(key, value, timeout, version)
+
+    async def aadd(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return await sync_to_async(self.add, thread_sensitive=False)(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self.key_lock(key, version) as fname:
+            try:
+                with open(fname, 'rb') as f:
+                    expiry = pickle.load(f)
+                    value = pickle.loads(zlib.decompress(f.read()))
+            except (FileNotFoundError, EOFError):
+                raise ValueError(f"Key '{key}' not found")
+            if expiry is not None and expiry < time.time():
+                self._delete(fname)
+                raise ValueError(f"Key '{key}' not found")
+            value += delta
+            # Conserva el vencimiento original (BaseCache.incr lo reinicia)
+            self._createdir()
+            tmp_path = f'{fname}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(pickle.dumps(expiry, self.pickle_protocol))
+                f.write(zlib.compress(pickle.dumps(value, self.pickle_protocol)))
+            file_move_safe(tmp_path, fname, allow_overwrite=True)
+            return value
+
+
+# Valor guardado en L2 con su vencimiento absoluto, para que L1 no lo sobreviva
+Stamped = namedtuple('Stamped', 'expires value')
+
+
+class LocalStore:
+    """Per-process L1: pickled values in LRU order, plus the last epoch seen in L2."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.epoch = None
+        self.stale = True
+        self.checked_at = 0.0
+
+    def get(self, key, missing):
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None:
+                return missing
+            expires, payload = entry
+            if expires is not None and expires <= time.time():
+                del self.data[key]
+                return missing
+            self.data.move_to_end(key)
+        return pickle.loads(payload)
+
+    def set(self, key, value, expires):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.data[key] = (expires, payload)
+            self.data.move_to_end(key)
+            while len(self.data) > self.max_entries:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+@receiver(request_started)
+def check_epoch_on_next_access(**kwargs):
+    for store in list(_stores.values()):
+        store.stale = True
+
+
+class TwoTierCache(BaseCache):
+    """Per-process LRU in front of the ``SHARED`` cache alias; see the module docstring.
+
+    OPTIONS: ``SHARED`` (L2 alias), ``MAX_ENTRIES`` (L1 size),
+    ``LOCAL_TIMEOUT`` (max seconds an L1 entry lives), ``EPOCH_INTERVAL``
+    and ``BYPASS_PREFIXES`` (keys kept only in L2, e.g. throttle counters).
+    """
+    epoch_key = 'two_tier_epoch'
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 300)
+        self.epoch_interval = options.get('EPOCH_INTERVAL', 1.0)
+        self.bypass_prefixes = tuple(options.get('BYPASS_PREFIXES', ()))
+        # Como LocMemCache: un L1 por proceso y LOCATION, compartido entre hilos
+        with _stores_lock:
+            self.store = _stores.setdefault(location or 'default', LocalStore(self._max_entries))
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def bypass(self, key):
+        return key.startswith(self.bypass_prefixes) if self.bypass_prefixes else False
+
+    def fresh(self):
+        """True while L1 needs no epoch check."""
+        store = self.store
+        return not store.stale and time.monotonic() - store.checked_at < self.epoch_interval
+
+    def sync(self):
+        """Drop L1 if another process broadcast an invalidation since the last check."""
+        if self.fresh():
+            return
+        store = self.store
+        store.stale, store.checked_at = False, time.monotonic()
+        epoch = self.shared.get(self.epoch_key)
+        if epoch != store.epoch:
+            store.clear()
+            store.epoch = epoch
+
+    def broadcast(self):
+        try:
+            epoch = self.shared.incr(self.epoch_key)
+        except ValueError:
+            self.shared.add(self.epoch_key, 1, None)
+            epoch = self.shared.get(self.epoch_key)
+        store = self.store
+        if store.epoch is not None and isinstance(epoch, int) and epoch == store.epoch + 1:
+            # Solo fue nuestro cambio: el resto del L1 sigue valiendo
+            store.epoch = epoch
+        else:
+            store.clear()
+            store.epoch = epoch
+
+    def timeout_seconds(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return timeout
+
+    def local_expiry(self, expires):
+        limit = time.time() + self.local_timeout
+        return limit if expires is None else min(expires, limit)
+
+    def remember(self, local_key, raw):
+        """Store an L2 value in L1 and return the plain value."""
+        if isinstance(raw, Stamped):
+            expires, value = raw
+        else:
+            # Valores crudos (contadores de add/incr): vencimiento desconocido
+            expires, value = None, raw
+        self.store.set(local_key, value, self.local_expiry(expires))
+        return value
+
+    def get(self, key, default=None, version=None):
+        if self.bypass(key):
+            return self.shared.get(key, default, version)
+        self.sync()
+        local_key = self.make_and_validate_key(key, version=version)
+        value = self.store.get(local_key, self._missing_key)
+        if value is not self._missing_key:
+            record_cache_lookup(1, 0)
+            return value
+        raw = self.shared.get(key, self._missing_key, version)
+        if raw is self._missing_key:
+            record_cache_lookup(0, 1)
+            return default
+        record_cache_lookup(1, 0)
+        return self.remember(local_key, raw)
+
+    async def aget(self, key, default=None, version=None):
+        # Un acierto en L1 no sale del event loop; lo demás va a un hilo propio
+        if not self.bypass(key) and self.fresh():
+            value = self.store.get(self.make_and_validate_key(key, version=version), self._missing_key)
+            if value is not self._missing_key:
+                record_cache_lookup(1, 0)
+                return value
+        return await sync_to_async(self.get, thread_sensitive=False)(key, default, version)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found, misses = {}, []
+        self.sync()
+        for key in keys:
+            if self.bypass(key):
+                misses.append(key)
+                continue
+            value = self.store.get(self.make_and_validate_key(key, version=version), self._missing_key)
+            if value is self._missing_key:
+                misses.append(key)
+            else:
+                found[key] = value
+        if misses:
+            for key, raw in self.shared.get_many(misses, version=version).items():
+                if self.bypass(key):
+                    found[key] = raw
+                else:
+                    found[key] = self.remember(self.make_and_validate_key(key, version=version), raw)
+        record_cache_lookup(len(found), len(keys) - len(found))
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.bypass(key):
+            return self.shared.set(key, value, timeout, version)
+        timeout = self.timeout_seconds(timeout)
+        local_key = self.make_and_validate_key(key, version=version)
+        if timeout is not None and timeout <= 0:
+            self.delete(key, version)
+            return
+        expires = None if timeout is None else time.time() + timeout
+        self.shared.set(key, Stamped(expires, value), timeout, version)
+        self.store.set(local_key, value, self.local_expiry(expires))
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return await sync_to_async(self.set, thread_sensitive=False)(key, value, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        for key, value in data.items():
+            self.set(key, value, timeout, version)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # Sin sello: lo agregado con add() puede incrementarse con incr()
+        if self.bypass(key):
+            return self.shared.add(key, value, timeout, version)
+        local_key = self.make_and_validate_key(key, version=version)
+        added = self.shared.add(key, value, self.timeout_seconds(timeout), version)
+        if added:
+            self.store.delete(local_key)
+        return added
+
+    async def aadd(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return await sync_to_async(self.add, thread_sensitive=False)(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version)
+        if not self.bypass(key):
+            self.store.delete(self.make_and_validate_key(key, version=version))
+            self.broadcast()
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        if not self.bypass(key):
+            self.store.delete(self.make_and_validate_key(key, version=version))
+        return self.shared.touch(key, self.timeout_seconds(timeout), version)
+
+    def delete(self, key, version=None):
+        deleted = self.shared.delete(key, version)
+        if not self.bypass(key):
+            self.store.delete(self.make_and_validate_key(key, version=version))
+            self.broadcast()
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        self.shared.delete_many(keys, version)
+        for key in keys:
+            self.store.delete(self.make_and_validate_key(key, version=version))
+        self.broadcast()
+
+    def has_key(self, key, version=None):
+        return self.get(key, self._missing_key, version) is not self._missing_key
+
+    def clear(self):
+        self.shared.clear()
+        self.store.clear()
+        self.broadcast()
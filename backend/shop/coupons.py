@@ -0,0 +1,182 @@
+"""Process-local index of coupon rules.
+
+Coupon codes are stored uppercase (``Coupon.normalize_code``), so lookups
+are exact matches on the unique index. On top of that each process keeps
+``code -> CouponRule`` for the active coupons, rebuilt when the coupon
+generation changes (bumped by the ``Coupon`` save/delete receivers), so
+validation and order pricing read coupon metadata without a query.
+
+Usage is not part of the snapshot. A coupon with ``usage_limit`` has its
+limit split across ``CouponUsageShard`` rows whose capacities add up to
+the limit; an order takes one use with a guarded UPDATE on a random shard
+(``redeem``), so concurrent checkouts of a popular coupon lock different
+rows and the limit is still never exceeded. Every use is recorded as a
+``CouponRedemption`` and ``Coupon.used_count`` is reconciled from that
+ledger in batch (``manage.py reconcile_coupon_usage``).
+"""
+import random
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import COUPON_GENERATION, Coupon, CouponRedemption, CouponUsageShard, get_generation
+
+
+@dataclass(frozen=True)
+class CouponRule:
+    pk: int
+    code: str
+    type: str
+    amount: Decimal
+    percent: Decimal
+    percent_cap: Decimal
+    min_subtotal: Decimal
+    expires_at: Optional[datetime]
+    usage_limit: Optional[int]
+    shards: int = 0
+
+    def is_live(self, now=None):
+        return self.expires_at is None or self.expires_at > (now or timezone.now())
+
+
+_lock = threading.Lock()
+_current = (None, {})
+
+
+def get_rules():
+    """Return ``{code: CouponRule}`` for the current coupon generation."""
+    global _current
+    generation = get_generation(COUPON_GENERATION)
+    built_for, rules = _current
+    if built_for == generation:
+        return rules
+    with _lock:
+        built_for, rules = _current
+        if built_for != generation:
+            rules = {
+                coupon.code: CouponRule(
+                    pk=coupon.pk,
+                    code=coupon.code,
+                    type=coupon.type,
+                    amount=coupon.amount,
+                    percent=coupon.percent,
+                    percent_cap=coupon.percent_cap,
+                    min_subtotal=coupon.min_subtotal,
+                    expires_at=coupon.expires_at,
+                    usage_limit=coupon.usage_limit,
+                    shards=coupon.shards,
+                )
+                for coupon in Coupon.objects.filter(active=True).annotate(shards=Count('usage_shards'))
+            }
+            _current = (generation, rules)
+    return rules
+
+
+def get_rule(code):
+    """Active, unexpired rule for ``code`` (any case), or None. No query on the hot path."""
+    rule = get_rules().get(Coupon.normalize_code(code))
+    if rule is None or not rule.is_live():
+        return None
+    return rule
+
+
+def has_uses_left(rule):
+    if rule.usage_limit is None:
+        return True
+    return CouponUsageShard.objects.filter(coupon_id=rule.pk, used__lt=F('capacity')).exists()
+
+
+def get_valid_rule(code):
+    """Rule for ``code`` if it can be applied right now (one query only for limited coupons)."""
+    rule = get_rule(code)
+    if rule is None or not has_uses_left(rule):
+        return None
+    return rule
+
+
+def redeem(rule):
+    """Take one use of ``rule`` inside the order transaction.
+
+    Returns ``(True, shard)`` on success (``shard`` is None for coupons
+    without limit) and ``(False, None)`` once every shard is full.
+    """
+    if rule.usage_limit is None:
+        return True, None
+    shards = CouponUsageShard.objects.filter(coupon_id=rule.pk)
+    if rule.shards:
+        # Caso común: un solo UPDATE sobre un fragmento al azar
+        shard = random.randrange(rule.shards)
+        if shards.filter(shard=shard, used__lt=F('capacity')).update(used=F('used') + 1):
+            return True, shard
+    # Fragmento lleno: probar los que todavía tienen lugar
+    candidates = list(shards.filter(used__lt=F('capacity')).values_list('shard', flat=True))
+    random.shuffle(candidates)
+    for shard in candidates:
+        if shards.filter(shard=shard, used__lt=F('capacity')).update(used=F('used') + 1):
+            return True, shard
+    return False, None
+
+
+def provision_shards(coupon):
+    """Create or rebalance ``coupon``'s usage shards so their capacities add up to ``usage_limit``.
+
+    Uses already taken stay in their shard; the remaining ones are split
+    evenly. A coupon without shards starts with ``used_count`` in shard 0.
+    """
+    if coupon.usage_limit is None:
+        CouponUsageShard.objects.filter(coupon=coupon).delete()
+        return
+    count = max(1, min(settings.COUPON_USAGE_SHARDS, coupon.usage_limit))
+    with transaction.atomic():
+        shards = {
+            s.shard: s for s in CouponUsageShard.objects.select_for_update().filter(coupon=coupon)
+        }
+        seed = 0 if shards else coupon.used_count
+        missing = [
+            CouponUsageShard(coupon=coupon, shard=n, capacity=0, used=seed if n == 0 else 0)
+            for n in range(count) if n not in shards
+        ]
+        for shard in CouponUsageShard.objects.bulk_create(missing):
+            shards[shard.shard] = shard
+        remaining = max(coupon.usage_limit - sum(s.used for s in shards.values()), 0)
+        base, extra = divmod(remaining, count)
+        for n, shard in shards.items():
+            # Fragmentos sobrantes (se redujo COUPON_USAGE_SHARDS) quedan llenos
+            share = base + (1 if n < extra else 0) if n < count else 0
+            shard.capacity = shard.used + share
+        CouponUsageShard.objects.bulk_update(shards.values(), ['capacity'])
+
+
+@receiver(post_save, sender=Coupon)
+def provision_coupon_shards(sender, instance, raw=False, **kwargs):
+    if not raw:
+        provision_shards(instance)
+
+
+def reconcile_usage():
+    """Set ``used_count`` from the redemption ledger for every coupon.
+
+    Returns ``[(code, redemptions, shard_used)]`` for limited coupons whose
+    shards disagree with the ledger (e.g. orders deleted after the fact).
+    """
+    redemptions = CouponRedemption.objects.filter(coupon=OuterRef('pk')).values('coupon')
+    Coupon.objects.update(used_count=Coalesce(
+        Subquery(redemptions.annotate(n=Count('pk')).values('n')), 0
+    ))
+    mismatches = (
+        Coupon.objects.filter(usage_limit__isnull=False)
+        .annotate(shard_used=Sum('usage_shards__used'))
+        .exclude(shard_used=F('used_count'))
+        .order_by('code')
+    )
+    return [(c.code, c.used_count, c.shard_used or 0) for c in mismatches]
@@ -0,0 +1,90 @@
+"""PostgreSQL backend that borrows connections from a ``psycopg_pool`` pool.
+
+Selected by ``DJANGO_DB_POOL=True`` (see settings). Each process keeps one
+``ConnectionPool`` per alias and database, shared by all its threads:
+opening a connection takes one from the pool and closing it (at the end of
+every request, since ``CONN_MAX_AGE`` must be 0) gives it back. The pool
+keeps between ``min_size`` and ``max_size`` connections open, recycles them
+after ``max_lifetime`` seconds and, with ``CONN_HEALTH_CHECKS``, checks
+each one before handing it out.
+"""
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def pool_options(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        # Las conexiones de mantenimiento (crear la base de tests) no usan el pool
+        if not options or self.alias == NO_DB_ALIAS:
+            return None
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured('Pooled connections require CONN_MAX_AGE = 0.')
+        return options
+
+    @property
+    def pool(self):
+        options = self.pool_options
+        if options is None:
+            return None
+        key = (self.alias, self.settings_dict['NAME'])
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                try:
+                    from psycopg_pool import ConnectionPool
+                except ImportError as exc:
+                    raise ImproperlyConfigured(
+                        'DJANGO_DB_POOL requires psycopg_pool >= 3.2 (pip install "psycopg-pool>=3.2").'
+                    ) from exc
+                pool = ConnectionPool(
+                    kwargs=self.get_connection_params(),
+                    open=False,
+                    check=ConnectionPool.check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+                    name=f'{self.alias}-pool',
+                    **options,
+                )
+                _pools[key] = pool
+        return pool
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        self.isolation_level = IsolationLevel(isolation_level or IsolationLevel.READ_COMMITTED)
+        pool.open()
+        connection = pool.getconn()
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # putconn hace rollback de lo pendiente y descarta conexiones rotas
+            pool.putconn(self.connection)
+        self.connection = None
+
+    def close_pool(self):
+        """Close this alias' pool (e.g. before forking or at the end of a benchmark)."""
+        key = (self.alias, self.settings_dict['NAME'])
+        with _pools_lock:
+            pool = _pools.pop(key, None)
+        if pool is not None:
+            pool.close()
@@ -0,0 +1,50 @@
+import django_filters
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from rest_framework.settings import api_settings
+
+from .models import Product
+from .search import search_products, tokenize
+
+
+class ProductFilterSet(django_filters.FilterSet):
+    # ``promoted`` solo cuenta mientras no venció ``promoted_until``
+    promoted = django_filters.BooleanFilter(method='filter_promoted')
+
+    class Meta:
+        model = Product
+        fields = ['category', 'promoted']
+
+    def filter_promoted(self, queryset, name, value):
+        return queryset.promoted(running=value)
+
+
+class ProductSearchFilter(BaseFilterBackend):
+    """Full-text search over the product index (see ``shop.search``).
+
+    Always annotates ``relevance`` so it can be used as an ordering field.
+    """
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        return search_products(queryset, request.query_params.get(self.search_param, ''))
+
+
+class ProductOrderingFilter(OrderingFilter):
+    """Order search results by relevance unless an ordering is requested.
+
+    ``?ordering=has_offer`` lists offers first, as when ``has_offer`` was an
+    annotation with 0 for "on offer"; the column is now a real boolean, so
+    the direction of that term is flipped.
+    """
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        terms = super().remove_invalid_fields(queryset, fields, view, request)
+        flipped = {'has_offer': '-has_offer', '-has_offer': 'has_offer'}
+        return [flipped.get(term, term) for term in terms]
+
+    def get_ordering(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param) and tokenize(
+            request.query_params.get(ProductSearchFilter.search_param, '')
+        ):
+            return ['-relevance', *(self.get_default_ordering(view) or ())]
+        return super().get_ordering(request, queryset, view)
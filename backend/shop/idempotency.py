@@ -0,0 +1,75 @@
+"""``Idempotency-Key`` support for order creation.
+
+The first request with a key claims it (unique row) before creating the
+order and stores the response afterwards; repeats with the same key and
+payload get that response back without touching products or coupons. Keys
+older than ``ORDER_IDEMPOTENCY_TTL`` seconds are treated as unused.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def fingerprint(data):
+    raw = json.dumps(data, sort_keys=True, separators=(',', ':'), cls=DjangoJSONEncoder)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def expired_before():
+    return timezone.now() - timedelta(seconds=settings.ORDER_IDEMPOTENCY_TTL)
+
+
+def claim(key, request_hash):
+    """Return ``(record, created)``; ``created`` is False if the key was already used."""
+    IdempotencyKey.objects.filter(key=key, created_at__lt=expired_before()).delete()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(key=key, request_hash=request_hash), True
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(key=key).first(), False
+
+
+def replay(record, request_hash):
+    """Response for a repeated key: the stored one, or 409/422 when it cannot be replayed."""
+    if record is None or record.status_code is None:
+        return Response(
+            {'detail': 'Hay un pedido en curso con esta Idempotency-Key'},
+            status=status.HTTP_409_CONFLICT,
+        )
+    if record.request_hash != request_hash:
+        return Response(
+            {'detail': 'La Idempotency-Key ya se usó con otro pedido'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(record.response, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+def store(record, response):
+    # Los errores 5xx no se guardan: el cliente puede reintentar con la misma clave
+    if response.status_code >= 500:
+        release(record)
+        return
+    IdempotencyKey.objects.filter(pk=record.pk).update(
+        status_code=response.status_code,
+        response=json.loads(json.dumps(response.data, cls=DjangoJSONEncoder)),
+    )
+
+
+def release(record):
+    IdempotencyKey.objects.filter(pk=record.pk).delete()
+
+
+def purge_expired():
+    return IdempotencyKey.objects.filter(created_at__lt=expired_before()).delete()[0]
@@ -0,0 +1,78 @@
+"""Public image URLs, computed once per image instead of on every request.
+
+``Product`` and ``Category`` store ``image_url`` and ``thumbnail_url``. The
+pre_save receivers in ``models.py`` clear them when the image changes and the
+post_save receivers fill them once the file is committed (the storage may
+rename it while uploading). Rows saved before these columns existed fall back
+to building the URL on read until ``manage.py refresh_image_urls`` runs.
+"""
+import logging
+
+import cloudinary
+from cloudinary_storage.storage import MediaCloudinaryStorage
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_TRANSFORMATION = {
+    'width': 400,
+    'height': 400,
+    'crop': 'limit',
+    'fetch_format': 'auto',
+    'quality': 'auto',
+}
+
+
+def build_image_urls(storage, name):
+    """Return ``(url, thumbnail_url)`` for the file ``name`` in ``storage``."""
+    if not name:
+        return '', ''
+    url = storage.url(name)
+    if isinstance(storage, MediaCloudinaryStorage):
+        resource = cloudinary.CloudinaryResource(
+            storage._prepend_prefix(name),
+            default_resource_type=storage._get_resource_type(name),
+        )
+        thumbnail = resource.build_url(**THUMBNAIL_TRANSFORMATION)
+    else:
+        thumbnail = url
+    return url, thumbnail
+
+
+def storage_configured(storage):
+    """False for Cloudinary storage without credentials (local dev, tests)."""
+    if isinstance(storage, MediaCloudinaryStorage):
+        return bool(cloudinary.config().cloud_name)
+    return True
+
+
+def stored_image_url(obj, attr='image_url'):
+    """Stored URL of ``obj`` with a fallback for rows not refreshed yet."""
+    url = getattr(obj, attr)
+    if url or not obj.image:
+        return url or None
+    return build_image_urls(obj.image.storage, obj.image.name)[attr == 'thumbnail_url']
+
+
+def absolute_image_url(url, request):
+    if not url or request is None:
+        return url or None
+    return request.build_absolute_uri(url)
+
+
+def refresh_image_urls(instance, save=True):
+    """Recompute and persist the stored URLs of ``instance``."""
+    if not storage_configured(instance.image.storage):
+        # Sin Cloudinary configurado no hay URL que guardar: se arma al leer
+        logger.debug('Image storage not configured; skipping URLs for %r', instance)
+        return
+    try:
+        instance.image_url, instance.thumbnail_url = build_image_urls(
+            instance.image.storage, instance.image.name
+        )
+    except Exception:
+        logger.exception('Error building image URLs for %r', instance)
+        return
+    if save and instance.pk:
+        type(instance)._base_manager.filter(pk=instance.pk).update(
+            image_url=instance.image_url, thumbnail_url=instance.thumbnail_url
+        )
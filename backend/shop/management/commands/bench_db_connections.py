@@ -0,0 +1,101 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import ConnectionHandler
+
+MODES = ('connect', 'persistent', 'pool')
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare requests/sec of connect-per-request (CONN_MAX_AGE=0), persistent connections '
+        'and the psycopg pool with concurrent clients. Each simulated request runs a catalog '
+        'query and then closes the connection the way request_finished does. The pool mode '
+        'needs PostgreSQL and psycopg_pool.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent clients')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per mode')
+        parser.add_argument('--pool-size', type=int, default=4, help='max_size of the pool')
+        parser.add_argument('--mode', action='append', choices=MODES)
+
+    def handle(self, *args, **options):
+        base = dict(connections['default'].settings_dict)
+        modes = options['mode'] or MODES
+        if 'pool' in modes and connections['default'].vendor != 'postgresql':
+            raise CommandError('The pool mode needs PostgreSQL (set DATABASE_URL).')
+        self.stdout.write(
+            f'{connections["default"].vendor}: {options["threads"]} clients, '
+            f'{options["requests"]} requests per mode'
+        )
+        for mode in modes:
+            handler = ConnectionHandler({'default': base, 'bench': self.settings_for(mode, base, options)})
+            try:
+                elapsed, latencies, backends = self.run(handler, options['threads'], options['requests'])
+            finally:
+                if mode == 'pool':
+                    handler['bench'].close_pool()
+            latencies.sort()
+            self.stdout.write(
+                f'  {mode:<11} {len(latencies) / elapsed:8.1f} req/s  '
+                f'p50 {statistics.median(latencies) * 1000:6.2f} ms  '
+                f'p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.2f} ms  '
+                f'backends {backends}'
+            )
+
+    def settings_for(self, mode, base, options):
+        settings = {**base, 'OPTIONS': dict(base.get('OPTIONS', {})), 'CONN_MAX_AGE': 0}
+        settings['OPTIONS'].pop('pool', None)
+        if settings['ENGINE'] == 'shop.db_backends.postgresql_pool':
+            settings['ENGINE'] = 'django.db.backends.postgresql'
+        if mode == 'persistent':
+            settings['CONN_MAX_AGE'] = None
+        elif mode == 'pool':
+            settings['ENGINE'] = 'shop.db_backends.postgresql_pool'
+            settings['OPTIONS']['pool'] = {'min_size': options['pool_size'], 'max_size': options['pool_size']}
+        return settings
+
+    def run(self, handler, threads, requests):
+        remaining = iter(range(requests))
+        lock = threading.Lock()
+        latencies = []
+        backends = []
+
+        def client():
+            connection = handler['bench']
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    start = time.perf_counter()
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            'SELECT id, name, price, stock FROM shop_product '
+                            'WHERE is_active ORDER BY id LIMIT 20'
+                        )
+                        cursor.fetchall()
+                    # Lo mismo que close_old_connections al terminar el request
+                    connection.close_if_unusable_or_obsolete()
+                    with lock:
+                        latencies.append(time.perf_counter() - start)
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            'SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()'
+                        )
+                        backends.append(cursor.fetchone()[0])
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=client) for _ in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return time.perf_counter() - start, latencies, max(backends, default='-')
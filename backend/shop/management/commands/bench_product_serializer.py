@@ -0,0 +1,87 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from shop.models import Category, Product
+from shop.serializers import ProductSerializer, ProductValuesSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare per-item cost of ProductSerializer vs ProductValuesSerializer on a page of '
+        'products. Temporary rows are created inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100, help='Products per page')
+        parser.add_argument('--rounds', type=int, default=50)
+
+    def handle(self, *args, **options):
+        items, rounds = options['items'], options['rounds']
+        try:
+            with transaction.atomic():
+                self.run(items, rounds)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, items, rounds):
+        category = Category.objects.create(name='Bench', slug=f'bench-{time.time_ns()}')
+        Product.objects.bulk_create(
+            Product(
+                category=category,
+                name=f'Bench {i}',
+                description='Producto de prueba',
+                price=Decimal('100.00') + i,
+                offer_price=Decimal('90.00') + i if i % 3 == 0 else None,
+                stock=i,
+                promoted=i % 10 == 0,
+                promoted_until=timezone.now() if i % 10 == 0 else None,
+            )
+            for i in range(items)
+        )
+        queryset = Product.objects.filter(category=category).select_related('category').order_by('id')
+        request = Request(RequestFactory().get('/api/products/'))
+        context = {'request': request}
+
+        def drf(instances=None):
+            instances = list(queryset.all()) if instances is None else instances
+            return ProductSerializer(instances, many=True, context=context).data
+
+        def fast(rows=None):
+            rows = list(queryset.values(*ProductValuesSerializer.value_fields)) if rows is None else rows
+            return ProductValuesSerializer(rows, context=context).data
+
+        renderer = JSONRenderer()
+        if renderer.render(drf()) != renderer.render(fast()):
+            raise CommandError('Fast path output differs from ProductSerializer')
+
+        instances = list(queryset.all())
+        rows = list(queryset.values(*ProductValuesSerializer.value_fields))
+        cases = (
+            ('fetch + serialize', (('ProductSerializer', drf, None), ('ProductValuesSerializer', fast, None))),
+            ('serialize only', (('ProductSerializer', drf, instances), ('ProductValuesSerializer', fast, rows))),
+        )
+        self.stdout.write(f'{items} items x {rounds} rounds')
+        for title, runs in cases:
+            self.stdout.write(f'{title}:')
+            baseline = None
+            for label, func, data in runs:
+                func(data)  # warm-up
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    func(data)
+                per_item = (time.perf_counter() - start) / (rounds * items) * 1e6
+                speedup = f'  ({baseline / per_item:.1f}x)' if baseline else ''
+                baseline = baseline or per_item
+                self.stdout.write(f'  {label:<24} {per_item:8.1f} us/item{speedup}')
@@ -0,0 +1,83 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection
+from django.test.utils import override_settings
+from rest_framework import serializers
+
+from shop.models import Category, Order, Product
+from shop.serializers import OrderSerializer
+
+STRATEGIES = ('lock', 'conditional')
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare orders/sec of the ORDER_STOCK_STRATEGY options with concurrent buyers of a '
+        'single hot product. Creates (and afterwards deletes) a temporary product and its '
+        'orders; deleting them also takes them back out of the sales rollups. Meaningful on PostgreSQL, SQLite serializes every writer.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--orders', type=int, default=400, help='Orders per strategy')
+        parser.add_argument('--strategy', action='append', choices=STRATEGIES)
+
+    def handle(self, *args, **options):
+        workers, orders = options['workers'], options['orders']
+        category = Category.objects.create(name='Bench', slug=f'bench-{time.time_ns()}')
+        product = Product.objects.create(
+            category=category, name='Leche (bench)', price=Decimal('10.00'), stock=orders
+        )
+        self.stdout.write(f'{connection.vendor}: {workers} workers, {orders} orders on one product')
+        try:
+            for strategy in options['strategy'] or STRATEGIES:
+                Product.objects.filter(pk=product.pk).update(stock=orders)
+                with override_settings(ORDER_STOCK_STRATEGY=strategy):
+                    elapsed, placed, errors = self.run(product, workers, orders)
+                self.stdout.write(
+                    f'  {strategy:<12} {placed / elapsed:8.1f} orders/s '
+                    f'({placed} placed, {errors} errors, {elapsed:.2f}s)'
+                )
+        finally:
+            Order.objects.filter(items__product=product).delete()
+            product.delete()
+            category.delete()
+
+    def run(self, product, workers, orders):
+        remaining = iter(range(orders))
+        lock = threading.Lock()
+        counts = {'placed': 0, 'errors': 0}
+        data = {
+            'name': 'Bench', 'phone': '0', 'address': '-', 'payment_method': 'cash',
+            'delivery_method': 'pickup', 'items': [{'product_id': product.pk, 'quantity': 1}],
+        }
+
+        def buyer():
+            close_old_connections()
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    serializer = OrderSerializer(data=data)
+                    serializer.is_valid(raise_exception=True)
+                    try:
+                        serializer.save()
+                        outcome = 'placed'
+                    except (serializers.ValidationError, DatabaseError):
+                        outcome = 'errors'
+                    with lock:
+                        counts[outcome] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buyer) for _ in range(workers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start, counts['placed'], counts['errors']
@@ -0,0 +1,93 @@
+import http.client
+import statistics
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = (
+    '/api/products/?page=1',
+    '/api/categories/',
+    '/api/config/',
+    '/api/announcements/',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the read-only endpoints of a running server at increasing concurrency. '
+        'Start the server with GUNICORN_WORKERS=1 and DJANGO_SERVER=wsgi or asgi (see '
+        'entrypoint.sh) to compare how many concurrent requests one process sustains.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--path', action='append', help='Path to request (repeatable)')
+        parser.add_argument(
+            '--concurrency', type=int, action='append', help='Concurrent clients (repeatable)'
+        )
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per level')
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme not in ('http', 'https') or not url.hostname:
+            raise CommandError(f'Invalid --url: {options["url"]}')
+        paths = options['path'] or DEFAULT_PATHS
+        levels = options['concurrency'] or [1, 8, 32]
+        self.stdout.write(
+            f'{options["url"]}: {len(paths)} paths, {options["requests"]} requests per level'
+        )
+        for level in levels:
+            elapsed, latencies, statuses, server = self.run(url, paths, level, options)
+            ok = sum(count for status, count in statuses.items() if status in (200, 304))
+            latencies.sort()
+            p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+            median = statistics.median(latencies) if latencies else 0
+            self.stdout.write(
+                f'  c={level:<4} {ok / elapsed:8.1f} req/s  p50 {median * 1000:7.2f} ms  '
+                f'p95 {p95 * 1000:7.2f} ms  errors {len(latencies) - ok}  ({server})'
+            )
+
+    def run(self, url, paths, concurrency, options):
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        remaining = iter(range(options['requests']))
+        lock = threading.Lock()
+        latencies = []
+        statuses = Counter()
+        servers = set()
+
+        def client():
+            # Una conexión keep-alive por cliente, como un navegador
+            connection = connection_class(url.hostname, url.port, timeout=options['timeout'])
+            try:
+                while True:
+                    with lock:
+                        n = next(remaining, None)
+                    if n is None:
+                        return
+                    start = time.perf_counter()
+                    try:
+                        connection.request('GET', paths[n % len(paths)], headers={'Accept': 'application/json'})
+                        response = connection.getresponse()
+                        response.read()
+                        status, server = response.status, response.getheader('Server', '?')
+                    except (OSError, http.client.HTTPException):
+                        connection.close()
+                        status, server = 'error', None
+                    with lock:
+                        latencies.append(time.perf_counter() - start)
+                        statuses[status] += 1
+                        servers.add(server)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start, latencies, statuses, ', '.join(sorted(filter(None, servers)))
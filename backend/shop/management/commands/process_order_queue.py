@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from shop.order_queue import process_batch
+
+
+class Command(BaseCommand):
+    help = 'Drain the order intake queue (ORDER_INTAKE_MODE=queue). Several workers can run at once.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=50)
+        parser.add_argument('--sleep', type=float, default=0.5, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Process until the queue is empty and exit')
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            close_old_connections()
+            handled = process_batch(options['batch'])
+            processed += handled
+            if handled:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'{processed} tickets processed'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from shop.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete order Idempotency-Key records older than ORDER_IDEMPOTENCY_TTL.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f'{purge_expired()} expired keys deleted'))
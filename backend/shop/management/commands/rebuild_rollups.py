@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from shop.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the sales rollup tables (daily sales, product sales, coupon discounts) '
+        'from the order history, in chunks. Run it when checkout is quiet.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Orders per batch')
+
+    def handle(self, *args, **options):
+        processed = rebuild(chunk_size=options['chunk_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'Rollups rebuilt from {processed} orders'))
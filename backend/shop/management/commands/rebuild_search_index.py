@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from shop.models import Product
+from shop.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product full-text index (after bulk updates that bypass signals).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        rebuild_index(Product, using=options['database'])
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
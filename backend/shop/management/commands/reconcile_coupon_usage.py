@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from shop.coupons import reconcile_usage
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute Coupon.used_count from the CouponRedemption ledger and report limited '
+        'coupons whose usage shards disagree with it.'
+    )
+
+    def handle(self, *args, **options):
+        mismatches = reconcile_usage()
+        for code, redemptions, shard_used in mismatches:
+            self.stdout.write(self.style.WARNING(
+                f'{code}: {redemptions} redemptions, {shard_used} uses taken in shards'
+            ))
+        self.stdout.write(self.style.SUCCESS(f'used_count reconciled ({len(mismatches)} mismatches)'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from shop.images import refresh_image_urls
+from shop.models import Category, Product
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored image URLs of categories and products (backfill / CDN change).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true', help='Only rows without a stored URL')
+
+    def handle(self, *args, **options):
+        for model in (Category, Product):
+            queryset = model._base_manager.exclude(image='').exclude(image__isnull=True)
+            if options['missing']:
+                queryset = queryset.filter(image_url='')
+            count = 0
+            for instance in queryset.only('pk', 'image').iterator():
+                refresh_image_urls(instance)
+                count += 1
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {count}')
+        self.stdout.write(self.style.SUCCESS('Image URLs refreshed'))
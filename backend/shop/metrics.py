@@ -0,0 +1,230 @@
+"""Per-view request metrics, summed across workers through a shared directory.
+
+``shop.middleware.MetricsMiddleware`` records, per resolved URL name and
+method: requests by status, a latency histogram, DB queries and DB time (an
+execute wrapper installed on every connection) and cache hits/misses
+(reported by ``TwoTierCache``). Each process accumulates in memory and, at most every
+``METRICS_FLUSH_INTERVAL`` seconds, writes a snapshot to ``METRICS_DIR``;
+``render()`` sums every snapshot into the Prometheus text format. Snapshots
+of workers that exited are kept so counters never go back; ``entrypoint.sh``
+clears the directory on start.
+"""
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Métodos que llegan como label; cualquier otro (lo elige el cliente) cuenta como 'other'
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+# Lo que consume el request en curso (también visible desde sync_to_async)
+_current = ContextVar('metrics_sample', default=None)
+
+
+class Sample:
+    __slots__ = ('queries', 'db_time', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def record_cache_lookup(hits, misses):
+    sample = _current.get()
+    if sample is not None:
+        sample.cache_hits += hits
+        sample.cache_misses += misses
+
+
+def count_query(execute, sql, params, many, context):
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.db_time += time.perf_counter() - start
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def empty_stats():
+    return {
+        'statuses': {}, 'buckets': [0] * len(BUCKETS), 'count': 0, 'duration': 0.0,
+        'queries': 0, 'db_time': 0.0, 'cache_hits': 0, 'cache_misses': 0,
+    }
+
+
+def merge(target, stats):
+    for status, count in stats['statuses'].items():
+        target['statuses'][status] = target['statuses'].get(status, 0) + count
+    target['buckets'] = [a + b for a, b in zip(target['buckets'], stats['buckets'])]
+    for field in ('count', 'duration', 'queries', 'db_time', 'cache_hits', 'cache_misses'):
+        target[field] += stats[field]
+
+
+class Registry:
+    """In-process totals keyed by ``(view, method)``."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+            self.flushed_at = 0.0
+            # Con --preload el master importa esto antes del fork: cada worker se renombra
+            self.pid = os.getpid()
+            self.process_id = f'{self.pid}-{time.time_ns()}'
+
+    def record(self, view, method, status, duration, sample):
+        if self.pid != os.getpid():
+            self.reset()
+        with self.lock:
+            stats = self.views.get((view, method))
+            if stats is None:
+                stats = self.views[(view, method)] = empty_stats()
+            status = str(status)
+            stats['statuses'][status] = stats['statuses'].get(status, 0) + 1
+            index = bisect.bisect_left(BUCKETS, duration)
+            if index < len(BUCKETS):
+                stats['buckets'][index] += 1
+            stats['count'] += 1
+            stats['duration'] += duration
+            stats['queries'] += sample.queries
+            stats['db_time'] += sample.db_time
+            stats['cache_hits'] += sample.cache_hits
+            stats['cache_misses'] += sample.cache_misses
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                {'view': view, 'method': method, **stats, 'statuses': dict(stats['statuses'])}
+                for (view, method), stats in self.views.items()
+            ]
+
+    def flush(self, force=False):
+        """Write this process' snapshot to ``METRICS_DIR`` (rate limited unless ``force``)."""
+        now = time.monotonic()
+        if not force and now - self.flushed_at < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self.flushed_at = now
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = os.path.join(settings.METRICS_DIR, f'{self.process_id}.json')
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+
+registry = Registry()
+
+
+def collect():
+    """Totals of every worker's snapshot, keyed by ``(view, method)``."""
+    registry.flush(force=True)
+    totals = {}
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+        try:
+            with open(path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for entry in entries:
+            key = (entry['view'], entry['method'])
+            merge(totals.setdefault(key, empty_stats()), entry)
+    return totals
+
+
+def labels(**values):
+    def escape(value):
+        return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in values.items()) + '}'
+
+
+def render():
+    """Prometheus text exposition of ``collect()``."""
+    totals = sorted(collect().items())
+    lines = [
+        '# HELP shop_http_requests_total Requests by view, method and status.',
+        '# TYPE shop_http_requests_total counter',
+    ]
+    for (view, method), stats in totals:
+        for status, count in sorted(stats['statuses'].items()):
+            lines.append(f'shop_http_requests_total{labels(view=view, method=method, status=status)} {count}')
+    lines += [
+        '# HELP shop_http_request_duration_seconds Request latency by view and method.',
+        '# TYPE shop_http_request_duration_seconds histogram',
+    ]
+    for (view, method), stats in totals:
+        cumulative = 0
+        for bound, count in zip(BUCKETS, stats['buckets']):
+            cumulative += count
+            lines.append(
+                f'shop_http_request_duration_seconds_bucket{labels(view=view, method=method, le=bound)} {cumulative}'
+            )
+        lines.append(
+            f'shop_http_request_duration_seconds_bucket{labels(view=view, method=method, le="+Inf")} {stats["count"]}'
+        )
+        lines.append(f'shop_http_request_duration_seconds_sum{labels(view=view, method=method)} {stats["duration"]}')
+        lines.append(f'shop_http_request_duration_seconds_count{labels(view=view, method=method)} {stats["count"]}')
+    for name, field, help_text in (
+        ('shop_db_queries_total', 'queries', 'DB queries run by view and method.'),
+        ('shop_db_query_duration_seconds_total', 'db_time', 'Time spent in DB queries.'),
+    ):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (view, method), stats in totals:
+            lines.append(f'{name}{labels(view=view, method=method)} {stats[field]}')
+    lines += [
+        '# HELP shop_cache_lookups_total Default cache lookups by view, method and result.',
+        '# TYPE shop_cache_lookups_total counter',
+    ]
+    for (view, method), stats in totals:
+        for result, field in (('hit', 'cache_hits'), ('miss', 'cache_misses')):
+            lines.append(f'shop_cache_lookups_total{labels(view=view, method=method, result=result)} {stats[field]}')
+    return '\n'.join(lines) + '\n'
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unmatched'
+
+
+def method_label(request):
+    return request.method if request.method in METHODS else 'other'
+
+
+def start_request():
+    """Start collecting DB and cache usage for the current request."""
+    sample = Sample()
+    return sample, _current.set(sample)
+
+
+def finish_request(request, response, duration, sample, token):
+    _current.reset(token)
+    registry.record(view_name(request), method_label(request), response.status_code, duration, sample)
+    try:
+        registry.flush()
+    except OSError:
+        logger.exception('Could not write the metrics snapshot to %s', settings.METRICS_DIR)
@@ -0,0 +1,63 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from . import metrics
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """WhiteNoise that also runs natively under ASGI.
+
+    The upstream middleware is sync-only, which makes Django run the whole
+    request (async views included) through its single sync thread. Here only
+    the static file lookup and response leave the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
+
+
+class MetricsMiddleware:
+    """Outermost middleware: records each request in ``shop.metrics``."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        sample, token = metrics.start_request()
+        start = time.perf_counter()
+        response = self.get_response(request)
+        metrics.finish_request(request, response, time.perf_counter() - start, sample, token)
+        return response
+
+    async def __acall__(self, request):
+        sample, token = metrics.start_request()
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        metrics.finish_request(request, response, time.perf_counter() - start, sample, token)
+        return response
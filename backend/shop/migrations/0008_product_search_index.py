@@ -0,0 +1,79 @@
+# Generated by Django 4.2.10 on 2026-10-18 11:57
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from shop.search import sqlite_has_fts5
+
+POSTGRES_FORWARDS = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'shop_spanish') THEN
+            CREATE TEXT SEARCH CONFIGURATION shop_spanish (COPY = spanish);
+            ALTER TEXT SEARCH CONFIGURATION shop_spanish
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+        END IF;
+    END
+    $$
+    """,
+    """
+    UPDATE shop_product SET search_vector =
+        setweight(to_tsvector('shop_spanish', coalesce(name, '')), 'A')
+        || setweight(to_tsvector('shop_spanish', coalesce(description, '')), 'B')
+    """,
+    "CREATE INDEX IF NOT EXISTS shop_product_search_gin ON shop_product USING gin (search_vector)",
+]
+
+POSTGRES_BACKWARDS = [
+    "DROP INDEX IF EXISTS shop_product_search_gin",
+    "DROP TEXT SEARCH CONFIGURATION IF EXISTS shop_spanish",
+]
+
+SQLITE_FORWARDS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS shop_product_fts USING fts5("
+    "name, description, tokenize = 'unicode61 remove_diacritics 2')",
+    "INSERT INTO shop_product_fts (rowid, name, description) "
+    "SELECT id, name, description FROM shop_product",
+]
+
+SQLITE_BACKWARDS = [
+    "DROP TABLE IF EXISTS shop_product_fts",
+]
+
+
+def _run(schema_editor, postgres, sqlite):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        statements = postgres
+    elif vendor == "sqlite" and sqlite_has_fts5():
+        statements = sqlite
+    else:
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def forwards(apps, schema_editor):
+    _run(schema_editor, POSTGRES_FORWARDS, SQLITE_FORWARDS)
+
+
+def backwards(apps, schema_editor):
+    _run(schema_editor, POSTGRES_BACKWARDS, SQLITE_BACKWARDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0007_coupon_expires_at_coupon_usage_limit_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.10 on 2026-10-18 11:59
+
+from django.db import migrations, models
+
+
+def populate_pricing(apps, schema_editor):
+    Product = apps.get_model("shop", "Product")
+    on_offer = models.Q(offer_price__gt=0)
+    Product.objects.update(
+        has_offer=models.Case(
+            models.When(on_offer, then=models.Value(True)),
+            default=models.Value(False),
+        ),
+        effective_price=models.Case(
+            models.When(on_offer, then=models.F("offer_price")),
+            default=models.F("price"),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0009_product_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="effective_price",
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="has_offer",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(populate_pricing, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["is_active", "-has_offer", "offer_price", "id"], name="product_active_has_offer_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["is_active", "effective_price", "id"], name="product_active_eff_price_idx"),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0010_product_effective_price"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="image_url",
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="thumbnail_url",
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="image_url",
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="thumbnail_url",
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0011_image_urls"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderTicket",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("payload", models.JSONField()),
+                ("status", models.CharField(choices=[("pending", "Pendiente"), ("processing", "Procesando"), ("done", "Confirmado"), ("rejected", "Rechazado")], default="pending", max_length=20)),
+                ("result", models.JSONField(blank=True, null=True)),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("claimed_at", models.DateTimeField(blank=True, null=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                ("order", models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="ticket", to="shop.order")),
+            ],
+            options={
+                "verbose_name": "Ticket de pedido",
+                "verbose_name_plural": "Tickets de pedido",
+                "ordering": ["created_at"],
+                "indexes": [models.Index(fields=["status", "created_at"], name="orderticket_queue_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:17
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+def normalize_codes(apps, schema_editor):
+    Coupon = apps.get_model("shop", "Coupon")
+    coupons = list(Coupon.objects.order_by("pk"))
+    # Los códigos ya normalizados se conservan tal cual
+    taken = {c.code for c in coupons if c.code == c.code.strip().upper()[:40]}
+    for coupon in coupons:
+        code = coupon.code.strip().upper()[:40]
+        if code == coupon.code:
+            continue
+        if code in taken:
+            # Dos códigos que solo diferían en mayúsculas: el otro queda con sufijo
+            suffix = f"-{coupon.pk}"
+            code = code[:40 - len(suffix)] + suffix
+        taken.add(code)
+        Coupon.objects.filter(pk=coupon.pk).update(code=code)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0013_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_codes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="coupon",
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper("code"), name="coupon_code_upper_uniq"),
+        ),
+    ]
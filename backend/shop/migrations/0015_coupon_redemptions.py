@@ -0,0 +1,96 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def coupon_resolver(coupons):
+    """Map a historic ``Order.coupon_code`` (as typed) to its coupon.
+
+    Orders kept the code as the customer typed it, while 0014 upper-cased
+    coupon codes and renamed case-only duplicates to ``<code>-<pk>``
+    (truncating the code if needed). Orders used to look coupons up with
+    ``iexact``, so when several match, the lowest pk wins.
+    """
+    exact, prefixed = {}, []
+    for coupon in coupons:
+        exact.setdefault(coupon.code, []).append(coupon)
+        suffix = f"-{coupon.pk}"
+        if coupon.code.endswith(suffix):
+            base = coupon.code[:-len(suffix)]
+            if len(base) == 40 - len(suffix):
+                # 0014 pudo haber truncado el código original
+                prefixed.append((base, coupon))
+            else:
+                exact.setdefault(base, []).append(coupon)
+
+    def resolve(code):
+        code = code.strip().upper()[:40]
+        found = exact.get(code, []) + [coupon for base, coupon in prefixed if code.startswith(base)]
+        return min(found, key=lambda coupon: coupon.pk, default=None)
+
+    return resolve
+
+
+def backfill(apps, schema_editor):
+    Coupon = apps.get_model("shop", "Coupon")
+    CouponRedemption = apps.get_model("shop", "CouponRedemption")
+    CouponUsageShard = apps.get_model("shop", "CouponUsageShard")
+    Order = apps.get_model("shop", "Order")
+    coupons = list(Coupon.objects.order_by("pk"))
+    resolve = coupon_resolver(coupons)
+    # Pedidos históricos con cupón: entran al registro sin fragmento
+    redemptions = []
+    for pk, code in Order.objects.exclude(coupon_code="").values_list("pk", "coupon_code").iterator():
+        coupon = resolve(code)
+        if coupon is not None:
+            redemptions.append(CouponRedemption(coupon=coupon, order_id=pk))
+    CouponRedemption.objects.bulk_create(redemptions, batch_size=500)
+    shards = []
+    for coupon in coupons:
+        if coupon.usage_limit is None:
+            continue
+        # Los usos ya tomados quedan en el fragmento 0; el resto se reparte
+        count = max(1, min(settings.COUPON_USAGE_SHARDS, coupon.usage_limit))
+        base, extra = divmod(max(coupon.usage_limit - coupon.used_count, 0), count)
+        for n in range(count):
+            used = coupon.used_count if n == 0 else 0
+            capacity = used + base + (1 if n < extra else 0)
+            shards.append(CouponUsageShard(coupon=coupon, shard=n, capacity=capacity, used=used))
+    CouponUsageShard.objects.bulk_create(shards, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0014_coupon_code_normalized"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CouponUsageShard",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("shard", models.PositiveSmallIntegerField()),
+                ("capacity", models.PositiveIntegerField()),
+                ("used", models.PositiveIntegerField(default=0)),
+                ("coupon", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="usage_shards", to="shop.coupon")),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CouponRedemption",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("shard", models.PositiveSmallIntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("coupon", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="redemptions", to="shop.coupon")),
+                ("order", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name="coupon_redemption", to="shop.order")),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="couponusageshard",
+            constraint=models.UniqueConstraint(fields=("coupon", "shard"), name="coupon_usage_shard_uniq"),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0015_coupon_redemptions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CouponDailySales",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField()),
+                ("code", models.CharField(max_length=40)),
+                ("orders", models.PositiveIntegerField(default=0)),
+                ("discount_total", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                "verbose_name": "Descuentos por cupón",
+                "verbose_name_plural": "Descuentos por cupón",
+                "ordering": ["-day", "code"],
+            },
+        ),
+        migrations.CreateModel(
+            name="DailySales",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField(unique=True)),
+                ("orders", models.PositiveIntegerField(default=0)),
+                ("revenue", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("discount_total", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("shipping_total", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                "verbose_name": "Ventas diarias",
+                "verbose_name_plural": "Ventas diarias",
+                "ordering": ["-day"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ProductDailySales",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField()),
+                ("units", models.PositiveIntegerField(default=0)),
+                ("revenue", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("category", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="daily_sales", to="shop.category")),
+                ("product", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="daily_sales", to="shop.product")),
+            ],
+            options={
+                "verbose_name": "Ventas por producto",
+                "verbose_name_plural": "Ventas por producto",
+                "ordering": ["-day", "product"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="coupondailysales",
+            constraint=models.UniqueConstraint(fields=("day", "code"), name="coupon_daily_sales_uniq"),
+        ),
+        migrations.AddIndex(
+            model_name="productdailysales",
+            index=models.Index(fields=["category", "day"], name="product_sales_category_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="productdailysales",
+            constraint=models.UniqueConstraint(fields=("day", "product"), name="product_daily_sales_uniq"),
+        ),
+    ]
@@ -1,20 +1,118 @@
 import logging
+import time
+import uuid
 
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.core.cache import cache
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Upper
 from django.db.models.signals import post_save, post_delete, pre_save
-from django.dispatch import receiver
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from . import images, search
 
 logger = logging.getLogger(__name__)
 
 SITE_CONFIG_CACHE_KEY = 'site_config'
 SITE_CONFIG_CACHE_TIMEOUT = 60 * 5
 
-
-class Category(models.Model):
+# Contadores de "generación": cualquier cambio en el recurso incrementa el
+# número y todas las claves de caché derivadas quedan obsoletas en O(1).
+CATALOG_GENERATION = 'catalog'
+ANNOUNCEMENT_GENERATION = 'announcements'
+COUPON_GENERATION = 'coupons'
+# Solo lo que muestra el typeahead (nombres, precios, categoría, miniatura)
+SUGGEST_GENERATION = 'suggest'
+GENERATION_CACHE_KEY = 'generation:{}'
+
+# Enviada tras cada incremento con ``name`` y ``generation``
+generation_bumped = Signal()
+
+
+def get_generation(name):
+    """Return the current generation number for ``name``."""
+    key = GENERATION_CACHE_KEY.format(name)
+    value = cache.get(key)
+    if value is None:
+        # Semilla basada en el reloj: si la clave fue desalojada no volvemos a
+        # un número ya usado por entradas viejas que sigan en caché.
+        cache.add(key, int(time.time() * 1000), None)
+        value = cache.get(key)
+    return value
+
+
+async def aget_generation(name):
+    """Async ``get_generation`` for the async read views."""
+    key = GENERATION_CACHE_KEY.format(name)
+    value = await cache.aget(key)
+    if value is None:
+        await cache.aadd(key, int(time.time() * 1000), None)
+        value = await cache.aget(key)
+    return value
+
+
+def stock_window():
+    """Current stock window, for keys of payloads that show stock.
+
+    Orders change stock without bumping any generation (that would empty
+    every catalog cache on each checkout); those payloads instead include
+    this number, which changes every ``STOCK_CACHE_WINDOW`` seconds.
+    """
+    return int(time.time() // settings.STOCK_CACHE_WINDOW)
+
+
+def bump_generation(name):
+    """Invalidate every cache entry derived from ``name``."""
+    key = GENERATION_CACHE_KEY.format(name)
+    try:
+        generation = cache.incr(key)
+    except ValueError:
+        get_generation(name)
+        generation = cache.incr(key)
+    generation_bumped.send(sender=None, name=name, generation=generation)
+    return generation
+
+
+class LoadedValuesMixin:
+    """Remember the column values read from the database.
+
+    ``suggest_fields_changed`` compares them with the instance on save, so
+    only edits to ``SUGGEST_FIELDS`` invalidate the typeahead index.
+    """
+    SUGGEST_FIELDS = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
+def suggest_fields_changed(instance, created, update_fields):
+    fields = type(instance).SUGGEST_FIELDS
+    if created:
+        return True
+    if update_fields is not None:
+        touched = {instance._meta.get_field(name).attname for name in update_fields}
+        if not touched & set(fields):
+            return False
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None or not set(fields) <= loaded.keys():
+        return True
+    return any(loaded[field] != getattr(instance, field) for field in fields)
+
+
+class Category(LoadedValuesMixin, models.Model):
     name = models.CharField(max_length=120)
     slug = models.SlugField(unique=True)
     image = models.ImageField(upload_to='categories/', blank=True, null=True)
+    # URLs públicas precalculadas (ver shop/images.py)
+    image_url = models.CharField(max_length=500, blank=True, editable=False)
+    thumbnail_url = models.CharField(max_length=500, blank=True, editable=False)
+
+    SUGGEST_FIELDS = ('name', 'slug')
 
     class Meta:
         verbose_name = 'Categoría'
@@ -25,26 +123,121 @@ class Category(models.Model):
         return self.name
 
 
-class Product(models.Model):
+PRICING_FIELDS = {'price', 'offer_price'}
+
+
+def pricing_expressions():
+    """SQL expressions for the denormalized pricing columns of ``Product``."""
+    on_offer = models.Q(offer_price__gt=0)
+    return {
+        'has_offer': models.Case(
+            models.When(on_offer, then=models.Value(True)),
+            default=models.Value(False),
+            output_field=models.BooleanField(),
+        ),
+        'effective_price': models.Case(
+            models.When(on_offer, then=models.F('offer_price')),
+            default=models.F('price'),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        ),
+    }
+
+
+class ProductQuerySet(models.QuerySet):
+    """Keep ``has_offer``/``effective_price`` in sync on bulk writes."""
+
+    def promoted(self, running=True, now=None):
+        """Products whose promotion is (or, with ``running=False``, is not) live.
+
+        ``promoted_until`` is exclusive; empty means no expiry.
+        """
+        now = now or timezone.now()
+        live = models.Q(promoted=True) & (
+            models.Q(promoted_until__isnull=True) | models.Q(promoted_until__gt=now)
+        )
+        return self.filter(live) if running else self.exclude(live)
+
+    def update(self, **kwargs):
+        if not PRICING_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            # El UPDATE ve los valores viejos: recalcular en un segundo paso
+            pks = list(self.values_list('pk', flat=True))
+            rows = super().update(**kwargs)
+            self.model._default_manager.using(self.db).filter(pk__in=pks).update(
+                **pricing_expressions()
+            )
+        return rows
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        if PRICING_FIELDS & set(fields):
+            for obj in objs:
+                obj.refresh_pricing()
+            fields = [*fields, 'has_offer', 'effective_price']
+        return super().bulk_update(objs, fields, batch_size=batch_size)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.refresh_pricing()
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class Product(LoadedValuesMixin, models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products')
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     offer_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    image_url = models.CharField(max_length=500, blank=True, editable=False)
+    thumbnail_url = models.CharField(max_length=500, blank=True, editable=False)
     stock = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True, db_index=True)
     # Promoción destacada
     promoted = models.BooleanField(default=False, db_index=True)
     promoted_until = models.DateTimeField(null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Solo Postgres (índice GIN); en SQLite se usa la tabla FTS5, ver shop/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Desnormalizados desde price/offer_price (lo que cobra el checkout), para ordenar por índice
+    has_offer = models.BooleanField(default=False, editable=False)
+    effective_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+
+    objects = ProductQuerySet.as_manager()
+
+    SUGGEST_FIELDS = (
+        'name', 'price', 'offer_price', 'category_id', 'is_active', 'image_url', 'thumbnail_url',
+    )
 
     class Meta:
         ordering = ['name']
+        # Índices para la paginación keyset: (filtro, orden, desempate)
+        indexes = [
+            models.Index(
+                fields=['is_active', '-has_offer', 'offer_price', 'id'], name='product_active_has_offer_idx'
+            ),
+            models.Index(fields=['is_active', 'effective_price', 'id'], name='product_active_eff_price_idx'),
+            models.Index(fields=['is_active', 'name', 'id'], name='product_active_name_idx'),
+            models.Index(fields=['is_active', 'price', 'id'], name='product_active_price_idx'),
+            models.Index(fields=['is_active', 'offer_price', 'id'], name='product_active_offer_idx'),
+            models.Index(fields=['is_active', 'created_at', 'id'], name='product_active_created_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def refresh_pricing(self):
+        self.has_offer = bool(self.offer_price)
+        self.effective_price = self.offer_price if self.has_offer else self.price
+
+    def save(self, *args, **kwargs):
+        self.refresh_pricing()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and PRICING_FIELDS & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'has_offer', 'effective_price'}
+        super().save(*args, **kwargs)
+
 
 class SiteConfig(models.Model):
     whatsapp_phone = models.CharField(max_length=20, help_text='Ej: 5493511234567')
@@ -116,6 +309,53 @@ class OrderItem(models.Model):
         return f'{self.product.name} x{self.quantity}'
 
 
+class OrderTicket(models.Model):
+    """Order request queued in intake mode ``queue`` (see ``shop/order_queue.py``)."""
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_REJECTED = 'rejected'
+    STATUSES = (
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_PROCESSING, 'Procesando'),
+        (STATUS_DONE, 'Confirmado'),
+        (STATUS_REJECTED, 'Rechazado'),
+    )
+
+    # UUID: el ticket permite leer el pedido (nombre, teléfono), no debe ser adivinable
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUSES, default=STATUS_PENDING)
+    order = models.OneToOneField(Order, null=True, blank=True, on_delete=models.SET_NULL, related_name='ticket')
+    result = models.JSONField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'created_at'], name='orderticket_queue_idx')]
+        verbose_name = 'Ticket de pedido'
+        verbose_name_plural = 'Tickets de pedido'
+
+    def __str__(self):
+        return f'Ticket {self.id} ({self.status})'
+
+
+class IdempotencyKey(models.Model):
+    """Stored response of an order request sent with an ``Idempotency-Key`` header."""
+    key = models.CharField(max_length=255, unique=True)
+    request_hash = models.CharField(max_length=64)
+    # Sin respuesta todavía: el request original sigue en curso
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.key
+
+
 class Coupon(models.Model):
     TYPE_FIXED = 'fixed'
     TYPE_PERCENT = 'percent'
@@ -135,17 +375,170 @@ class Coupon(models.Model):
     active = models.BooleanField(default=True, db_index=True)
     expires_at = models.DateTimeField(null=True, blank=True)
     usage_limit = models.PositiveIntegerField(null=True, blank=True)
+    # Reconciliado en lote desde CouponRedemption; el límite se controla con CouponUsageShard
     used_count = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        constraints = [
+            # Los códigos se guardan en mayúsculas; esto evita variantes por caso
+            models.UniqueConstraint(Upper('code'), name='coupon_code_upper_uniq'),
+        ]
+
     def __str__(self):
         return self.code
 
+    @staticmethod
+    def normalize_code(code):
+        return (code or '').strip().upper()[:40]
+
+    def save(self, *args, **kwargs):
+        self.code = self.normalize_code(self.code)
+        super().save(*args, **kwargs)
+
+
+class CouponUsageShard(models.Model):
+    """Slice of a coupon's ``usage_limit`` (see ``shop/coupons.py``).
+
+    The capacities of a coupon's shards add up to its limit, so concurrent
+    orders increment different rows instead of one hot counter.
+    """
+    coupon = models.ForeignKey(Coupon, on_delete=models.CASCADE, related_name='usage_shards')
+    shard = models.PositiveSmallIntegerField()
+    capacity = models.PositiveIntegerField()
+    used = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['coupon', 'shard'], name='coupon_usage_shard_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.coupon} #{self.shard}: {self.used}/{self.capacity}'
+
+
+class CouponRedemption(models.Model):
+    """One use of a coupon by an order; ``Coupon.used_count`` is reconciled from it."""
+    coupon = models.ForeignKey(Coupon, on_delete=models.CASCADE, related_name='redemptions')
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='coupon_redemption')
+    # Fragmento de CouponUsageShard consumido (vacío si el cupón no tiene límite)
+    shard = models.PositiveSmallIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.coupon} -> pedido #{self.order_id}'
+
+
+class DailySales(models.Model):
+    """Orders per day (local date), kept up to date by ``shop/rollups.py``."""
+    day = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discount_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    shipping_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-day']
+        verbose_name = 'Ventas diarias'
+        verbose_name_plural = 'Ventas diarias'
+
+    def __str__(self):
+        return f'{self.day}: {self.orders} pedidos'
+
+
+class ProductDailySales(models.Model):
+    """Units and revenue per product and day; ``category`` is copied for per-category reports."""
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_sales')
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-day', 'product']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product'], name='product_daily_sales_uniq'),
+        ]
+        indexes = [models.Index(fields=['category', 'day'], name='product_sales_category_idx')]
+        verbose_name = 'Ventas por producto'
+        verbose_name_plural = 'Ventas por producto'
+
+    def __str__(self):
+        return f'{self.day} {self.product_id}: {self.units}'
+
+
+class CouponDailySales(models.Model):
+    """Orders and discount granted per coupon code and day."""
+    day = models.DateField()
+    code = models.CharField(max_length=40)
+    orders = models.PositiveIntegerField(default=0)
+    discount_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-day', 'code']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'code'], name='coupon_daily_sales_uniq'),
+        ]
+        verbose_name = 'Descuentos por cupón'
+        verbose_name_plural = 'Descuentos por cupón'
+
+    def __str__(self):
+        return f'{self.day} {self.code}: {self.discount_total}'
+
 
 @receiver([post_save, post_delete], sender=SiteConfig)
 def clear_site_config_cache(**kwargs):
     cache.delete(SITE_CONFIG_CACHE_KEY)
 
 
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+def bump_catalog_generation(**kwargs):
+    # Tras el commit, para que ningún worker vuelva a cachear datos viejos
+    # con la generación nueva mientras la transacción sigue abierta.
+    transaction.on_commit(lambda: bump_generation(CATALOG_GENERATION))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+def bump_suggest_generation_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if suggest_fields_changed(instance, created, update_fields):
+        transaction.on_commit(lambda: bump_generation(SUGGEST_GENERATION))
+    fields = [field for field in sender.SUGGEST_FIELDS if field in instance.__dict__]
+    instance._loaded_values = {field: getattr(instance, field) for field in fields}
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+def bump_suggest_generation_on_delete(**kwargs):
+    transaction.on_commit(lambda: bump_generation(SUGGEST_GENERATION))
+
+
+@receiver([post_save, post_delete], sender=Announcement)
+def bump_announcement_generation(**kwargs):
+    transaction.on_commit(lambda: bump_generation(ANNOUNCEMENT_GENERATION))
+
+
+@receiver([post_save, post_delete], sender=Coupon)
+def bump_coupon_generation(**kwargs):
+    # Invalida el índice de cupones en memoria de todos los procesos (shop/coupons.py).
+    # Ya mismo, para que la propia transacción vea el cambio, y otra vez al
+    # confirmar, por si otro proceso reconstruyó el índice antes del commit.
+    bump_generation(COUPON_GENERATION)
+    transaction.on_commit(lambda: bump_generation(COUPON_GENERATION))
+
+
+@receiver(post_save, sender=Product)
+def index_product_for_search(sender, instance, using, update_fields=None, **kwargs):
+    if update_fields is not None and not {'name', 'description'} & set(update_fields):
+        return
+    search.index_product(instance, using=using)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product_for_search(sender, instance, using, **kwargs):
+    search.unindex_product(instance.pk, using=using)
+
+
 @receiver(post_delete, sender=Category)
 def delete_category_image_on_delete(sender, instance, **kwargs):
     """Ensure images are removed from Cloudinary when a category is deleted."""
@@ -163,10 +556,21 @@ def delete_old_category_image_on_change(sender, instance, **kwargs):
     except Category.DoesNotExist:
         return
     new_image = instance.image
+    if old_image.name != new_image.name:
+        # Las URLs se recalculan en post_save, con el nombre final del archivo
+        instance.image_url = instance.thumbnail_url = ''
     if old_image and old_image != new_image:
         old_image.delete(save=False)
 
 
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Product)
+def fill_image_urls(sender, instance, **kwargs):
+    """Compute the stored image URLs once the image file is committed."""
+    if instance.image and not instance.image_url:
+        images.refresh_image_urls(instance)
+
+
 @receiver(post_delete, sender=Product)
 def delete_product_image_on_delete(sender, instance, **kwargs):
     """Ensure images are removed from Cloudinary when a product is deleted."""
@@ -187,6 +591,8 @@ def delete_old_product_image_on_change(sender, instance, **kwargs):
     except Product.DoesNotExist:
         return
     new_image = instance.image
+    if old_image.name != new_image.name:
+        instance.image_url = instance.thumbnail_url = ''
     if old_image and old_image != new_image:
         try:
             old_image.delete(save=False)
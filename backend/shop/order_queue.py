@@ -0,0 +1,108 @@
+"""Asynchronous order intake (``ORDER_INTAKE_MODE = 'queue'``).
+
+``POST /api/orders/`` only validates the payload and stores it as an
+``OrderTicket``; ``manage.py process_order_queue`` workers claim pending
+tickets in batches and run the regular ``OrderSerializer`` on each one, in
+the same transaction that records the outcome. Tickets claimed by a worker
+that died are retried after ``CLAIM_TIMEOUT``. Every outcome is written
+only while the row still holds this worker's claim, so a slow worker whose
+ticket was reclaimed does not create the order twice.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import OrderTicket
+from .serializers import OrderSerializer
+
+logger = logging.getLogger(__name__)
+
+CLAIM_TIMEOUT = timedelta(minutes=5)
+MAX_ATTEMPTS = 3
+
+
+def enqueue(payload):
+    return OrderTicket.objects.create(payload=payload)
+
+
+def claim_batch(size):
+    """Mark up to ``size`` pending tickets as processing and return them."""
+    now = timezone.now()
+    claimable = Q(status=OrderTicket.STATUS_PENDING) | Q(
+        status=OrderTicket.STATUS_PROCESSING, claimed_at__lt=now - CLAIM_TIMEOUT
+    )
+    with transaction.atomic():
+        qs = OrderTicket.objects.filter(claimable).order_by('created_at')
+        if connection.features.has_select_for_update_skip_locked:
+            # Varios workers en paralelo se reparten tickets distintos
+            qs = qs.select_for_update(skip_locked=True)
+        tickets = list(qs[:size])
+        OrderTicket.objects.filter(pk__in=[t.pk for t in tickets]).update(
+            status=OrderTicket.STATUS_PROCESSING, claimed_at=now,
+        )
+    for ticket in tickets:
+        ticket.status, ticket.claimed_at = OrderTicket.STATUS_PROCESSING, now
+    return tickets
+
+
+class ClaimLost(Exception):
+    """The ticket was reclaimed by another worker after ``CLAIM_TIMEOUT``."""
+
+
+def check_claim(ticket):
+    """Lock ``ticket``'s row; raise ``ClaimLost`` unless it still holds our claim."""
+    claimed = OrderTicket.objects.select_for_update().filter(
+        pk=ticket.pk, status=OrderTicket.STATUS_PROCESSING, claimed_at=ticket.claimed_at,
+    )
+    if not claimed.exists():
+        raise ClaimLost(ticket.pk)
+
+
+def save_outcome(ticket, update_fields):
+    try:
+        with transaction.atomic():
+            check_claim(ticket)
+            ticket.save(update_fields=update_fields)
+    except ClaimLost:
+        logger.warning('Order ticket %s was reclaimed by another worker; skipping', ticket.pk)
+
+
+def process_ticket(ticket):
+    """Create the order for ``ticket`` and record the outcome."""
+    serializer = OrderSerializer(data=ticket.payload)
+    ticket.attempts += 1
+    try:
+        with transaction.atomic():
+            # El lock se mantiene hasta el commit: otro worker no puede reclamarlo a mitad
+            check_claim(ticket)
+            serializer.is_valid(raise_exception=True)
+            order = serializer.save()
+            ticket.status, ticket.order, ticket.result = OrderTicket.STATUS_DONE, order, serializer.data
+            ticket.processed_at = timezone.now()
+            ticket.save(update_fields=['status', 'order', 'result', 'attempts', 'processed_at'])
+    except ClaimLost:
+        logger.warning('Order ticket %s was reclaimed by another worker; skipping', ticket.pk)
+    except serializers.ValidationError as exc:
+        # Sin stock, cupón agotado, producto desactivado: rechazo definitivo
+        ticket.status, ticket.result = OrderTicket.STATUS_REJECTED, exc.detail
+        ticket.processed_at = timezone.now()
+        save_outcome(ticket, ['status', 'result', 'attempts', 'processed_at'])
+    except Exception:
+        logger.exception('Error processing order ticket %s', ticket.pk)
+        rejected = ticket.attempts >= MAX_ATTEMPTS
+        ticket.status = OrderTicket.STATUS_REJECTED if rejected else OrderTicket.STATUS_PENDING
+        ticket.result = {'detail': 'No se pudo procesar el pedido'} if rejected else None
+        save_outcome(ticket, ['status', 'result', 'attempts'])
+    return ticket
+
+
+def process_batch(size=50):
+    """Process one batch; returns the number of tickets handled."""
+    tickets = claim_batch(size)
+    for ticket in tickets:
+        process_ticket(ticket)
+    return len(tickets)
@@ -0,0 +1,156 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ProductPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+
+
+class ProductKeysetPagination(BasePagination):
+    """Keyset ("seek") pagination over the ordering chosen by the filters.
+
+    The cursor stores the ordering values of the last row plus ``id`` as a
+    tiebreaker, so every page is a ``WHERE (...) > cursor LIMIT n`` that an
+    index on the ordering columns can serve, with no COUNT query. NULLs sort
+    last ascending and first descending. Forward-only: responses carry
+    ``next`` and ``results``.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.model = queryset.model
+
+        values = self.decode_cursor(request)
+        if values is not None:
+            queryset = queryset.filter(self.after(values))
+        queryset = queryset.order_by(*[
+            F(name).desc(nulls_first=True) if desc else F(name).asc(nulls_last=True)
+            for name, desc in self.ordering
+        ])
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, queryset):
+        ordering = []
+        for term in queryset.query.order_by or queryset.model._meta.ordering:
+            if not isinstance(term, str):
+                continue
+            name = term.lstrip('-')
+            if name == 'pk':
+                name = 'id'
+            ordering.append((name, term.startswith('-')))
+            if name == 'id':
+                return ordering
+        # Desempate por id en el sentido del último campo, así un índice
+        # (campo, id) sirve tanto ascendente como descendente.
+        ordering.append(('id', ordering[-1][1] if ordering else False))
+        return ordering
+
+    def _field(self, name):
+        try:
+            return self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    def after(self, values):
+        """Build the "strictly after ``values``" condition for the ordering."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, desc), value in zip(self.ordering, values):
+            field = self._field(name)
+            nullable = field is not None and field.null
+            if value is None:
+                greater = Q(**{f'{name}__isnull': False}) if desc else Q(pk__in=[])
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                greater = Q(**{f'{name}__lt' if desc else f'{name}__gt': value})
+                if nullable and not desc:
+                    greater |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            condition |= equal & greater
+            equal &= same
+
+        # Cota redundante sobre el primer campo para que el planner use el índice
+        name, desc = self.ordering[0]
+        first = values[0]
+        field = self._field(name)
+        if first is not None and not (field is not None and field.null):
+            condition &= Q(**{f'{name}__lte' if desc else f'{name}__gte': first})
+        return condition
+
+    def signature(self):
+        return [f'-{name}' if desc else name for name, desc in self.ordering]
+
+    def encode_cursor(self, row):
+        values = []
+        for name, _desc in self.ordering:
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            if isinstance(value, (Decimal, datetime, date)):
+                value = value.isoformat() if not isinstance(value, Decimal) else str(value)
+            values.append(value)
+        raw = json.dumps({'o': self.signature(), 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            if payload['o'] != self.signature() or len(payload['v']) != len(self.ordering):
+                raise ValueError
+            values = []
+            for (name, _desc), value in zip(self.ordering, payload['v']):
+                field = self._field(name)
+                if value is not None and field is not None:
+                    value = field.to_python(value)
+                values.append(value)
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
@@ -0,0 +1,146 @@
+"""Cart pricing shared by ``OrderSerializer.create`` and ``POST /api/cart/quote/``.
+
+A cart is ``{product_id: quantity}`` plus an optional coupon and the
+delivery method. ``price_cart`` is pure: it prices one cart against
+already-fetched products and reports problems (missing products, short
+stock, coupon minimum) as warnings instead of raising, so the order flow
+decides what is fatal and the quote endpoint just returns them.
+``quote_carts`` prices a batch of carts with a single product query and
+one usage check per distinct limited coupon.
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Optional
+
+from .coupons import CouponRule, get_valid_rule
+from .models import Coupon, Product
+
+ZERO = Decimal('0')
+
+
+def consolidate(items):
+    """``[{'product_id', 'quantity'}] -> {product_id: quantity}``, summing repeated products."""
+    quantities = {}
+    for item in items:
+        pid = item['product_id']
+        quantities[pid] = quantities.get(pid, 0) + item['quantity']
+    return quantities
+
+
+def shipping_for(delivery_method, shipping_cost):
+    """Shipping charged for ``delivery_method`` given the configured cost."""
+    if delivery_method == 'pickup':
+        return ZERO
+    return Decimal(shipping_cost)
+
+
+def coupon_discount(coupon, subtotal, shipping_cost):
+    """Return ``(discount, shipping_cost)`` after applying ``coupon``."""
+    if coupon.type == Coupon.TYPE_FIXED:
+        return min(coupon.amount, subtotal), shipping_cost
+    if coupon.type == Coupon.TYPE_PERCENT:
+        raw = subtotal * (coupon.percent / 100)
+        cap = coupon.percent_cap or 0
+        return (min(raw, cap) if cap > 0 else raw), shipping_cost
+    if coupon.type == Coupon.TYPE_FREE_SHIPPING:
+        return ZERO, ZERO
+    return ZERO, shipping_cost
+
+
+@dataclass
+class Line:
+    product: Product
+    quantity: int
+    price: Decimal
+
+    @property
+    def total(self):
+        return self.price * self.quantity
+
+
+@dataclass
+class Quote:
+    lines: list
+    subtotal: Decimal
+    base_shipping: Decimal
+    coupon: Optional[CouponRule] = None
+    warnings: list = field(default_factory=list)
+
+    @property
+    def adjustments(self):
+        if self.coupon is None:
+            return ZERO, self.base_shipping
+        return coupon_discount(self.coupon, self.subtotal, self.base_shipping)
+
+    @property
+    def discount(self):
+        return self.adjustments[0]
+
+    @property
+    def shipping_cost(self):
+        return self.adjustments[1]
+
+    @property
+    def total(self):
+        discount, shipping_cost = self.adjustments
+        return self.subtotal - discount + shipping_cost
+
+
+def price_cart(quantities, products, shipping_cost, coupon=None):
+    """Price ``{product_id: quantity}`` against ``products`` (``{id: Product}``).
+
+    ``coupon`` is kept on the quote only if the subtotal reaches its minimum.
+    """
+    lines, warnings, subtotal = [], [], ZERO
+    for pid, quantity in quantities.items():
+        product = products.get(pid)
+        if product is None:
+            warnings.append({'product_id': pid, 'code': 'unavailable', 'detail': f'Producto {pid} inválido'})
+            continue
+        if product.stock < quantity:
+            warnings.append({
+                'product_id': pid,
+                'code': 'insufficient_stock',
+                'available': product.stock,
+                'detail': f'Sin stock suficiente para {product.name} (disponible: {product.stock})',
+            })
+        line = Line(product=product, quantity=quantity, price=product.effective_price)
+        subtotal += line.total
+        lines.append(line)
+    if coupon is not None and subtotal < coupon.min_subtotal:
+        warnings.append({
+            'code': 'coupon_min_subtotal',
+            'detail': f'El cupón requiere un subtotal mínimo de {coupon.min_subtotal}',
+        })
+        coupon = None
+    return Quote(lines=lines, subtotal=subtotal, base_shipping=shipping_cost, coupon=coupon, warnings=warnings)
+
+
+def quote_carts(carts, shipping_cost):
+    """Price many carts at once.
+
+    ``carts`` are dicts with ``items`` (``{product_id: quantity}``),
+    ``coupon_code`` and ``delivery_method``; ``shipping_cost`` is the
+    configured delivery cost. Returns one ``Quote`` per cart, in order.
+    """
+    ids = set()
+    for cart in carts:
+        ids.update(cart['items'])
+    products = {
+        p.pk: p for p in Product.objects.filter(pk__in=ids, is_active=True)
+        .only('id', 'name', 'effective_price', 'stock').order_by()
+    }
+    codes = {Coupon.normalize_code(cart.get('coupon_code')) for cart in carts} - {''}
+    rules = {code: get_valid_rule(code) for code in codes}
+
+    quotes = []
+    for cart in carts:
+        code = Coupon.normalize_code(cart.get('coupon_code'))
+        rule = rules.get(code)
+        quote = price_cart(
+            cart['items'], products, shipping_for(cart.get('delivery_method'), shipping_cost), rule
+        )
+        if code and rule is None:
+            quote.warnings.append({'code': 'coupon_invalid', 'detail': 'Cupón inválido'})
+        quotes.append(quote)
+    return quotes
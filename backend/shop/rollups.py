@@ -0,0 +1,133 @@
+"""Sales rollups: ``DailySales``, ``ProductDailySales`` and ``CouponDailySales``.
+
+``OrderSerializer.create`` registers ``record_order`` with
+``transaction.on_commit``, so each committed order adds its totals to the
+rollup rows of its (local) day, and deleting an order (admin, the bench
+commands' cleanup) subtracts it again once the delete commits. Every table is updated the same way: a
+``bulk_create(ignore_conflicts=True)`` makes sure the rows exist and one
+UPDATE adds the deltas with ``F() + Case(...)``, so concurrent orders never
+lose increments. ``rebuild`` recomputes everything from the order history
+in chunks (``manage.py rebuild_rollups``).
+"""
+import functools
+import operator
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, IntegerField, Q, Value, When
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import CouponDailySales, DailySales, Order, OrderItem, ProductDailySales
+
+ZERO = Decimal('0')
+
+
+class Totals:
+    """Rollup deltas for a batch of orders, keyed like the rollup tables."""
+
+    def __init__(self):
+        self.daily = defaultdict(lambda: {'orders': 0, 'revenue': ZERO, 'discount_total': ZERO, 'shipping_total': ZERO})
+        self.products = defaultdict(lambda: {'units': 0, 'revenue': ZERO})
+        self.categories = {}
+        self.coupons = defaultdict(lambda: {'orders': 0, 'discount_total': ZERO})
+
+    def add_order(self, order, items, sign=1):
+        """``items``: ``(product_id, category_id, quantity, price)`` tuples; ``sign=-1`` subtracts."""
+        day = timezone.localdate(order.created_at)
+        daily = self.daily[day]
+        daily['orders'] += sign
+        daily['revenue'] += sign * order.total
+        daily['discount_total'] += sign * order.discount_total
+        daily['shipping_total'] += sign * order.shipping_cost
+        for product_id, category_id, quantity, price in items:
+            row = self.products[day, product_id]
+            row['units'] += sign * quantity
+            row['revenue'] += sign * price * quantity
+            self.categories[product_id] = category_id
+        if order.coupon_code:
+            coupon = self.coupons[day, order.coupon_code]
+            coupon['orders'] += sign
+            coupon['discount_total'] += sign * order.discount_total
+
+    def apply(self):
+        with transaction.atomic():
+            increment(DailySales, ['day'], self.daily)
+            increment(
+                ProductDailySales, ['day', 'product_id'], self.products,
+                defaults=lambda day, product_id: {'category_id': self.categories[product_id]},
+            )
+            increment(CouponDailySales, ['day', 'code'], self.coupons)
+
+
+def increment(model, key_fields, deltas, defaults=None):
+    """Add ``deltas`` (``{key: {field: delta}}``) to ``model`` rows, creating missing ones."""
+    if not deltas:
+        return
+    keys = [key if isinstance(key, tuple) else (key,) for key in deltas]
+    model.objects.bulk_create([
+        model(**dict(zip(key_fields, key)), **(defaults(*key) if defaults else {})) for key in keys
+    ], ignore_conflicts=True)
+    matches = [Q(**dict(zip(key_fields, key))) for key in keys]
+    fields = next(iter(deltas.values())).keys()
+    updates = {}
+    for field in fields:
+        if isinstance(model._meta.get_field(field), DecimalField):
+            output = DecimalField(max_digits=14, decimal_places=2)
+        else:
+            output = IntegerField()
+        updates[field] = F(field) + Case(
+            *(When(match, then=Value(row[field])) for match, row in zip(matches, deltas.values())),
+            default=Value(0), output_field=output,
+        )
+    model.objects.filter(functools.reduce(operator.or_, matches)).update(**updates)
+
+
+def record_order(order, order_items):
+    """Add one committed order to the rollups (``transaction.on_commit`` callback)."""
+    totals = Totals()
+    totals.add_order(order, [
+        (item.product_id, item.product.category_id, item.quantity, item.price) for item in order_items
+    ])
+    totals.apply()
+
+
+@receiver(pre_delete, sender=Order)
+def forget_deleted_order(sender, instance, **kwargs):
+    # Los ítems se leen antes del borrado en cascada; se descuenta sólo si el borrado se confirma
+    totals = Totals()
+    totals.add_order(instance, OrderItem.objects.filter(order=instance).values_list(
+        'product_id', 'product__category_id', 'quantity', 'price'
+    ), sign=-1)
+    transaction.on_commit(totals.apply, robust=True)
+
+
+def rebuild(chunk_size=500, stdout=None):
+    """Recompute all rollups from ``Order``/``OrderItem`` in chunks of ``chunk_size`` orders.
+
+    Meant for backfills and repairs; orders committed while it starts may
+    be counted twice, so run it when checkout is quiet.
+    """
+    with transaction.atomic():
+        for model in (DailySales, ProductDailySales, CouponDailySales):
+            model.objects.all().delete()
+    last_pk, processed = 0, 0
+    fields = ('id', 'created_at', 'total', 'discount_total', 'shipping_cost', 'coupon_code')
+    while True:
+        orders = list(Order.objects.filter(pk__gt=last_pk).order_by('pk').only(*fields)[:chunk_size])
+        if not orders:
+            return processed
+        items = defaultdict(list)
+        for row in OrderItem.objects.filter(order__in=orders).values_list(
+            'order_id', 'product_id', 'product__category_id', 'quantity', 'price'
+        ):
+            items[row[0]].append(row[1:])
+        totals = Totals()
+        for order in orders:
+            totals.add_order(order, items[order.pk])
+        totals.apply()
+        last_pk, processed = orders[-1].pk, processed + len(orders)
+        if stdout:
+            stdout.write(f'{processed} orders')
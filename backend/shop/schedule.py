@@ -0,0 +1,78 @@
+"""Caching for sets with scheduled visibility (announcements, promotions).
+
+Such a set only changes when the data changes (the generation counter) or
+when the clock crosses a ``start_at``/``end_at``/``promoted_until`` value.
+``next_boundary`` finds the earliest such instant and caches it until then;
+keys that include it (``boundary_version``) stay valid exactly up to the
+boundary, so between boundaries the set costs no query. Windows are
+half-open: visible from ``start`` (inclusive) to ``end`` (exclusive).
+"""
+import math
+
+from django.core.cache import cache
+from django.db.models import Min, Q
+from django.utils import timezone
+
+DEFAULT_TIMEOUT = 60 * 60
+
+
+def seconds_until(boundary, now=None, default=DEFAULT_TIMEOUT):
+    """Cache timeout that expires at ``boundary`` (capped at ``default``)."""
+    if boundary is None:
+        return default
+    now = now or timezone.now()
+    return max(1, min(default, math.ceil((boundary - now).total_seconds())))
+
+
+def next_boundary(key, queryset, fields, timeout=DEFAULT_TIMEOUT):
+    """Earliest value of ``fields`` in ``queryset`` after now, or None.
+
+    Cached under ``key`` (which should include the generation) until that
+    instant; the lookup is one aggregate over indexed columns.
+    """
+    now = timezone.now()
+    cached = cache.get(key)
+    if cached is not None and (cached[0] is None or cached[0] > now):
+        return cached[0]
+    bounds = queryset.aggregate(**{
+        field: Min(field, filter=Q(**{f'{field}__gt': now})) for field in fields
+    })
+    boundary = min(filter(None, bounds.values()), default=None)
+    cache.set(key, (boundary,), seconds_until(boundary, now, timeout))
+    return boundary
+
+
+async def anext_boundary(key, queryset, fields, timeout=DEFAULT_TIMEOUT):
+    """Async ``next_boundary`` (same key and cached value)."""
+    now = timezone.now()
+    cached = await cache.aget(key)
+    if cached is not None and (cached[0] is None or cached[0] > now):
+        return cached[0]
+    bounds = await queryset.aaggregate(**{
+        field: Min(field, filter=Q(**{f'{field}__gt': now})) for field in fields
+    })
+    boundary = min(filter(None, bounds.values()), default=None)
+    await cache.aset(key, (boundary,), seconds_until(boundary, now, timeout))
+    return boundary
+
+
+def boundary_version(boundary):
+    return int(boundary.timestamp() * 1000000) if boundary else 0
+
+
+def cache_until(key, boundary, build, timeout=DEFAULT_TIMEOUT):
+    """Return ``build()`` cached under ``key`` until ``boundary``."""
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, seconds_until(boundary, default=timeout))
+    return data
+
+
+async def acache_until(key, boundary, build, timeout=DEFAULT_TIMEOUT):
+    """Async ``cache_until``; ``build`` is a coroutine function."""
+    data = await cache.aget(key)
+    if data is None:
+        data = await build()
+        await cache.aset(key, data, seconds_until(boundary, default=timeout))
+    return data
@@ -0,0 +1,132 @@
+"""Full-text index for products.
+
+Postgres keeps a weighted ``tsvector`` column (``search_vector``) with a GIN
+index, built with the ``shop_spanish`` text search configuration (Spanish
+stemming plus ``unaccent``). The SQLite fallback mirrors name/description in
+the ``shop_product_fts`` FTS5 table. Both are kept in sync by the Product
+signal receivers in ``models.py``; ``manage.py rebuild_search_index`` covers
+bulk updates that bypass signals.
+"""
+import functools
+import re
+import sqlite3
+
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'shop_spanish'
+FTS_TABLE = 'shop_product_fts'
+MAX_TOKENS = 8
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(term):
+    return _TOKEN_RE.findall((term or '').lower())[:MAX_TOKENS]
+
+
+@functools.lru_cache(maxsize=None)
+def sqlite_has_fts5():
+    try:
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE VIRTUAL TABLE t USING fts5(a)')
+        conn.close()
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def _backend(using):
+    vendor = connections[using].vendor
+    if vendor == 'postgresql':
+        return 'postgresql'
+    if vendor == 'sqlite' and sqlite_has_fts5():
+        return 'sqlite'
+    return None
+
+
+def product_vector():
+    from django.contrib.postgres.search import SearchVector
+
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def search_products(queryset, term):
+    """Filter ``queryset`` by ``term`` and annotate a ``relevance`` score.
+
+    Every token is matched as a prefix and all tokens must match. Higher
+    ``relevance`` means a better match; without a term it is a constant 0.
+    """
+    tokens = tokenize(term)
+    if not tokens:
+        return queryset.annotate(relevance=Value(0.0, output_field=FloatField()))
+
+    backend = _backend(queryset.db)
+    if backend == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        query = SearchQuery(
+            ' & '.join(f'{t}:*' for t in tokens), search_type='raw', config=SEARCH_CONFIG
+        )
+        return queryset.filter(search_vector=query).annotate(
+            relevance=SearchRank(F('search_vector'), query)
+        )
+
+    if backend == 'sqlite':
+        # Los tokens son solo caracteres de palabra: no hace falta escapar comillas
+        match = ' '.join(f'"{t}"*' for t in tokens)
+        table = queryset.model._meta.db_table
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        ).annotate(
+            relevance=RawSQL(
+                f'SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{table}"."id"',
+                (match,),
+                output_field=FloatField(),
+            )
+        )
+
+    for token in tokens:
+        queryset = queryset.filter(Q(name__icontains=token) | Q(description__icontains=token))
+    return queryset.annotate(relevance=Value(0.0, output_field=FloatField()))
+
+
+def index_product(instance, using='default'):
+    backend = _backend(using)
+    if backend == 'postgresql':
+        type(instance)._default_manager.using(using).filter(pk=instance.pk).update(
+            search_vector=product_vector()
+        )
+    elif backend == 'sqlite':
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [instance.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (%s, %s, %s)',
+                [instance.pk, instance.name, instance.description],
+            )
+
+
+def unindex_product(pk, using='default'):
+    # En Postgres el vector vive en la fila borrada
+    if _backend(using) == 'sqlite':
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+
+def rebuild_index(model, using='default'):
+    backend = _backend(using)
+    if backend == 'postgresql':
+        model._default_manager.using(using).update(search_vector=product_vector())
+    elif backend == 'sqlite':
+        table = model._meta.db_table
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+                f'SELECT id, name, description FROM "{table}"'
+            )
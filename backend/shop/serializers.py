@@ -1,26 +1,83 @@
+import decimal
+import functools
+import operator
+
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
-from django.db.models import F, Case, When, IntegerField, Q
-from django.utils import timezone
-from .models import Category, Product, SiteConfig, Order, OrderItem, Coupon, Announcement
-
-
-def get_valid_coupon_qs(code):
-    """Return a queryset with coupons valid for the given code."""
-    if not code:
-        return Coupon.objects.none()
-    now = timezone.now()
-    coupon_qs = Coupon.objects.filter(code__iexact=code, active=True)
-    return coupon_qs.filter(
-        Q(expires_at__isnull=True) | Q(expires_at__gt=now),
-        Q(usage_limit__isnull=True) | Q(used_count__lt=F("usage_limit")),
-    )
+from django.db.models import F, Case, When, IntegerField, Q, Count, Min, Max
+from .coupons import get_valid_rule, redeem
+from .images import absolute_image_url, build_image_urls, stored_image_url
+from .pricing import consolidate, price_cart, shipping_for
+from .rollups import record_order
+from .models import (
+    Category, Product, SiteConfig, Order, OrderItem, Coupon, CouponRedemption, Announcement,
+    CATALOG_GENERATION, get_generation,
+    SITE_CONFIG_CACHE_KEY, SITE_CONFIG_CACHE_TIMEOUT,
+)
+
+CATEGORY_FACETS_CACHE_KEY = 'category_facets:{}'
+CATEGORY_FACETS_CACHE_TIMEOUT = 60 * 60
 
 
 class CategorySerializer(serializers.ModelSerializer):
+    image = serializers.SerializerMethodField()
+    thumbnail = serializers.SerializerMethodField()
+
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'image']
+        fields = ['id', 'name', 'slug', 'image', 'thumbnail']
+
+    def get_image(self, obj):
+        return absolute_image_url(stored_image_url(obj), self.context.get('request'))
+
+    def get_thumbnail(self, obj):
+        return absolute_image_url(stored_image_url(obj, 'thumbnail_url'), self.context.get('request'))
+
+
+def get_category_facets():
+    """Per-category active product count, offer count and effective price range.
+
+    One grouped aggregate over products, cached per catalog generation. Returns
+    ``{category_id: {...}}``; categories without active products are absent.
+    """
+    key = CATEGORY_FACETS_CACHE_KEY.format(get_generation(CATALOG_GENERATION))
+    facets = cache.get(key)
+    if facets is None:
+        rows = (
+            Product.objects.filter(is_active=True)
+            .order_by()
+            .values('category_id')
+            .annotate(
+                product_count=Count('id'),
+                offer_count=Count('id', filter=Q(has_offer=True)),
+                min_price=Min('effective_price'),
+                max_price=Max('effective_price'),
+            )
+        )
+        price = serializers.DecimalField(max_digits=10, decimal_places=2)
+        facets = {
+            row.pop('category_id'): {
+                **row,
+                'min_price': price.to_representation(row['min_price']),
+                'max_price': price.to_representation(row['max_price']),
+            }
+            for row in rows
+        }
+        cache.set(key, facets, CATEGORY_FACETS_CACHE_TIMEOUT)
+    return facets
+
+
+class CategoryFacetSerializer(CategorySerializer):
+    """Category plus the facets from ``context['facets']``."""
+    empty_facets = {'product_count': 0, 'offer_count': 0, 'min_price': None, 'max_price': None}
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data.update(self.context['facets'].get(instance.id, self.empty_facets))
+        return data
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -29,20 +86,98 @@ class ProductSerializer(serializers.ModelSerializer):
         queryset=Category.objects.all(), source='category', write_only=True, required=False
     )
     image = serializers.SerializerMethodField()
+    thumbnail = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
         fields = [
-            'id', 'name', 'description', 'price', 'offer_price', 'image', 'stock',
+            'id', 'name', 'description', 'price', 'offer_price', 'image', 'thumbnail', 'stock',
             'is_active', 'promoted', 'promoted_until', 'category', 'category_id'
         ]
 
     def get_image(self, obj):
+        return absolute_image_url(stored_image_url(obj), self.context.get('request'))
+
+    def get_thumbnail(self, obj):
+        return absolute_image_url(stored_image_url(obj, 'thumbnail_url'), self.context.get('request'))
+
+
+class ProductValuesSerializer:
+    """Read-only fast path for product lists built from ``.values()`` rows.
+
+    Produces exactly the JSON of ``ProductSerializer(many=True)`` without
+    model instances, nested serializers or per-row field dispatch: the DRF
+    fields are only used for their ``to_representation``, bound once.
+    """
+    value_fields = (
+        'id', 'name', 'description', 'price', 'offer_price', 'image', 'image_url', 'thumbnail_url',
+        'stock', 'is_active', 'promoted', 'promoted_until', 'category_id', 'category__name',
+        'category__slug', 'category__image', 'category__image_url', 'category__thumbnail_url',
+    )
+
+    def __init__(self, rows, context=None):
+        self.rows = rows
+        self.context = context or {}
+
+    @property
+    def data(self):
+        fields = ProductSerializer().fields
+        price = self.decimal_formatter(fields['price'])
+        offer_price = self.decimal_formatter(fields['offer_price'])
+        promoted_until = fields['promoted_until'].to_representation
         request = self.context.get('request')
-        if obj.image:
-            url = obj.image.url
-            return request.build_absolute_uri(url) if request else url
-        return None
+        return [
+            {
+                'id': row['id'],
+                'name': row['name'],
+                'description': row['description'],
+                'price': price(row['price']) if row['price'] is not None else None,
+                'offer_price': offer_price(row['offer_price']) if row['offer_price'] is not None else None,
+                'image': self.image_url(row, '', 'image_url', request),
+                'thumbnail': self.image_url(row, '', 'thumbnail_url', request),
+                'stock': row['stock'],
+                'is_active': row['is_active'],
+                'promoted': row['promoted'],
+                'promoted_until': (
+                    promoted_until(row['promoted_until']) if row['promoted_until'] is not None else None
+                ),
+                'category': {
+                    'id': row['category_id'],
+                    'name': row['category__name'],
+                    'slug': row['category__slug'],
+                    'image': self.image_url(row, 'category__', 'image_url', request),
+                    'thumbnail': self.image_url(row, 'category__', 'thumbnail_url', request),
+                },
+            }
+            for row in self.rows
+        ]
+
+    @staticmethod
+    def decimal_formatter(field):
+        """Same output as ``DecimalField.to_representation``, with the context built once."""
+        coerce = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        if not coerce or field.localize:
+            return field.to_representation
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+        exponent = decimal.Decimal('.1') ** field.decimal_places
+
+        def to_representation(value):
+            if not isinstance(value, decimal.Decimal):
+                return field.to_representation(value)
+            return '{:f}'.format(value.quantize(exponent, rounding=field.rounding, context=context))
+
+        return to_representation
+
+    @staticmethod
+    def image_url(row, prefix, attr, request):
+        url = row[prefix + attr]
+        if not url and row[prefix + 'image']:
+            # Filas sin URL precalculada todavía (ver images.stored_image_url)
+            storage = (Category if prefix else Product)._meta.get_field('image').storage
+            url = build_image_urls(storage, row[prefix + 'image'])[attr == 'thumbnail_url']
+        return absolute_image_url(url, request)
 
 
 class SiteConfigSerializer(serializers.ModelSerializer):
@@ -51,6 +186,35 @@ class SiteConfigSerializer(serializers.ModelSerializer):
         fields = ['whatsapp_phone', 'alias_or_cbu', 'shipping_cost', 'updated_at']
 
 
+def default_site_config_data():
+    return {
+        'whatsapp_phone': '',
+        'alias_or_cbu': '',
+        'shipping_cost': '0.00',
+        'updated_at': None,
+    }
+
+
+def get_site_config_data():
+    """Return the serialized site config, cached until the config changes."""
+    data = cache.get(SITE_CONFIG_CACHE_KEY)
+    if data is None:
+        cfg = SiteConfig.objects.first()
+        data = SiteConfigSerializer(cfg).data if cfg else default_site_config_data()
+        cache.set(SITE_CONFIG_CACHE_KEY, data, SITE_CONFIG_CACHE_TIMEOUT)
+    return data
+
+
+async def aget_site_config_data():
+    """Async ``get_site_config_data`` (same cache entry)."""
+    data = await cache.aget(SITE_CONFIG_CACHE_KEY)
+    if data is None:
+        cfg = await SiteConfig.objects.afirst()
+        data = SiteConfigSerializer(cfg).data if cfg else default_site_config_data()
+        await cache.aset(SITE_CONFIG_CACHE_KEY, data, SITE_CONFIG_CACHE_TIMEOUT)
+    return data
+
+
 class OrderItemCreateSerializer(serializers.Serializer):
     product_id = serializers.IntegerField()
     quantity = serializers.IntegerField(min_value=1)
@@ -73,93 +237,164 @@ class OrderSerializer(serializers.ModelSerializer):
         code = validated_data.pop('coupon_code', '').strip()[:40]
 
         # Consolidar items por producto sumando cantidades
-        consolidated = {}
-        for item in items_data:
-            pid = item['product_id']
-            consolidated[pid] = consolidated.get(pid, 0) + item['quantity']
+        consolidated = consolidate(items_data)
 
         # Validar que las cantidades resultantes sean positivas
         invalid = [pid for pid, qty in consolidated.items() if qty <= 0]
         if invalid:
             raise serializers.ValidationError({'items': f'Cantidad inválida para {", ".join(map(str, invalid))}'})
 
-        # Determinar costo de envío y método de entrega
-        cfg = SiteConfig.objects.first()
-        cfg_shipping = cfg.shipping_cost if cfg else 0
+        # Costo de envío desde la config cacheada (sin query en el caso común)
+        shipping_cost = shipping_for(
+            validated_data.get('delivery_method', 'delivery'), get_site_config_data()['shipping_cost']
+        )
+        coupon = getattr(self, '_coupon', None)
+        if code and coupon is None:
+            coupon = get_valid_rule(code)
 
-        delivery_method = validated_data.get('delivery_method', 'delivery')
-        shipping_cost = 0 if delivery_method == 'pickup' else cfg_shipping
+        # 'lock': SELECT FOR UPDATE de los productos durante toda la transacción.
+        # 'conditional': lectura sin lock y un UPDATE con guarda (stock >= q) al
+        # final, así el lock de fila solo dura hasta el COMMIT.
+        locking = settings.ORDER_STOCK_STRATEGY != 'conditional'
 
         with transaction.atomic():
-            order = Order.objects.create(shipping_cost=shipping_cost, coupon_code='', **validated_data)
-            total = 0
-
             # Obtener todos los productos en un solo query
             product_ids = list(consolidated.keys())
-            products_qs = Product.objects.select_for_update().filter(id__in=product_ids, is_active=True)
+            products_qs = Product.objects.filter(id__in=product_ids, is_active=True)
+            if locking:
+                products_qs = products_qs.select_for_update()
             products = {p.id: p for p in products_qs}
 
             if len(products) != len(product_ids):
                 missing = set(product_ids) - set(products.keys())
                 raise serializers.ValidationError({'items': f'Producto {", ".join(map(str, missing))} inválido'})
 
-            order_items = []
-            cases = []
-
-            for pid, quantity in consolidated.items():
-                product = products[pid]
-                if product.stock < quantity:
-                    raise serializers.ValidationError({'items': f'Sin stock suficiente para {product.name} (disponible: {product.stock})'})
-                price = product.offer_price if product.offer_price else product.price
-                total += price * quantity
-                order_items.append(
-                    OrderItem(order=order, product=product, quantity=quantity, price=price)
-                )
-                cases.append(When(id=product.id, then=F('stock') - quantity))
-
+            # Mismo cálculo que /api/cart/quote/; acá los avisos de stock son errores
+            quote = price_cart(consolidated, products, shipping_cost, coupon)
+            shortage = next((w for w in quote.warnings if w.get('code') == 'insufficient_stock'), None)
+            if shortage:
+                raise serializers.ValidationError({'items': shortage['detail']})
+            order_items = [
+                OrderItem(product=line.product, quantity=line.quantity, price=line.price) for line in quote.lines
+            ]
+            cases = [When(id=line.product.id, then=F('stock') - line.quantity) for line in quote.lines]
+
+            # Aplicar cupón (ya buscado en validate_coupon_code): el UPDATE
+            # condicional sobre un fragmento de usos verifica el límite
+            redemption = None
+            if quote.coupon:
+                redeemed, shard = redeem(quote.coupon) if quote.coupon.is_live() else (False, None)
+                if redeemed:
+                    redemption = CouponRedemption(coupon_id=quote.coupon.pk, shard=shard)
+                else:
+                    quote.coupon = None
+
+            # Un solo INSERT con los totales definitivos
+            order = Order.objects.create(
+                shipping_cost=quote.shipping_cost,
+                coupon_code=quote.coupon.code if quote.coupon else '',
+                discount_total=quote.discount,
+                total=quote.total,
+                **validated_data,
+            )
+            if redemption:
+                redemption.order = order
+                redemption.save(force_insert=True)
+            for order_item in order_items:
+                order_item.order = order
             OrderItem.objects.bulk_create(order_items)
-            Product.objects.filter(id__in=products.keys()).update(
-                stock=Case(*cases, default=F('stock'), output_field=IntegerField())
+            stock = Case(*cases, default=F('stock'), output_field=IntegerField())
+            if locking:
+                Product.objects.filter(id__in=products.keys()).update(stock=stock)
+            else:
+                self.decrement_stock(consolidated, stock)
+            # Sin bump de generación: el stock publicado se refresca por ventana (stock_window)
+            # Un error en los acumulados no afecta al pedido (rebuild_rollups lo corrige)
+            transaction.on_commit(functools.partial(record_order, order, order_items), robust=True)
+
+        # La respuesta lista los items desde acá, sin volver a consultarlos
+        order.created_items = order_items
+        return order
+
+    def to_representation(self, instance):
+        created_items = getattr(instance, 'created_items', None)
+        if created_items is None:
+            return super().to_representation(instance)
+        data = {}
+        for field in self._readable_fields:
+            value = created_items if field.field_name == 'items' else field.get_attribute(instance)
+            data[field.field_name] = None if value is None else field.to_representation(value)
+        return data
+
+    @staticmethod
+    def decrement_stock(consolidated, stock):
+        """Guarded ``stock = stock - q WHERE stock >= q`` for every item in one UPDATE.
+
+        Fewer affected rows than items means a concurrent order took the stock
+        after it was read: the ValidationError rolls the transaction back.
+        """
+        guard = functools.reduce(operator.or_, (
+            Q(id=pid, stock__gte=quantity) for pid, quantity in consolidated.items()
+        ))
+        updated = Product.objects.filter(guard, is_active=True).update(stock=stock)
+        if updated != len(consolidated):
+            current = {
+                pid: (name, available)
+                for pid, name, available in Product.objects.filter(id__in=consolidated)
+                .values_list('id', 'name', 'stock')
+            }
+            short = next((
+                current.get(pid, (pid, 0)) for pid, quantity in consolidated.items()
+                if current.get(pid, (pid, 0))[1] < quantity
+            ), None)
+            if short is None:
+                # Con stock pero desactivado entre la lectura y el UPDATE
+                raise serializers.ValidationError({'items': 'Producto inválido'})
+            raise serializers.ValidationError(
+                {'items': f'Sin stock suficiente para {short[0]} (disponible: {short[1]})'}
             )
 
-            # Aplicar cupón si viene
-            discount = 0
-            if code:
-                coupon_qs = get_valid_coupon_qs(code)
-                c = coupon_qs.first()
-                if c and total >= c.min_subtotal:
-                    updated = 1
-                    if c.usage_limit is not None:
-                        updated = coupon_qs.filter(
-                            pk=c.pk, used_count__lt=F("usage_limit")
-                        ).update(used_count=F("used_count") + 1)
-                    if updated == 1:
-                        if c.type == Coupon.TYPE_FIXED:
-                            discount = min(c.amount, total)
-                        elif c.type == Coupon.TYPE_PERCENT:
-                            raw = total * (c.percent / 100)
-                            cap = c.percent_cap or 0
-                            discount = min(raw, cap) if cap > 0 else raw
-                        elif c.type == Coupon.TYPE_FREE_SHIPPING:
-                            order.shipping_cost = 0
-                        order.coupon_code = code
-
-            order.discount_total = discount
-            order.total = total - discount + order.shipping_cost
-            order.save(update_fields=['total', 'discount_total', 'coupon_code', 'shipping_cost'])
-            return order
-
     def validate_coupon_code(self, value):
         if not value:
             return ''
         code = value.strip()[:40]
-        coupon = get_valid_coupon_qs(code).first()
+        coupon = get_valid_rule(code)
         if not coupon:
             raise serializers.ValidationError('Cupón inválido')
         self._coupon = coupon
         return code
 
 
+class CartQuoteSerializer(serializers.Serializer):
+    """A cart to price: same shape as an order's items, coupon and delivery method."""
+    items = OrderItemCreateSerializer(many=True, allow_empty=False)
+    coupon_code = serializers.CharField(required=False, allow_blank=True, default='')
+    delivery_method = serializers.ChoiceField(choices=Order.DELIVERY_METHODS, default='delivery')
+
+    def validate(self, attrs):
+        attrs['items'] = consolidate(attrs['items'])
+        attrs['coupon_code'] = Coupon.normalize_code(attrs['coupon_code'])
+        return attrs
+
+
+class QuoteLineSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(source='product.id')
+    name = serializers.CharField(source='product.name')
+    quantity = serializers.IntegerField()
+    unit_price = serializers.DecimalField(source='price', max_digits=10, decimal_places=2)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class QuoteSerializer(serializers.Serializer):
+    items = QuoteLineSerializer(source='lines', many=True)
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+    discount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    shipping_cost = serializers.DecimalField(max_digits=10, decimal_places=2)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    coupon_code = serializers.CharField(source='coupon.code', default='')
+    warnings = serializers.ListField(child=serializers.DictField())
+
+
 class CouponSerializer(serializers.ModelSerializer):
     class Meta:
         model = Coupon
@@ -0,0 +1,143 @@
+"""Precompressed snapshot of the whole active catalog for SPA bootstrap.
+
+The blob is compact JSON (no whitespace; products reference categories by
+id) built once per catalog generation and stock window, compressed with
+gzip and, when the ``brotli`` package is installed, brotli. It is stored in
+the cache under its content hash so ``/api/catalog/snapshot/<hash>/`` can be
+served as an immutable resource.
+
+When the current version has no blob yet, requests get the latest one built
+by any worker, and the first one to take the shared rebuild slot (a
+``cache.add`` key that lives ``CATALOG_SNAPSHOT_MIN_INTERVAL`` seconds)
+rebuilds it, in a background thread unless ``CATALOG_SNAPSHOT_BACKGROUND``
+is off. So the whole cluster builds at most one snapshot per interval. Only
+an empty cache makes a request build inline, with the fastest compression.
+"""
+import gzip
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.dispatch import receiver
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from .models import (
+    CATALOG_GENERATION, Category, Product, generation_bumped, get_generation, stock_window,
+)
+from .serializers import CategorySerializer, ProductSerializer
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION_KEY = 'catalog_snapshot:version:{}'
+SNAPSHOT_BLOB_KEY = 'catalog_snapshot:blob:{}'
+SNAPSHOT_LATEST_KEY = 'catalog_snapshot:latest'
+SNAPSHOT_REBUILD_KEY = 'catalog_snapshot:rebuilding'
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+# Calidad 11 tarda del orden de segundos con catálogos grandes; 5 comprime casi igual
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 9
+# Build dentro de un request (caché vacía): lo más rápido posible
+INLINE_BROTLI_QUALITY = 1
+INLINE_GZIP_LEVEL = 1
+
+
+class SnapshotProductSerializer(ProductSerializer):
+    category = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+def current_version():
+    """``(catalog generation, stock window)`` the current snapshot belongs to."""
+    return get_generation(CATALOG_GENERATION), stock_window()
+
+
+def build_snapshot(version, brotli_quality=BROTLI_QUALITY, gzip_level=GZIP_LEVEL):
+    """Render, compress and cache the snapshot for ``version``."""
+    generation, window = version
+    categories = CategorySerializer(Category.objects.all(), many=True).data
+    products = SnapshotProductSerializer(
+        Product.objects.filter(is_active=True).order_by('-has_offer', 'offer_price', 'id'),
+        many=True,
+    ).data
+    raw = JSONRenderer().render({
+        'generation': generation,
+        'categories': categories,
+        'products': products,
+    })
+    digest = hashlib.sha256(raw).hexdigest()[:20]
+    blob = {
+        'hash': digest,
+        'identity': raw,
+        'gzip': gzip.compress(raw, compresslevel=gzip_level, mtime=0),
+    }
+    if brotli is not None:
+        blob['br'] = brotli.compress(raw, quality=brotli_quality)
+    cache.set(SNAPSHOT_BLOB_KEY.format(digest), blob, SNAPSHOT_TIMEOUT)
+    cache.set(SNAPSHOT_VERSION_KEY.format(f'{generation}-{window}'), digest, SNAPSHOT_TIMEOUT)
+    cache.set(SNAPSHOT_LATEST_KEY, digest, SNAPSHOT_TIMEOUT)
+    return blob
+
+
+def get_snapshot(digest=None):
+    """Return the blob for ``digest`` or, by default, the current version."""
+    if digest is not None:
+        return cache.get(SNAPSHOT_BLOB_KEY.format(digest))
+    generation, window = current_version()
+    current = cache.get(SNAPSHOT_VERSION_KEY.format(f'{generation}-{window}'))
+    blob = cache.get(SNAPSHOT_BLOB_KEY.format(current)) if current else None
+    if blob is not None:
+        return blob
+    latest = cache.get(SNAPSHOT_LATEST_KEY)
+    previous = cache.get(SNAPSHOT_BLOB_KEY.format(latest)) if latest else None
+    if previous is None:
+        return build_snapshot(
+            (generation, window), brotli_quality=INLINE_BROTLI_QUALITY, gzip_level=INLINE_GZIP_LEVEL
+        )
+    # Mientras se reconstruye (acá o en otro worker) se sirve el anterior
+    return schedule_rebuild() or previous
+
+
+def rebuild():
+    try:
+        return build_snapshot(current_version())
+    except Exception:
+        logger.exception('Error rebuilding catalog snapshot')
+
+
+def _rebuild_worker():
+    try:
+        rebuild()
+    finally:
+        connection.close()
+
+
+def schedule_rebuild():
+    """Rebuild the snapshot if no worker did in the last ``CATALOG_SNAPSHOT_MIN_INTERVAL`` seconds.
+
+    Returns the new blob when it was built synchronously, else None.
+    """
+    # El slot no se libera: vence solo, y así acota los rebuilds de todo el cluster
+    if not cache.add(SNAPSHOT_REBUILD_KEY, True, settings.CATALOG_SNAPSHOT_MIN_INTERVAL):
+        return None
+    if not settings.CATALOG_SNAPSHOT_BACKGROUND:
+        return rebuild()
+    threading.Thread(target=_rebuild_worker, name='catalog-snapshot', daemon=True).start()
+    return None
+
+
+@receiver(generation_bumped)
+def rebuild_snapshot_on_bump(sender, name, **kwargs):
+    if name != CATALOG_GENERATION or not settings.CATALOG_SNAPSHOT_BACKGROUND:
+        return
+    # Dentro de una transacción el hilo no vería los cambios: queda el rebuild perezoso
+    if connection.in_atomic_block:
+        return
+    schedule_rebuild()
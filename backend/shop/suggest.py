@@ -0,0 +1,117 @@
+"""In-process typeahead index over product and category names.
+
+Names are accent-folded and lowercased; every word start of a name becomes a
+key (``"leche entera"`` is reachable from ``"leche"`` and ``"ent"``) in one
+sorted list, so a lookup is a ``bisect`` plus a short scan. The index is
+built lazily from the database and rebuilt when the suggest generation
+changes, which only edits to the fields it shows bump (not stock, so orders
+never trigger a rebuild); lookups only read the generation from the cache.
+"""
+import bisect
+import re
+import threading
+import unicodedata
+
+from .images import absolute_image_url
+from .models import SUGGEST_GENERATION, Category, Product, get_generation
+
+MAX_LIMIT = 20
+# Tope de claves recorridas por consulta: acota el peor caso con prefijos cortos
+MAX_SCAN = 500
+
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+def fold(text):
+    """Lowercase ``text`` and strip accents (``"Jamón"`` -> ``"jamon"``)."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(_WORD_RE.findall(stripped.lower()))
+
+
+class SuggestIndex:
+    def __init__(self, categories, products):
+        self.items = []
+        entries = []
+        for kind, rows in (('categories', categories), ('products', products)):
+            for row in rows:
+                position = len(self.items)
+                self.items.append((kind, row))
+                name = fold(row['name'])
+                for match in _WORD_RE.finditer(name):
+                    start = match.start()
+                    # (clave, no empieza el nombre, largo del nombre, item)
+                    entries.append((name[start:], start > 0, len(name), position))
+        entries.sort()
+        self.keys = [entry[0] for entry in entries]
+        self.entries = entries
+
+    def lookup(self, query, limit):
+        """Return ``{'categories': [...], 'products': [...]}`` matching ``query``."""
+        prefix = fold(query)
+        results = {'categories': [], 'products': []}
+        if not prefix:
+            return results
+        start = bisect.bisect_left(self.keys, prefix)
+        end = min(start + MAX_SCAN, len(self.keys))
+        matches = {}
+        for i in range(start, end):
+            key, inner, length, position = self.entries[i]
+            if not key.startswith(prefix):
+                break
+            rank = (inner, length, key)
+            if position not in matches or rank < matches[position]:
+                matches[position] = rank
+        # Primero lo que empieza con el prefijo, después los nombres más cortos
+        for position in sorted(matches, key=matches.__getitem__):
+            kind, row = self.items[position]
+            if len(results[kind]) < limit:
+                results[kind].append(row)
+        return results
+
+
+def build_index():
+    categories = list(Category.objects.order_by('name').values('id', 'name', 'slug'))
+    products = [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'price': str(row['price']),
+            'offer_price': None if row['offer_price'] is None else str(row['offer_price']),
+            'thumbnail': row['thumbnail_url'] or row['image_url'] or None,
+            'category': row['category_id'],
+        }
+        for row in Product.objects.filter(is_active=True).order_by('id').values(
+            'id', 'name', 'price', 'offer_price', 'thumbnail_url', 'image_url', 'category_id',
+        )
+    ]
+    return SuggestIndex(categories, products)
+
+
+_lock = threading.Lock()
+_current = (None, None)
+
+
+def get_index():
+    """Return the index for the current suggest generation, building it if stale."""
+    global _current
+    generation = get_generation(SUGGEST_GENERATION)
+    built_for, index = _current
+    if built_for == generation:
+        return index
+    with _lock:
+        built_for, index = _current
+        if built_for != generation:
+            index = build_index()
+            _current = (generation, index)
+    return index
+
+
+def suggest(query, limit=8, request=None):
+    results = get_index().lookup(query, max(1, min(limit, MAX_LIMIT)))
+    if request is not None:
+        results['products'] = [
+            {**row, 'thumbnail': absolute_image_url(row['thumbnail'], request)}
+            for row in results['products']
+        ]
+    return results
@@ -0,0 +1,101 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import AsyncRequestFactory, LiveServerTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from shop import async_views
+from shop.models import Announcement, Category, Product, SiteConfig
+
+
+class AsyncReadViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.factory = AsyncRequestFactory()
+        SiteConfig.objects.create(whatsapp_phone='123', shipping_cost=Decimal('5.00'))
+        category = Category.objects.create(name='Lácteos', slug='lacteos')
+        self.product = Product.objects.create(category=category, name='Leche', price=Decimal('10.00'))
+        Product.objects.create(
+            category=category, name='Promo', price=Decimal('3.00'), promoted=True,
+            promoted_until=timezone.now() + timedelta(days=1),
+        )
+        Announcement.objects.create(title='Hola')
+
+    async def sync_get(self, url, params=None):
+        # La vista DRF de siempre, como la sirve el worker sync
+        return await sync_to_async(self.client.get)(url, params or {}, HTTP_ACCEPT='application/json')
+
+    async def async_get(self, view, path, params=None, **kwargs):
+        request = self.factory.get(path, params or {}, headers={'accept': 'application/json'})
+        return await view(request, **kwargs)
+
+    def assertSameResponse(self, sync, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], sync['ETag'])
+        self.assertEqual(response.content, sync.content)
+
+    async def test_products_served_from_sync_cache(self):
+        url = reverse('product-list')
+        sync = await self.sync_get(url, {'page': '1', 'ordering': 'name'})
+        response = await self.async_get(async_views.products, url, {'ordering': 'name', 'page': '1'})
+        self.assertSameResponse(sync, response)
+        self.assertNotIn('Allow', response)  # no pasó por DRF
+
+    async def test_products_miss_runs_sync_view(self):
+        url = reverse('product-detail', args=[self.product.pk])
+        response = await self.async_get(async_views.products, url, pk=self.product.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Allow'], 'GET, HEAD, OPTIONS')
+        # La segunda vez ya está en caché
+        again = await self.async_get(async_views.products, url, pk=self.product.pk)
+        self.assertSameResponse(response, again)
+        self.assertNotIn('Allow', again)
+
+    async def test_not_modified(self):
+        url = reverse('product-list')
+        first = await self.async_get(async_views.products, url)
+        request = self.factory.get(
+            url, headers={'accept': 'application/json', 'if-none-match': first['ETag']}
+        )
+        response = await async_views.products(request)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+    async def test_categories_config_announcements_match_sync(self):
+        for name, view in [
+            ('category-list', async_views.categories),
+            ('config-list', async_views.config),
+            ('announcement-list', async_views.announcements),
+        ]:
+            with self.subTest(name):
+                url = reverse(name)
+                response = await self.async_get(view, url)
+                self.assertSameResponse(await self.sync_get(url), response)
+
+    async def test_other_methods_use_sync_view(self):
+        response = await async_views.config(self.factory.post(reverse('config-list')))
+        self.assertEqual(response.status_code, 405)
+
+    async def test_async_middleware_stack(self):
+        response = await self.async_client.get(reverse('config-list'), headers={'accept': 'application/json'})
+        self.assertEqual(response.json()['whatsapp_phone'], '123')
+
+
+class LoadTestReadsCommandTest(LiveServerTestCase):
+    def test_reports_each_concurrency_level(self):
+        out = StringIO()
+        call_command(
+            'load_test_reads', '--url', self.live_server_url, '--requests', '20',
+            '--concurrency', '1', '--concurrency', '4', stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn('c=4', lines[2])
+        self.assertIn('errors 0', lines[2])
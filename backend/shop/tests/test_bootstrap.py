@@ -0,0 +1,76 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from shop.models import Announcement, Category, Product, SiteConfig
+
+
+class BootstrapTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('bootstrap-list')
+        SiteConfig.objects.create(whatsapp_phone='123', shipping_cost=Decimal('5.00'))
+        self.category = Category.objects.create(name='Lácteos', slug='lacteos')
+        for i in range(25):
+            Product.objects.create(category=self.category, name=f'P{i}', price=Decimal('10.00'))
+        Product.objects.create(
+            category=self.category, name='Promo', price=Decimal('3.00'), promoted=True,
+            promoted_until=timezone.now() + timedelta(days=1),
+        )
+        Announcement.objects.create(title='Hola')
+
+    def test_matches_individual_endpoints(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(set(data), {'config', 'categories', 'announcements', 'products', 'promoted'})
+        self.assertEqual(data['config'], self.client.get(reverse('config-list')).json())
+        self.assertEqual(
+            data['categories'], self.client.get(reverse('category-list'), {'with_counts': '1'}).json()
+        )
+        self.assertEqual(data['categories'][0]['product_count'], 26)
+        self.assertEqual(data['announcements'], self.client.get(reverse('announcement-list')).json())
+        products = self.client.get(reverse('product-list'), {'page': '1', 'page_size': '20'}).json()
+        self.assertEqual(data['products'], products)
+        self.assertTrue(data['products']['next'].startswith('http://testserver/api/products/?'))
+        self.assertEqual([p['name'] for p in data['promoted']['results']], ['Promo'])
+
+    @override_settings(SECURE_PROXY_SSL_HEADER=('HTTP_X_FORWARDED_PROTO', 'https'))
+    def test_parts_follow_host_and_scheme_but_not_validators(self):
+        headers = {'HTTP_X_FORWARDED_PROTO': 'https'}
+        products_url = reverse('product-list')
+        products = self.client.get(products_url, {'page': '1', 'page_size': '20'}, **headers)
+        promoted = self.client.get(products_url, {'page': '1', 'promoted': 'true'}, **headers).json()
+        # El validador es del bootstrap: las partes igual vienen completas
+        data = self.client.get(self.url, HTTP_IF_NONE_MATCH=products['ETag'], **headers).json()
+        self.assertEqual(data['products'], products.json())
+        self.assertEqual(data['promoted'], promoted)
+        self.assertTrue(data['products']['next'].startswith('https://testserver'))
+
+    def test_cached_and_revalidated(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+            resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+    def test_etag_follows_each_part(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Announcement.objects.create(title='Otro')
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()['announcements']), 2)
+
+        etag = resp['ETag']
+        config = SiteConfig.objects.get()
+        config.shipping_cost = Decimal('7.00')
+        config.save()
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.json()['config']['shipping_cost'], '7.00')
@@ -0,0 +1,121 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shop.models import Category, Coupon, Product, SiteConfig, stock_window
+from shop.serializers import OrderSerializer
+
+
+class CartQuoteTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('cart-quote')
+        SiteConfig.objects.create(whatsapp_phone='123', shipping_cost=Decimal('5.00'))
+        category = Category.objects.create(name='Cat', slug='cat')
+        self.milk = Product.objects.create(category=category, name='Leche', price=Decimal('10.00'), stock=3)
+        self.bread = Product.objects.create(
+            category=category, name='Pan', price=Decimal('8.00'), offer_price=Decimal('6.00'), stock=10
+        )
+        Coupon.objects.create(
+            code='PCT', type=Coupon.TYPE_PERCENT, percent=Decimal('50'), percent_cap=Decimal('7.00'),
+            min_subtotal=Decimal('20.00'),
+        )
+        Coupon.objects.create(code='ENVIO', type=Coupon.TYPE_FREE_SHIPPING)
+
+    def quote(self, items, **extra):
+        resp = self.client.post(self.url, {'items': items, **extra}, format='json')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        return resp.json()
+
+    def test_lines_and_totals(self):
+        data = self.quote([
+            {'product_id': self.milk.id, 'quantity': 1},
+            {'product_id': self.bread.id, 'quantity': 2},
+            {'product_id': self.milk.id, 'quantity': 1},
+        ])
+        self.assertEqual(
+            [(i['name'], i['quantity'], i['unit_price'], i['total']) for i in data['items']],
+            [('Leche', 2, '10.00', '20.00'), ('Pan', 2, '6.00', '12.00')],
+        )
+        self.assertEqual(
+            (data['subtotal'], data['discount'], data['shipping_cost'], data['total']),
+            ('32.00', '0.00', '5.00', '37.00'),
+        )
+        self.assertEqual(data['warnings'], [])
+
+    def test_percent_coupon_capped_and_pickup(self):
+        data = self.quote(
+            [{'product_id': self.milk.id, 'quantity': 3}], coupon_code='pct', delivery_method='pickup'
+        )
+        self.assertEqual((data['discount'], data['shipping_cost'], data['total']), ('7.00', '0.00', '23.00'))
+        self.assertEqual(data['coupon_code'], 'PCT')
+
+    def test_warnings(self):
+        data = self.quote(
+            [{'product_id': self.milk.id, 'quantity': 5}, {'product_id': 999, 'quantity': 1}], coupon_code='NOPE'
+        )
+        self.assertEqual(
+            [(w['code'], w.get('product_id')) for w in data['warnings']],
+            [('insufficient_stock', self.milk.id), ('unavailable', 999), ('coupon_invalid', None)],
+        )
+        self.assertEqual(data['warnings'][0]['available'], 3)
+
+        data = self.quote([{'product_id': self.bread.id, 'quantity': 1}], coupon_code='PCT')
+        self.assertEqual([w['code'] for w in data['warnings']], ['coupon_min_subtotal'])
+        self.assertEqual((data['discount'], data['coupon_code']), ('0.00', ''))
+
+    def test_batch_uses_one_product_query(self):
+        carts = [
+            {'items': [{'product_id': self.milk.id, 'quantity': 1}]},
+            {'items': [{'product_id': self.bread.id, 'quantity': 1}], 'coupon_code': 'ENVIO'},
+            {'items': [{'product_id': self.milk.id, 'quantity': 2}], 'delivery_method': 'pickup'},
+        ]
+        self.quote([{'product_id': self.milk.id, 'quantity': 9}], coupon_code='ENVIO')  # calienta config e índice
+        with self.assertNumQueries(1):
+            resp = self.client.post(self.url, {'carts': carts}, format='json')
+        totals = [q['total'] for q in resp.json()['quotes']]
+        self.assertEqual(totals, ['15.00', '6.00', '20.00'])
+
+    def test_stock_refreshes_with_the_stock_window(self):
+        items = [{'product_id': self.milk.id, 'quantity': 2}]
+        window = stock_window()
+        with mock.patch('shop.views.stock_window', return_value=window):
+            self.quote(items)
+            with self.assertNumQueries(0):
+                self.quote(items)
+            serializer = OrderSerializer(data={
+                'name': 'Ana', 'phone': '1', 'address': 'Calle', 'payment_method': 'cash', 'items': items,
+            })
+            serializer.is_valid(raise_exception=True)
+            with self.captureOnCommitCallbacks(execute=True):
+                serializer.save()
+            # El pedido no invalida la caché
+            self.assertEqual(self.quote(items)['warnings'], [])
+        with mock.patch('shop.views.stock_window', return_value=window + 1):
+            data = self.quote(items)
+        self.assertEqual([w['available'] for w in data['warnings']], [1])
+
+    def test_matches_order_totals(self):
+        items = [{'product_id': self.milk.id, 'quantity': 2}, {'product_id': self.bread.id, 'quantity': 1}]
+        quote = self.quote(items, coupon_code='PCT')
+        serializer = OrderSerializer(data={
+            'name': 'Ana', 'phone': '1', 'address': 'Calle', 'payment_method': 'cash',
+            'items': items, 'coupon_code': 'PCT',
+        })
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save()
+        self.assertEqual(
+            (quote['total'], quote['discount'], quote['shipping_cost']),
+            (f'{order.total:.2f}', f'{order.discount_total:.2f}', f'{order.shipping_cost:.2f}'),
+        )
+
+    def test_rejects_invalid_payload(self):
+        resp = self.client.post(self.url, {'items': []}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.post(self.url, {'carts': [{'items': []}] * 51}, format='json')
+        self.assertEqual(resp.status_code, 400)
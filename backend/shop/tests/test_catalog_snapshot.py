@@ -0,0 +1,118 @@
+import gzip
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shop.models import Category, Product, stock_window
+from shop import snapshot
+from shop.snapshot import brotli
+
+
+@override_settings(CATALOG_SNAPSHOT_BACKGROUND=False)
+class CatalogSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = Category.objects.create(name='Lácteos', slug='lacteos')
+        self.product = Product.objects.create(
+            category=self.category, name='Leche', price=Decimal('10.00'), stock=3
+        )
+        Product.objects.create(
+            category=self.category, name='Oculto', price=Decimal('1.00'), is_active=False
+        )
+
+    def blob_url(self):
+        resp = self.client.get(reverse('catalog-snapshot'))
+        self.assertEqual(resp.status_code, 302)
+        return resp['Location']
+
+    def test_gzip_blob_is_immutable_and_compact(self):
+        url = self.blob_url()
+        with self.assertNumQueries(0):
+            resp = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', resp['Cache-Control'])
+        raw = gzip.decompress(resp.content)
+        self.assertNotIn(b', ', raw)
+        data = json.loads(raw)
+        self.assertEqual([c['slug'] for c in data['categories']], ['lacteos'])
+        self.assertEqual([p['name'] for p in data['products']], ['Leche'])
+        product = data['products'][0]
+        self.assertEqual(product['category'], self.category.id)
+        self.assertEqual(product['price'], '10.00')
+        self.assertNotIn('category_id', product)
+
+    def test_identity_and_brotli(self):
+        url = self.blob_url()
+        resp = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(resp.has_header('Content-Encoding'))
+        self.assertEqual(len(json.loads(resp.content)['products']), 1)
+        if brotli is not None:
+            resp = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+            self.assertEqual(resp['Content-Encoding'], 'br')
+            self.assertEqual(json.loads(brotli.decompress(resp.content))['products'][0]['name'], 'Leche')
+
+    def test_new_generation_gets_new_hash(self):
+        old_url = self.blob_url()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Leche Entera'
+            self.product.save()
+        new_url = self.blob_url()
+        self.assertNotEqual(old_url, new_url)
+        # La URL vieja sigue sirviendo su contenido mientras esté en caché
+        resp = self.client.get(old_url, HTTP_ACCEPT_ENCODING='identity')
+        self.assertEqual(json.loads(resp.content)['products'][0]['name'], 'Leche')
+
+    def test_unknown_hash_redirects_to_current(self):
+        resp = self.client.get(reverse('catalog-snapshot-blob', args=['deadbeef']))
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(resp['Location'], self.blob_url())
+
+    def test_other_workers_serve_latest_while_one_rebuilds(self):
+        old_url = self.blob_url()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Leche Entera'
+            self.product.save()
+        # Otro worker tomó el slot de rebuild: acá no se construye nada
+        cache.add(snapshot.SNAPSHOT_REBUILD_KEY, True, 60)
+        with mock.patch('shop.snapshot.build_snapshot') as build:
+            self.assertEqual(self.blob_url(), old_url)
+        build.assert_not_called()
+        cache.delete(snapshot.SNAPSHOT_REBUILD_KEY)
+        self.assertNotEqual(self.blob_url(), old_url)
+
+    def test_stock_refreshes_with_the_stock_window(self):
+        window = stock_window()
+        with mock.patch('shop.snapshot.stock_window', return_value=window):
+            old_url = self.blob_url()
+            Product.objects.filter(pk=self.product.pk).update(stock=1)
+            self.assertEqual(self.blob_url(), old_url)
+        with mock.patch('shop.snapshot.stock_window', return_value=window + 1):
+            new_url = self.blob_url()
+        self.assertNotEqual(new_url, old_url)
+        resp = self.client.get(new_url, HTTP_ACCEPT_ENCODING='identity')
+        self.assertEqual(json.loads(resp.content)['products'][0]['stock'], 1)
+
+    def test_empty_cache_builds_inline_with_fast_compression(self):
+        with mock.patch('shop.snapshot.build_snapshot', wraps=snapshot.build_snapshot) as build:
+            self.blob_url()
+        self.assertEqual(build.call_args.kwargs['brotli_quality'], snapshot.INLINE_BROTLI_QUALITY)
+
+
+@override_settings(CATALOG_SNAPSHOT_BACKGROUND=True)
+class SnapshotRebuildSlotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_one_rebuild_per_interval(self):
+        with mock.patch('shop.snapshot.threading.Thread') as thread:
+            snapshot.schedule_rebuild()
+            snapshot.schedule_rebuild()
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
@@ -0,0 +1,53 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shop.models import Category, Product
+
+
+class CategoryFacetsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('category-list')
+        self.lacteos = Category.objects.create(name='Lácteos', slug='lacteos')
+        self.vacia = Category.objects.create(name='Vacía', slug='vacia')
+        Product.objects.create(category=self.lacteos, name='Leche', price=Decimal('10.00'))
+        Product.objects.create(
+            category=self.lacteos, name='Queso', price=Decimal('50.00'), offer_price=Decimal('4.50')
+        )
+        Product.objects.create(category=self.lacteos, name='Manteca', price=Decimal('99.00'), is_active=False)
+
+    def facets(self, resp):
+        return {row['slug']: row for row in resp.data}
+
+    def test_counts_and_price_range(self):
+        facets = self.facets(self.client.get(self.url, {'with_counts': '1'}))
+        lacteos = facets['lacteos']
+        self.assertEqual(lacteos['product_count'], 2)
+        self.assertEqual(lacteos['offer_count'], 1)
+        self.assertEqual((lacteos['min_price'], lacteos['max_price']), ('4.50', '10.00'))
+        self.assertEqual(
+            {k: facets['vacia'][k] for k in ('product_count', 'offer_count', 'min_price', 'max_price')},
+            {'product_count': 0, 'offer_count': 0, 'min_price': None, 'max_price': None},
+        )
+
+    def test_opt_in(self):
+        self.assertNotIn('product_count', self.client.get(self.url).data[0])
+
+    def test_single_aggregate_cached_per_generation(self):
+        for i in range(5):
+            Category.objects.create(name=f'Cat {i}', slug=f'cat-{i}')
+        # Categorías + un único agregado agrupado, sin COUNT por categoría
+        with self.assertNumQueries(2):
+            self.client.get(self.url, {'with_counts': '1'})
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'with_counts': 'true'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(category=self.lacteos, name='Yogur', price=Decimal('2.00'))
+        lacteos = self.facets(self.client.get(self.url, {'with_counts': '1'}))['lacteos']
+        self.assertEqual((lacteos['product_count'], lacteos['min_price']), (3, '2.00'))
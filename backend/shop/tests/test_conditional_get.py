@@ -0,0 +1,68 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from shop.models import Announcement, Category, Product, SiteConfig
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = Category.objects.create(name='Cat', slug='cat')
+        self.product = Product.objects.create(
+            category=self.category, name='Leche', price=Decimal('10.00')
+        )
+
+    def assert_revalidates(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        self.assertTrue(etag.startswith('"'))
+        with self.assertNumQueries(0):
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], etag)
+        self.assertEqual(second.content, b'')
+        return etag
+
+    def test_products_and_categories(self):
+        self.assert_revalidates(reverse('product-list'))
+        self.assert_revalidates(reverse('product-detail', args=[self.product.id]))
+        self.assert_revalidates(reverse('category-list'))
+
+    def test_catalog_change_changes_etag(self):
+        url = reverse('product-list')
+        etag = self.assert_revalidates(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = Decimal('11.00')
+            self.product.save()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], etag)
+
+    def test_config_last_modified(self):
+        SiteConfig.objects.create(whatsapp_phone='123', shipping_cost=Decimal('5.00'))
+        url = reverse('config-list')
+        self.assert_revalidates(url)
+        last_modified = self.client.get(url)['Last-Modified']
+        resp = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, 304)
+
+    def test_announcement_etag_changes_at_boundary(self):
+        url = reverse('announcement-list')
+        start = timezone.now() + timedelta(seconds=1)
+        Announcement.objects.create(title='Pronto', start_at=start)
+        etag = self.assert_revalidates(url)
+        self.assertEqual(self.client.get(url).data, [])
+        # El límite cacheado ya quedó atrás: la ETag cambia sin tocar el anuncio
+        with patch('django.utils.timezone.now', return_value=start + timedelta(seconds=1)):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.data), 1)
@@ -0,0 +1,54 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+
+from shop.models import Category, Order, OrderItem, Product
+from shop.serializers import OrderSerializer
+
+
+@override_settings(ORDER_STOCK_STRATEGY='conditional')
+class ConditionalStockTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Cat', slug='cat')
+        self.milk = Product.objects.create(category=category, name='Leche', price=Decimal('10.00'), stock=5)
+        self.bread = Product.objects.create(category=category, name='Pan', price=Decimal('2.00'), stock=5)
+
+    def order(self, **quantities):
+        products = {'milk': self.milk, 'bread': self.bread}
+        serializer = OrderSerializer(data={
+            'name': 'Ana', 'phone': '1', 'address': 'Calle', 'payment_method': 'cash',
+            'items': [{'product_id': products[k].id, 'quantity': q} for k, q in quantities.items()],
+        })
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_decrements_without_row_locks(self):
+        with CaptureQueriesContext(connection) as ctx:
+            order = self.order(milk=2, bread=3)
+        self.assertFalse(any('FOR UPDATE' in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(order.total, Decimal('26.00'))
+        self.milk.refresh_from_db()
+        self.bread.refresh_from_db()
+        self.assertEqual((self.milk.stock, self.bread.stock), (3, 2))
+
+    def test_shortfall_after_read_rolls_back(self):
+        bulk_create = OrderItem.objects.bulk_create
+
+        def concurrent_sale(objs, *args, **kwargs):
+            # Otro pedido se lleva la leche entre la lectura y el UPDATE
+            Product.objects.filter(pk=self.milk.pk).update(stock=1)
+            return bulk_create(objs, *args, **kwargs)
+
+        with patch.object(OrderItem.objects, 'bulk_create', side_effect=concurrent_sale):
+            with self.assertRaises(serializers.ValidationError) as ctx:
+                self.order(milk=2, bread=3)
+        self.assertIn('Sin stock suficiente para Leche (disponible: 1)', str(ctx.exception.detail))
+        self.assertFalse(Order.objects.exists())
+        self.bread.refresh_from_db()
+        self.assertEqual(self.bread.stock, 5)
@@ -0,0 +1,63 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from shop.coupons import get_rule, get_valid_rule
+from shop.models import Coupon, CouponUsageShard
+
+
+class CouponIndexTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('coupon-validate')
+        self.coupon = Coupon.objects.create(code=' off10 ', type=Coupon.TYPE_FIXED, amount=Decimal('10.00'))
+
+    def validate(self, code):
+        return self.client.post(self.url, {'code': code}, format='json').json()
+
+    def test_codes_normalized_on_save(self):
+        self.coupon.refresh_from_db()
+        self.assertEqual(self.coupon.code, 'OFF10')
+        self.assertTrue(self.validate('Off10')['valid'])
+
+    def test_case_variants_rejected_by_constraint(self):
+        other = Coupon.objects.create(code='OTRO', type=Coupon.TYPE_FIXED)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            # update() no pasa por save(): la restricción funcional lo frena igual
+            Coupon.objects.filter(pk=other.pk).update(code='off10')
+
+    def test_validation_without_queries(self):
+        self.validate('OFF10')
+        with self.assertNumQueries(0):
+            self.assertTrue(self.validate('off10')['valid'])
+            self.assertFalse(self.validate('NOPE')['valid'])
+
+    def test_usage_limit_checked_against_database(self):
+        Coupon.objects.filter(pk=self.coupon.pk).update(usage_limit=1)
+        self.coupon.refresh_from_db()
+        self.coupon.save()
+        self.assertIsNotNone(get_valid_rule('off10'))
+        # Los usos no se guardan en el índice: se consultan en cada validación
+        CouponUsageShard.objects.filter(coupon=self.coupon).update(used=F('capacity'))
+        with self.assertNumQueries(1):
+            self.assertIsNone(get_valid_rule('off10'))
+
+    def test_save_and_delete_invalidate(self):
+        self.assertIsNotNone(get_rule('OFF10'))
+        self.coupon.expires_at = timezone.now() - timedelta(minutes=1)
+        self.coupon.save()
+        self.assertIsNone(get_rule('OFF10'))
+        self.coupon.expires_at = None
+        self.coupon.amount = Decimal('7.00')
+        self.coupon.save()
+        self.assertEqual(get_rule('OFF10').amount, Decimal('7.00'))
+        self.coupon.delete()
+        self.assertIsNone(get_rule('OFF10'))
@@ -0,0 +1,107 @@
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F, Sum
+from django.test import TestCase, override_settings
+
+from shop.coupons import get_rule, get_valid_rule, redeem
+from shop.models import Category, Coupon, CouponRedemption, CouponUsageShard, Order, Product
+from shop.serializers import OrderSerializer
+
+
+@override_settings(COUPON_USAGE_SHARDS=4)
+class CouponRedemptionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Cat', slug='cat')
+        self.product = Product.objects.create(category=category, name='Leche', price=Decimal('10.00'), stock=100)
+        self.coupon = Coupon.objects.create(
+            code='HOT', type=Coupon.TYPE_FIXED, amount=Decimal('2.00'), usage_limit=10,
+        )
+
+    def order(self, code='HOT'):
+        serializer = OrderSerializer(data={
+            'name': 'Ana', 'phone': '1', 'address': 'Calle', 'payment_method': 'cash',
+            'delivery_method': 'pickup', 'coupon_code': code,
+            'items': [{'product_id': self.product.id, 'quantity': 1}],
+        })
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def capacities(self):
+        return list(self.coupon.usage_shards.order_by('shard').values_list('capacity', 'used'))
+
+    def test_shards_split_usage_limit(self):
+        self.assertEqual(self.capacities(), [(3, 0), (3, 0), (2, 0), (2, 0)])
+
+    def test_limit_enforced_exactly(self):
+        for _ in range(10):
+            self.assertEqual(self.order().coupon_code, 'HOT')
+        # Con todos los fragmentos llenos el cupón deja de validar
+        self.assertIsNone(get_valid_rule('HOT'))
+        self.assertEqual(redeem(get_rule('HOT')), (False, None))
+        self.assertEqual(CouponRedemption.objects.filter(coupon=self.coupon).count(), 10)
+        self.assertEqual(self.coupon.usage_shards.aggregate(n=Sum('used'))['n'], 10)
+
+    def test_full_shard_falls_back_to_others(self):
+        CouponUsageShard.objects.filter(coupon=self.coupon).exclude(shard=2).update(used=F('capacity'))
+        redeemed, shard = redeem(get_rule('HOT'))
+        self.assertEqual((redeemed, shard), (True, 2))
+
+    def test_redemption_recorded_per_order(self):
+        order = self.order()
+        redemption = order.coupon_redemption
+        self.assertEqual(redemption.coupon, self.coupon)
+        self.assertIn(redemption.shard, range(4))
+
+    def test_unlimited_coupon_has_no_shards(self):
+        Coupon.objects.create(code='FREE', type=Coupon.TYPE_FIXED, amount=Decimal('1.00'))
+        order = self.order('FREE')
+        self.assertFalse(CouponUsageShard.objects.filter(coupon__code='FREE').exists())
+        self.assertIsNone(order.coupon_redemption.shard)
+
+    def test_rebalance_keeps_taken_uses(self):
+        for _ in range(3):
+            self.order()
+        self.coupon.usage_limit = 5
+        self.coupon.save()
+        shards = self.capacities()
+        self.assertEqual(sum(capacity for capacity, _ in shards), 5)
+        self.assertTrue(all(capacity >= used for capacity, used in shards))
+        for _ in range(2):
+            self.order()
+        self.assertIsNone(get_valid_rule('HOT'))
+
+    def test_existing_uses_seed_shards(self):
+        Coupon.objects.create(
+            code='OLD', type=Coupon.TYPE_FIXED, amount=Decimal('1.00'), usage_limit=3, used_count=3,
+        )
+        self.assertIsNone(get_valid_rule('OLD'))
+
+    def test_reconcile_command(self):
+        self.order()
+        self.order()
+        Order.objects.order_by('pk').first().delete()
+        out = StringIO()
+        call_command('reconcile_coupon_usage', stdout=out)
+        self.coupon.refresh_from_db()
+        self.assertEqual(self.coupon.used_count, 1)
+        # El fragmento conserva el uso del pedido borrado: se informa
+        self.assertIn('HOT: 1 redemptions, 2 uses taken in shards', out.getvalue())
+
+    def test_backfill_matches_codes_as_typed(self):
+        resolve = import_module('shop.migrations.0015_coupon_redemptions').coupon_resolver
+        renamed = Coupon.objects.create(code='TMP', type=Coupon.TYPE_FIXED)
+        Coupon.objects.filter(pk=renamed.pk).update(code=f'OFF5-{renamed.pk}')
+        long_code = 'X' * 40
+        suffix = f'-{renamed.pk + 1}'
+        truncated = Coupon.objects.create(code=long_code[:40 - len(suffix)] + suffix, type=Coupon.TYPE_FIXED)
+        self.assertEqual(truncated.pk, renamed.pk + 1)
+        resolve = resolve(Coupon.objects.order_by('pk'))
+        self.assertEqual(resolve(' hot '), self.coupon)
+        self.assertEqual(resolve('off5'), renamed)
+        self.assertEqual(resolve(long_code.lower()), truncated)
+        self.assertIsNone(resolve('otro'))
@@ -0,0 +1,41 @@
+from io import StringIO
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, TestCase
+
+
+def pooled(**extra):
+    handler = ConnectionHandler({
+        'default': {
+            'ENGINE': 'shop.db_backends.postgresql_pool', 'NAME': 'supermercado', 'CONN_MAX_AGE': 0,
+            'OPTIONS': {'pool': {'min_size': 1, 'max_size': 4}}, **extra,
+        },
+    })
+    return handler['default']
+
+
+class PooledBackendTest(SimpleTestCase):
+    def test_pool_options_not_sent_to_psycopg(self):
+        params = pooled().get_connection_params()
+        self.assertEqual(params['dbname'], 'supermercado')
+        self.assertNotIn('pool', params)
+
+    def test_pool_requires_conn_max_age_zero(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'CONN_MAX_AGE = 0'):
+            pooled(CONN_MAX_AGE=600).pool
+
+    def test_without_pool_options_behaves_like_postgresql(self):
+        self.assertIsNone(pooled(OPTIONS={}).pool)
+
+
+class BenchDbConnectionsTest(TestCase):
+    def test_compares_connect_and_persistent(self):
+        out = StringIO()
+        call_command(
+            'bench_db_connections', '--threads', '2', '--requests', '20',
+            '--mode', 'connect', '--mode', 'persistent', stdout=out,
+        )
+        self.assertIn('connect', out.getvalue())
+        self.assertIn('persistent', out.getvalue())
@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shop.models import Category, Product
+
+
+class ProductEffectivePriceTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Cat', slug='cat')
+
+    def create(self, name, price, offer_price=None):
+        return Product.objects.create(
+            category=self.category, name=name, price=Decimal(price),
+            offer_price=Decimal(offer_price) if offer_price is not None else None,
+        )
+
+    def test_save_maintains_columns(self):
+        p = self.create('A', '10.00', '8.00')
+        self.assertTrue(p.has_offer)
+        self.assertEqual(p.effective_price, Decimal('8.00'))
+        p.offer_price = None
+        p.save(update_fields=['offer_price'])
+        p.refresh_from_db()
+        self.assertFalse(p.has_offer)
+        self.assertEqual(p.effective_price, Decimal('10.00'))
+
+    def test_zero_offer_is_not_an_offer(self):
+        p = self.create('A', '10.00', '0')
+        self.assertFalse(p.has_offer)
+        self.assertEqual(p.effective_price, Decimal('10.00'))
+
+    def test_queryset_update_maintains_columns(self):
+        a = self.create('A', '10.00')
+        b = self.create('B', '20.00', '15.00')
+        Product.objects.filter(pk=a.pk).update(offer_price=Decimal('7.00'))
+        Product.objects.filter(pk=b.pk).update(price=Decimal('30.00'), offer_price=None)
+        a.refresh_from_db()
+        b.refresh_from_db()
+        self.assertEqual((a.has_offer, a.effective_price), (True, Decimal('7.00')))
+        self.assertEqual((b.has_offer, b.effective_price), (False, Decimal('30.00')))
+
+    def test_bulk_update_maintains_columns(self):
+        a = self.create('A', '10.00')
+        a.offer_price = Decimal('4.00')
+        Product.objects.bulk_update([a], ['offer_price'])
+        a.refresh_from_db()
+        self.assertEqual(a.effective_price, Decimal('4.00'))
+
+    def test_orderings(self):
+        self.create('Sin oferta', '5.00')
+        self.create('Oferta cara', '30.00', '12.00')
+        self.create('Oferta barata', '20.00', '9.00')
+        client = APIClient()
+        url = reverse('product-list')
+        names = [p['name'] for p in client.get(url).data['results']]
+        self.assertEqual(names, ['Oferta barata', 'Oferta cara', 'Sin oferta'])
+        names = [p['name'] for p in client.get(url, {'ordering': '-effective_price'}).data['results']]
+        self.assertEqual(names, ['Oferta cara', 'Oferta barata', 'Sin oferta'])
+        # Como la anotación vieja (0 = en oferta): ``has_offer`` pone las ofertas primero
+        names = [p['name'] for p in client.get(url, {'ordering': 'has_offer,offer_price'}).data['results']]
+        self.assertEqual(names, ['Oferta barata', 'Oferta cara', 'Sin oferta'])
+        names = [p['name'] for p in client.get(url, {'ordering': '-has_offer,name'}).data['results']]
+        self.assertEqual(names, ['Sin oferta', 'Oferta barata', 'Oferta cara'])
@@ -0,0 +1,78 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import cloudinary
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shop.models import Category, Product
+
+
+def fake_url(storage, name):
+    return f'/media/{name}'
+
+
+class ImageUrlsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Parcheado en setUp (no en la clase) para cubrir también los save() de acá
+        for patcher in (
+            patch.object(cloudinary.config(), 'cloud_name', 'demo'),
+            patch('cloudinary_storage.storage.MediaCloudinaryStorage.url', autospec=True, side_effect=fake_url),
+        ):
+            self.url = patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.category = Category.objects.create(name='Cat', slug='cat', image='categories/c.jpg')
+        self.product = Product.objects.create(
+            category=self.category, name='Leche', price=Decimal('10.00'), image='products/leche.jpg'
+        )
+
+    def test_urls_computed_on_save(self):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.image_url, '/media/products/leche.jpg')
+        self.assertIn('c_limit,f_auto,h_400,q_auto,w_400', self.product.thumbnail_url)
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.image_url, '/media/categories/c.jpg')
+
+    def test_listing_does_not_build_urls(self):
+        url = self.url
+        url.reset_mock()
+        for name in ('product-list', 'category-list'):
+            resp = self.client.get(reverse(name))
+            self.assertEqual(resp.status_code, 200)
+        url.assert_not_called()
+        item = resp.data[0]
+        self.assertEqual(item['image'], 'http://testserver/media/categories/c.jpg')
+        self.assertIn('w_400', item['thumbnail'])
+
+    @patch('cloudinary_storage.storage.MediaCloudinaryStorage.delete', autospec=True)
+    def test_image_change_recomputes_urls(self, _delete):
+        self.product.image = 'products/nueva.jpg'
+        self.product.save()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.image_url, '/media/products/nueva.jpg')
+        self.assertIn('nueva', self.product.thumbnail_url)
+
+        self.product.image = None
+        self.product.save()
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.image_url, self.product.thumbnail_url), ('', ''))
+
+    def test_backfill_command(self):
+        Product.objects.update(image_url='', thumbnail_url='')
+        call_command('refresh_image_urls', '--missing', stdout=open('/dev/null', 'w'))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.image_url, '/media/products/leche.jpg')
+
+    def test_unconfigured_storage_is_skipped_quietly(self):
+        with patch.object(cloudinary.config(), 'cloud_name', None), \
+                self.assertNoLogs('shop.images', 'WARNING'):
+            product = Product.objects.create(
+                category=self.category, name='Pan', price=Decimal('1.00'), image='products/pan.jpg'
+            )
+        product.refresh_from_db()
+        self.assertEqual(product.image_url, '')
@@ -0,0 +1,68 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from shop.models import Category, Product
+
+
+class ProductKeysetPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('product-list')
+        category = Category.objects.create(name='Cat', slug='cat')
+        now = timezone.now()
+        for i in range(23):
+            p = Product.objects.create(
+                category=category,
+                name=f'Prod {i % 5}',
+                price=Decimal(10 + i % 4),
+                offer_price=Decimal(5 + i % 3) if i % 2 else None,
+            )
+            Product.objects.filter(pk=p.pk).update(created_at=now - timedelta(hours=i % 6))
+
+    def walk(self, ordering):
+        ids = []
+        url, params = self.url, {'pagination': 'cursor', 'page_size': 5, 'ordering': ordering}
+        while url:
+            resp = self.client.get(url, params)
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIn('count', resp.data)
+            ids.extend(p['id'] for p in resp.data['results'])
+            url, params = resp.data['next'], None
+        return ids
+
+    def test_cursor_walk_matches_full_ordering(self):
+        for ordering in ['name', '-price', 'offer_price', '-offer_price', 'created_at', 'has_offer,offer_price']:
+            ids = self.walk(ordering)
+            self.assertEqual(len(ids), 23, ordering)
+            self.assertEqual(len(set(ids)), 23, ordering)
+
+    def test_cursor_walk_order(self):
+        for name, desc in [('price', True), ('offer_price', False), ('offer_price', True)]:
+            expr = F(name).desc(nulls_first=True) if desc else F(name).asc(nulls_last=True)
+            tiebreak = '-id' if desc else 'id'
+            expected = list(Product.objects.order_by(expr, tiebreak).values_list('id', flat=True))
+            self.assertEqual(self.walk(f'-{name}' if desc else name), expected)
+
+    def test_each_page_is_a_single_query(self):
+        resp = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 5, 'ordering': 'price'})
+        with self.assertNumQueries(1):
+            self.client.get(resp.data['next'])
+
+    def test_invalid_or_mismatched_cursor(self):
+        resp = self.client.get(self.url, {'pagination': 'cursor', 'ordering': 'price', 'page_size': 5})
+        next_url = resp.data['next'].replace('ordering=price', 'ordering=name')
+        self.assertEqual(self.client.get(next_url).status_code, 404)
+        resp = self.client.get(self.url, {'pagination': 'cursor', 'cursor': 'garbage'})
+        self.assertEqual(resp.status_code, 404)
+
+    def test_page_number_mode_unchanged(self):
+        resp = self.client.get(self.url, {'page_size': 5})
+        self.assertEqual(resp.data['count'], 23)
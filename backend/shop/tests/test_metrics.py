@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shop import metrics
+from shop.models import Category, Product
+
+METRICS_DIR = tempfile.mkdtemp()
+
+
+@override_settings(METRICS_DIR=METRICS_DIR, METRICS_FLUSH_INTERVAL=3600, METRICS_TOKEN='s3cret')
+class MetricsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        metrics.registry.reset()
+        self.client = APIClient()
+        self.url = reverse('metrics')
+        category = Category.objects.create(name='Lácteos', slug='lacteos')
+        Product.objects.create(category=category, name='Leche', price=Decimal('10.00'))
+
+    def scrape(self):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def value(self, text, series):
+        for line in text.splitlines():
+            if line.startswith(series + ' '):
+                return float(line.rsplit(' ', 1)[1])
+        self.fail(f'{series} not in output')
+
+    def test_staff_or_token_only(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer nope').status_code, 403)
+        staff = User.objects.create_user('admin', password='x', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+
+    def test_records_requests_queries_and_cache(self):
+        for _ in range(2):
+            self.client.get(reverse('product-list'))
+        self.client.get('/api/no-such-endpoint/')
+        text = self.scrape()
+        labels = 'view="product-list",method="GET"'
+        self.assertEqual(self.value(text, f'shop_http_requests_total{{{labels},status="200"}}'), 2)
+        self.assertEqual(self.value(text, f'shop_http_request_duration_seconds_count{{{labels}}}'), 2)
+        self.assertEqual(self.value(text, f'shop_http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'), 2)
+        self.assertGreater(self.value(text, f'shop_db_queries_total{{{labels}}}'), 0)
+        self.assertGreater(self.value(text, f'shop_db_query_duration_seconds_total{{{labels}}}'), 0)
+        # La segunda respuesta sale de caché
+        self.assertGreater(self.value(text, f'shop_cache_lookups_total{{{labels},result="hit"}}'), 0)
+        self.assertGreater(self.value(text, f'shop_cache_lookups_total{{{labels},result="miss"}}'), 0)
+        self.assertEqual(
+            self.value(text, 'shop_http_requests_total{view="unmatched",method="GET",status="404"}'), 1
+        )
+
+    def test_unknown_methods_share_one_label(self):
+        for method in ('FOO', 'BAR'):
+            self.client.generic(method, reverse('product-list'))
+        text = self.scrape()
+        self.assertEqual(
+            self.value(text, 'shop_http_requests_total{view="product-list",method="other",status="405"}'), 2
+        )
+        self.assertNotIn('method="FOO"', text)
+
+    def test_sums_snapshots_of_other_workers(self):
+        self.client.get(reverse('product-list'))
+        other = metrics.empty_stats()
+        other.update(count=3, duration=0.3, queries=6, statuses={'200': 3}, buckets=[0, 3] + [0] * 9)
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        with open(os.path.join(METRICS_DIR, '99999-1.json'), 'w') as f:
+            json.dump([{'view': 'product-list', 'method': 'GET', **other}], f)
+        text = self.scrape()
+        labels = 'view="product-list",method="GET"'
+        self.assertEqual(self.value(text, f'shop_http_requests_total{{{labels},status="200"}}'), 4)
+        self.assertEqual(self.value(text, f'shop_http_request_duration_seconds_count{{{labels}}}'), 4)
+        self.assertGreaterEqual(self.value(text, f'shop_http_request_duration_seconds_bucket{{{labels},le="0.01"}}'), 3)
+
+    async def test_async_requests_recorded(self):
+        await self.async_client.get(reverse('config-list'), headers={'accept': 'application/json'})
+        self.assertEqual(metrics.registry.snapshot()[0]['view'], 'config-list')
+        self.assertEqual(metrics.registry.snapshot()[0]['statuses'], {'200': 1})
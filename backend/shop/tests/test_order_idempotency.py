@@ -0,0 +1,85 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from shop.models import Category, Coupon, IdempotencyKey, Order, Product
+
+
+class OrderIdempotencyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        category = Category.objects.create(name='Cat', slug='cat')
+        self.product = Product.objects.create(category=category, name='Leche', price=Decimal('10.00'), stock=5)
+        self.coupon = Coupon.objects.create(code='OFF5', type=Coupon.TYPE_FIXED, amount=Decimal('5.00'))
+
+    def post(self, key=None, quantity=2, **extra):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post(reverse('order-list'), {
+            'name': 'Ana', 'phone': '1', 'address': 'Calle', 'payment_method': 'cash',
+            'delivery_method': 'pickup', 'coupon_code': 'OFF5',
+            'items': [{'product_id': self.product.id, 'quantity': quantity}],
+            **extra,
+        }, format='json', **headers)
+
+    def test_retry_replays_response(self):
+        first = self.post('abc')
+        self.assertEqual(first.status_code, 201)
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.post('abc')
+        touched = [q['sql'] for q in ctx.captured_queries if 'shop_idempotencykey' not in q['sql']]
+        self.assertFalse([sql for sql in touched if 'SAVEPOINT' not in sql])
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.coupon.redemptions.count()), (3, 1))
+
+    def test_without_key_creates_each_time(self):
+        self.post()
+        self.post()
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_key_reused_with_other_payload(self):
+        self.post('abc')
+        resp = self.post('abc', quantity=1)
+        self.assertEqual(resp.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_in_flight_key_conflicts(self):
+        IdempotencyKey.objects.create(key='abc', request_hash='x')
+        self.assertEqual(self.post('abc').status_code, 409)
+
+    def test_validation_errors_are_replayed(self):
+        first = self.post('abc', quantity=50)
+        self.assertEqual(first.status_code, 400)
+        self.assertEqual(self.post('abc', quantity=50).json(), first.json())
+
+    def test_server_error_releases_key(self):
+        with patch('shop.serializers.OrderSerializer.save', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.post('abc')
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.post('abc').status_code, 201)
+
+    @override_settings(ORDER_IDEMPOTENCY_TTL=60)
+    def test_expired_key_is_reusable(self):
+        self.post('abc')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(seconds=61))
+        self.assertEqual(self.post('abc').status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(seconds=61))
+        call_command('purge_idempotency_keys', stdout=StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
@@ -0,0 +1,63 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shop.models import Category, Coupon, CouponRedemption, Order, Product, SiteConfig
+
+
+class OrderQueryBudgetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('order-list')
+        SiteConfig.objects.create(whatsapp_phone='123', shipping_cost=Decimal('5.00'))
+        category = Category.objects.create(name='Cat', slug='cat')
+        self.products = [
+            Product.objects.create(category=category, name=f'P{i}', price=Decimal('10.00'), stock=100)
+            for i in range(30)
+        ]
+        Coupon.objects.create(code='OFF5', type=Coupon.TYPE_FIXED, amount=Decimal('5.00'), usage_limit=10)
+
+    def post(self, count, **extra):
+        data = {
+            'name': 'Ana', 'phone': '1', 'address': 'Calle', 'payment_method': 'cash',
+            'items': [{'product_id': p.id, 'quantity': 2} for p in self.products[:count]],
+            **extra,
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(self.url, data, format='json')
+        self.assertEqual(resp.status_code, 201, resp.data)
+        return resp, [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+
+    def test_budget_independent_of_cart_size(self):
+        self.post(1)  # calienta la caché de la config
+        _, small = self.post(1)
+        _, large = self.post(30)
+        # SELECT FOR UPDATE + INSERT pedido + INSERT items + UPDATE stock
+        self.assertEqual(len(small), 4, small)
+        self.assertEqual(len(large), 4, large)
+
+    def test_budget_with_coupon(self):
+        # Fragmentos distintos: si el segundo cayera en uno lleno habría un reintento
+        with mock.patch('shop.coupons.random.randrange', side_effect=[0, 1]):
+            self.post(1, coupon_code='OFF5')  # calienta config e índice de cupones
+            resp, queries = self.post(30, coupon_code='OFF5')
+        # + chequeo de usos (cupón con límite) + UPDATE de un fragmento + INSERT del canje
+        self.assertEqual(len(queries), 7, queries)
+        self.assertFalse(any(q.startswith('UPDATE "shop_coupon"') for q in queries))
+        self.assertEqual(sum(q.startswith('INSERT INTO "shop_order"') for q in queries), 1)
+        self.assertFalse(any(q.startswith('UPDATE "shop_order"') for q in queries))
+
+        order = Order.objects.get(pk=resp.data['id'])
+        self.assertEqual(order.total, Decimal('600.00') - 5 + 5)
+        self.assertEqual(order.discount_total, Decimal('5.00'))
+        self.assertEqual(order.coupon_code, 'OFF5')
+        self.assertEqual(len(resp.data['items']), 30)
+        self.assertEqual(CouponRedemption.objects.filter(coupon__code='OFF5').count(), 2)
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 96)
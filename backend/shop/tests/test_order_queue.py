@@ -0,0 +1,87 @@
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shop.models import Category, Order, OrderTicket, Product
+from shop.order_queue import CLAIM_TIMEOUT, claim_batch, process_batch, process_ticket
+
+
+@override_settings(ORDER_INTAKE_MODE='queue')
+class OrderQueueTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        category = Category.objects.create(name='Cat', slug='cat')
+        self.product = Product.objects.create(category=category, name='Leche', price=Decimal('10.00'), stock=3)
+
+    def post(self, quantity):
+        return self.client.post(reverse('order-list'), {
+            'name': 'Ana', 'phone': '1', 'address': 'Calle', 'payment_method': 'cash',
+            'delivery_method': 'pickup',
+            'items': [{'product_id': self.product.id, 'quantity': quantity}],
+        }, format='json')
+
+    def status(self, resp):
+        return self.client.get(resp.data['status_url']).data
+
+    def test_accepts_then_worker_confirms(self):
+        resp = self.post(2)
+        self.assertEqual(resp.status_code, 202)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.status(resp)['status'], 'pending')
+
+        call_command('process_order_queue', '--once', stdout=StringIO())
+        data = self.status(resp)
+        self.assertEqual(data['status'], 'done')
+        order = Order.objects.get()
+        self.assertEqual(data['order']['id'], order.id)
+        self.assertEqual(data['order']['total'], '20.00')
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+
+    def test_stock_out_is_rejected(self):
+        first, second = self.post(2), self.post(2)
+        self.assertEqual(process_batch(), 2)
+        self.assertEqual(self.status(first)['status'], 'done')
+        data = self.status(second)
+        self.assertEqual(data['status'], 'rejected')
+        self.assertIn('Sin stock suficiente', str(data['errors']['items']))
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_invalid_payload_rejected_synchronously(self):
+        resp = self.post(0)
+        self.assertEqual(resp.status_code, 400)
+        self.assertFalse(OrderTicket.objects.exists())
+
+    def test_unexpected_error_is_retried(self):
+        resp = self.post(1)
+        with patch('shop.serializers.OrderSerializer.save', side_effect=RuntimeError), \
+                self.assertLogs('shop.order_queue', 'ERROR'):
+            process_batch()
+        self.assertEqual(self.status(resp)['status'], 'pending')
+        process_batch()
+        self.assertEqual(self.status(resp)['status'], 'done')
+        self.assertEqual(claim_batch(10), [])
+
+    def test_reclaimed_ticket_is_not_processed_twice(self):
+        resp = self.post(1)
+        (stale,) = claim_batch(10)
+        OrderTicket.objects.filter(pk=stale.pk).update(claimed_at=stale.claimed_at - CLAIM_TIMEOUT * 2)
+        (fresh,) = claim_batch(10)
+        with self.assertLogs('shop.order_queue', 'WARNING'):
+            process_ticket(stale)
+        self.assertFalse(Order.objects.exists())
+        process_ticket(fresh)
+        self.assertEqual(self.status(resp)['status'], 'done')
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 2)
+
+    def test_unknown_ticket(self):
+        self.assertEqual(self.client.get(reverse('order-ticket-detail', args=['nope'])).status_code, 404)
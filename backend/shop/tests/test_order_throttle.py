@@ -1,5 +1,6 @@
 from decimal import Decimal
 
+from django.core.cache import cache
 from django.urls import reverse
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase
@@ -9,6 +10,7 @@ from shop.models import Category, Product
 
 class OrderThrottleTest(APITestCase):
     def setUp(self):
+        cache.clear()
         self.category = Category.objects.create(name="Cat", slug="cat")
         self.product = Product.objects.create(
             category=self.category,
@@ -0,0 +1,76 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shop.models import CATALOG_GENERATION, Category, Product, get_generation, stock_window
+from shop.serializers import OrderSerializer
+
+
+class ProductResponseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('product-list')
+        self.category = Category.objects.create(name='Cat', slug='cat')
+        self.product = Product.objects.create(
+            category=self.category, name='Leche', price=Decimal('10.00'), stock=5
+        )
+
+    def test_list_served_from_cache(self):
+        first = self.client.get(self.url, {'page': 1})
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, {'page': 1, '_': 'cache-buster'})
+        self.assertEqual(first.data, second.data)
+
+    def test_retrieve_served_from_cache(self):
+        url = reverse('product-detail', args=[self.product.id])
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            resp = self.client.get(url)
+        self.assertEqual(resp.data['name'], 'Leche')
+
+    def test_product_save_invalidates(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = Decimal('12.00')
+            self.product.save()
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.data['results'][0]['price'], '12.00')
+
+    def test_category_delete_invalidates(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.data['count'], 0)
+
+    def test_order_keeps_catalog_cache(self):
+        window = stock_window()
+        with mock.patch('shop.views.stock_window', return_value=window):
+            first = self.client.get(self.url)
+            generation = get_generation(CATALOG_GENERATION)
+            serializer = OrderSerializer(data={
+                'name': 'Ana', 'phone': '1', 'address': 'Calle', 'payment_method': 'cash',
+                'items': [{'product_id': self.product.id, 'quantity': 1}],
+            })
+            serializer.is_valid(raise_exception=True)
+            with self.captureOnCommitCallbacks(execute=True):
+                serializer.save()
+            self.assertEqual(get_generation(CATALOG_GENERATION), generation)
+            with self.assertNumQueries(0):
+                second = self.client.get(self.url)
+            self.assertEqual(second.data, first.data)
+        # El stock publicado se actualiza al cambiar de ventana
+        with mock.patch('shop.views.stock_window', return_value=window + 1):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.data['results'][0]['stock'], 4)
+
+    def test_missing_product_not_cached(self):
+        url = reverse('product-detail', args=[9999])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 404)
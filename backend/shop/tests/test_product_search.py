@@ -0,0 +1,52 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shop.models import Category, Product
+
+
+class ProductSearchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('product-list')
+        category = Category.objects.create(name='Cat', slug='cat')
+        self.described = Product.objects.create(
+            category=category, name='Postre', description='Con leche entera', price=Decimal('5.00')
+        )
+        self.named = Product.objects.create(
+            category=category, name='Leche Entera', description='Sachet 1L', price=Decimal('9.00')
+        )
+        Product.objects.create(category=category, name='Café Molido', price=Decimal('20.00'))
+
+    def names(self, **params):
+        resp = self.client.get(self.url, params)
+        self.assertEqual(resp.status_code, 200)
+        return [p['name'] for p in resp.data['results']]
+
+    def test_name_match_ranks_first(self):
+        self.assertEqual(self.names(search='leche'), ['Leche Entera', 'Postre'])
+
+    def test_accent_and_prefix_insensitive(self):
+        self.assertEqual(self.names(search='CAFE mol'), ['Café Molido'])
+
+    def test_all_tokens_must_match(self):
+        self.assertEqual(self.names(search='leche sachet'), ['Leche Entera'])
+
+    def test_explicit_ordering_overrides_relevance(self):
+        self.assertEqual(self.names(search='leche', ordering='price'), ['Postre', 'Leche Entera'])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.named.name = 'Yogur'
+        self.named.description = ''
+        self.named.save()
+        self.described.delete()
+        cache.clear()
+        self.assertEqual(self.names(search='leche'), [])
+        self.assertEqual(self.names(search='yogur'), ['Yogur'])
+
+    def test_relevance_ordering_without_search(self):
+        self.assertEqual(len(self.names(ordering='-relevance')), 3)
@@ -0,0 +1,87 @@
+import time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shop.models import Category, Product
+from shop.serializers import OrderSerializer
+from shop.suggest import SuggestIndex, fold, get_index
+
+
+class ProductSuggestTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('product-suggest')
+        self.lacteos = Category.objects.create(name='Lácteos', slug='lacteos')
+        Category.objects.create(name='Limpieza', slug='limpieza')
+        self.leche = Product.objects.create(
+            category=self.lacteos, name='Leche Entera', price=Decimal('10.00'), offer_price=Decimal('9.50')
+        )
+        Product.objects.create(category=self.lacteos, name='Dulce de leche', price=Decimal('20.00'))
+        Product.objects.create(category=self.lacteos, name='Jamón cocido', price=Decimal('30.00'))
+        Product.objects.create(category=self.lacteos, name='Lechuga', price=Decimal('5.00'), is_active=False)
+
+    def names(self, resp, kind='products'):
+        return [row['name'] for row in resp.data[kind]]
+
+    def test_prefix_and_word_matches(self):
+        resp = self.client.get(self.url, {'q': 'lec'})
+        self.assertEqual(resp.status_code, 200)
+        # Coincidencia al inicio del nombre antes que en una palabra interna
+        self.assertEqual(self.names(resp), ['Leche Entera', 'Dulce de leche'])
+        self.assertEqual(resp.data['products'][0]['offer_price'], '9.50')
+        self.assertEqual(self.names(self.client.get(self.url, {'q': 'leche ent'})), ['Leche Entera'])
+
+    def test_accent_folding(self):
+        self.assertEqual(fold('  Jamón  Cocido! '), 'jamon cocido')
+        self.assertEqual(self.names(self.client.get(self.url, {'q': 'JAMO'})), ['Jamón cocido'])
+        resp = self.client.get(self.url, {'q': 'lacteo'})
+        self.assertEqual(self.names(resp, 'categories'), ['Lácteos'])
+
+    def test_no_queries_on_hot_path(self):
+        self.client.get(self.url, {'q': 'le'})
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.url, {'q': 'dul', 'limit': '1'})
+        self.assertEqual(self.names(resp), ['Dulce de leche'])
+        self.assertEqual(self.client.get(self.url, {'q': ''}).data, {'categories': [], 'products': []})
+
+    def test_rebuilt_on_catalog_change(self):
+        self.assertEqual(self.names(self.client.get(self.url, {'q': 'yog'})), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(category=self.lacteos, name='Yogur', price=Decimal('4.00'))
+        self.assertEqual(self.names(self.client.get(self.url, {'q': 'yog'})), ['Yogur'])
+
+    def test_order_and_stock_edits_do_not_rebuild(self):
+        self.leche.stock = 10
+        self.leche.save()
+        self.client.get(self.url, {'q': 'le'})
+        serializer = OrderSerializer(data={
+            'name': 'Ana', 'phone': '1', 'address': 'Calle', 'payment_method': 'cash',
+            'items': [{'product_id': self.leche.id, 'quantity': 1}],
+        })
+        serializer.is_valid(raise_exception=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            serializer.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            leche = Product.objects.get(pk=self.leche.pk)
+            leche.stock = 50
+            leche.save()
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {'q': 'le'})
+        with self.captureOnCommitCallbacks(execute=True):
+            leche.name = 'Leche Descremada'
+            leche.save()
+        self.assertEqual(self.names(self.client.get(self.url, {'q': 'desc'})), ['Leche Descremada'])
+
+    def test_lookup_is_fast(self):
+        products = [{'id': i, 'name': f'Producto {i} marca{i % 50}'} for i in range(5000)]
+        index = SuggestIndex([], products)
+        start = time.perf_counter()
+        for _ in range(100):
+            index.lookup('marca1', 8)
+        self.assertLess((time.perf_counter() - start) / 100, 0.005)
+        self.assertIs(get_index(), get_index())
@@ -0,0 +1,60 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import cloudinary
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from shop.models import Category, Product
+from shop.serializers import ProductSerializer, ProductValuesSerializer
+
+
+def fake_url(storage, name):
+    return f'/media/{name}'
+
+
+@patch.object(cloudinary.config(), 'cloud_name', 'demo')
+@patch('cloudinary_storage.storage.MediaCloudinaryStorage.url', autospec=True, side_effect=fake_url)
+class ProductValuesSerializerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        with_image = Category.objects.create(name='Lácteos', slug='lacteos', image='categories/l.jpg')
+        plain = Category.objects.create(name='Almacén', slug='almacen')
+        Product.objects.create(
+            category=with_image, name='Leche "entera"', description='Ñandú\nsachet',
+            price=Decimal('1234.5'), offer_price=Decimal('999.99'), image='products/leche.jpg',
+            stock=7, promoted=True, promoted_until=timezone.now() + timedelta(days=2),
+        )
+        Product.objects.create(category=plain, name='Arroz', price=Decimal('3'), is_active=True)
+
+    def render_both(self, request=None):
+        context = {'request': request}
+        queryset = Product.objects.select_related('category').order_by('id')
+        slow = ProductSerializer(queryset, many=True, context=context).data
+        rows = queryset.values(*ProductValuesSerializer.value_fields)
+        fast = ProductValuesSerializer(rows, context=context).data
+        return JSONRenderer().render(slow), JSONRenderer().render(fast)
+
+    def test_byte_identical_without_request(self, _url):
+        slow, fast = self.render_both()
+        self.assertEqual(slow, fast)
+
+    @override_settings(ALLOWED_HOSTS=['tienda.example'])
+    def test_byte_identical_with_request(self, _url):
+        request = Request(RequestFactory().get('/api/products/', HTTP_HOST='tienda.example'))
+        slow, fast = self.render_both(request)
+        self.assertIn(b'http://tienda.example/media/products/leche.jpg', fast)
+        self.assertEqual(slow, fast)
+
+    def test_list_endpoint_uses_same_representation(self, _url):
+        resp = APIClient().get(reverse('product-list'), {'ordering': 'name'})
+        detail = APIClient().get(reverse('product-detail', args=[resp.data['results'][1]['id']]))
+        self.assertEqual(
+            JSONRenderer().render(resp.data['results'][1]), JSONRenderer().render(detail.data)
+        )
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from shop.models import (
+    Category, Coupon, CouponDailySales, DailySales, Order, Product, ProductDailySales,
+)
+from shop.serializers import OrderSerializer
+
+
+class SalesRollupTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.dairy = Category.objects.create(name='Lácteos', slug='lacteos')
+        self.bakery = Category.objects.create(name='Panadería', slug='panaderia')
+        self.milk = Product.objects.create(category=self.dairy, name='Leche', price=Decimal('10.00'), stock=100)
+        self.bread = Product.objects.create(category=self.bakery, name='Pan', price=Decimal('4.00'), stock=100)
+        Coupon.objects.create(code='OFF5', type=Coupon.TYPE_FIXED, amount=Decimal('5.00'))
+
+    def order(self, **extra):
+        serializer = OrderSerializer(data={
+            'name': 'Ana', 'phone': '1', 'address': 'Calle', 'payment_method': 'cash',
+            'delivery_method': 'pickup',
+            'items': [{'product_id': self.milk.id, 'quantity': 2}, {'product_id': self.bread.id, 'quantity': 1}],
+            **extra,
+        })
+        serializer.is_valid(raise_exception=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            return serializer.save()
+
+    def snapshot(self):
+        return (
+            list(DailySales.objects.values_list('day', 'orders', 'revenue', 'discount_total', 'shipping_total')),
+            list(ProductDailySales.objects.order_by('product__name')
+                 .values_list('day', 'product__name', 'category__slug', 'units', 'revenue')),
+            list(CouponDailySales.objects.values_list('day', 'code', 'orders', 'discount_total')),
+        )
+
+    def test_orders_update_rollups_on_commit(self):
+        self.order()
+        self.order(coupon_code='off5')
+        today = timezone.localdate()
+        daily, products, coupons = self.snapshot()
+        self.assertEqual(daily, [(today, 2, Decimal('43.00'), Decimal('5.00'), Decimal('0.00'))])
+        self.assertEqual(products, [
+            (today, 'Leche', 'lacteos', 4, Decimal('40.00')),
+            (today, 'Pan', 'panaderia', 2, Decimal('8.00')),
+        ])
+        self.assertEqual(coupons, [(today, 'OFF5', 1, Decimal('5.00'))])
+
+    def test_rolled_back_order_not_counted(self):
+        serializer = OrderSerializer(data={
+            'name': 'Ana', 'phone': '1', 'address': 'Calle', 'payment_method': 'cash',
+            'items': [{'product_id': self.milk.id, 'quantity': 500}],
+        })
+        serializer.is_valid(raise_exception=True)
+        with self.captureOnCommitCallbacks(execute=True), self.assertRaises(Exception):
+            serializer.save()
+        self.assertFalse(DailySales.objects.exists())
+
+    def test_deleted_order_is_subtracted(self):
+        self.order()
+        coupon_order = self.order(coupon_code='OFF5')
+        with self.captureOnCommitCallbacks(execute=True):
+            coupon_order.delete()
+        today = timezone.localdate()
+        daily, products, coupons = self.snapshot()
+        self.assertEqual(daily, [(today, 1, Decimal('24.00'), Decimal('0.00'), Decimal('0.00'))])
+        self.assertEqual([row[3] for row in products], [2, 1])
+        self.assertEqual(coupons, [(today, 'OFF5', 0, Decimal('0.00'))])
+
+    def test_rebuild_matches_incremental(self):
+        self.order()
+        old = self.order(coupon_code='OFF5')
+        Order.objects.filter(pk=old.pk).update(created_at=old.created_at - timedelta(days=3))
+        self.order(coupon_code='OFF5')
+        ProductDailySales.objects.all().delete()
+        DailySales.objects.update(orders=0)
+
+        out = StringIO()
+        call_command('rebuild_rollups', '--chunk-size', '2', stdout=out)
+        self.assertIn('Rollups rebuilt from 3 orders', out.getvalue())
+        daily, products, coupons = self.snapshot()
+        self.assertEqual([row[1] for row in daily], [2, 1])
+        self.assertEqual(sum(row[2] for row in daily), Decimal('62.00'))
+        self.assertEqual(sum(row[3] for row in products if row[1] == 'Leche'), 6)
+        self.assertEqual([row[2] for row in coupons], [1, 1])
@@ -0,0 +1,79 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from shop.models import Announcement, Category, Product
+from shop.schedule import seconds_until
+
+
+class ScheduleCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.now = timezone.now()
+        self.category = Category.objects.create(name='Cat', slug='cat')
+
+    def at(self, seconds):
+        return patch('django.utils.timezone.now', return_value=self.now + timedelta(seconds=seconds))
+
+    def test_seconds_until(self):
+        self.assertEqual(seconds_until(None), 60 * 60)
+        self.assertEqual(seconds_until(self.now + timedelta(seconds=9.2), self.now), 10)
+        self.assertEqual(seconds_until(self.now - timedelta(seconds=5), self.now), 1)
+
+    def test_announcements_cached_between_boundaries(self):
+        url = reverse('announcement-list')
+        Announcement.objects.create(title='Ya', end_at=self.now + timedelta(seconds=10))
+        Announcement.objects.create(title='Luego', start_at=self.now + timedelta(seconds=20))
+        with self.at(0):
+            self.assertEqual([a['title'] for a in self.client.get(url).data], ['Ya'])
+            with self.assertNumQueries(0):
+                self.assertEqual(len(self.client.get(url).data), 1)
+        # end_at es exclusivo: en el límite exacto ya no se muestra
+        with self.at(10):
+            self.assertEqual(self.client.get(url).data, [])
+        with self.at(15), self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data, [])
+        with self.at(20):
+            self.assertEqual([a['title'] for a in self.client.get(url).data], ['Luego'])
+
+    def test_announcement_save_invalidates(self):
+        url = reverse('announcement-list')
+        self.assertEqual(self.client.get(url).data, [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Announcement.objects.create(title='Nuevo')
+        self.assertEqual(len(self.client.get(url).data), 1)
+
+    def test_promoted_filter_respects_promoted_until(self):
+        url = reverse('product-list')
+        Product.objects.create(category=self.category, name='Sin fin', price=Decimal('1'), promoted=True)
+        Product.objects.create(
+            category=self.category, name='Vence', price=Decimal('1'), promoted=True,
+            promoted_until=self.now + timedelta(seconds=30),
+        )
+        Product.objects.create(
+            category=self.category, name='Vencida', price=Decimal('1'), promoted=True,
+            promoted_until=self.now - timedelta(seconds=1),
+        )
+        Product.objects.create(category=self.category, name='Normal', price=Decimal('1'))
+
+        def names(**params):
+            return sorted(p['name'] for p in self.client.get(url, params).data['results'])
+
+        with self.at(0):
+            self.assertEqual(names(promoted='true'), ['Sin fin', 'Vence'])
+            self.assertEqual(names(promoted='false'), ['Normal', 'Vencida'])
+            etag = self.client.get(url, {'promoted': 'true'})['ETag']
+            with self.assertNumQueries(0):
+                self.assertEqual(names(promoted='true'), ['Sin fin', 'Vence'])
+        # Al vencer la promoción cambian la clave de caché y la ETag
+        with self.at(30):
+            resp = self.client.get(url, {'promoted': 'true'}, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(names(promoted='true'), ['Sin fin'])
@@ -0,0 +1,62 @@
+import threading
+
+from django.core.cache import cache, caches
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+
+from shop.throttling import SlidingWindowThrottle
+
+
+class View:
+    throttle_scope = 'coupon_validate'  # 5/min
+
+
+class SlidingWindowThrottleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = APIRequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+        self.request.user = None
+
+    def allow(self, at):
+        throttle = SlidingWindowThrottle()
+        throttle.timer = lambda: at
+        return throttle.allow_request(self.request, View()), throttle
+
+    def test_previous_window_is_interpolated(self):
+        start = 60 * 1000
+        self.assertEqual([self.allow(start + 50)[0] for _ in range(6)], [True] * 5 + [False])
+        # A mitad de la ventana siguiente la anterior pesa 5 * 0.5 = 2.5
+        results = [self.allow(start + 90)[0] for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+        allowed, throttle = self.allow(start + 90)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(throttle.wait(), 0.6 * 60 - 30)
+        self.assertTrue(self.allow(start + 60 + 36)[0])
+
+    def test_counters_are_plain_integers(self):
+        self.allow(60 * 1000 + 1)
+        self.allow(60 * 1000 + 2)
+        key = SlidingWindowThrottle().cache_format % {'scope': 'coupon_validate', 'ident': '10.0.0.1'}
+        self.assertEqual(caches['shared'].get(f'{key}:1000'), 2)
+
+    def test_limit_exact_under_concurrency(self):
+        results = []
+
+        def client():
+            for _ in range(5):
+                results.append(self.allow(60 * 2000 + 10)[0])
+
+        threads = [threading.Thread(target=client) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 5)
+
+    def test_view_returns_retry_after(self):
+        client = APIClient()
+        url = reverse('coupon-validate')
+        statuses = [client.post(url, {'code': 'X'}, format='json').status_code for _ in range(6)]
+        self.assertEqual(statuses, [200] * 5 + [429])
+        self.assertIn('Retry-After', client.post(url, {'code': 'X'}, format='json'))
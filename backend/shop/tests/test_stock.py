@@ -2,7 +2,7 @@ import threading
 from unittest import skipIf
 
 from django.db import close_old_connections, connection
-from django.test import TransactionTestCase
+from django.test import TransactionTestCase, override_settings
 from rest_framework import serializers
 
 from shop.models import Category, Product
@@ -52,3 +52,8 @@ class StockConcurrencyTest(TransactionTestCase):
         self.assertEqual(self.product.stock, 2)
         self.assertEqual(results.count("ok"), 1)
         self.assertEqual(results.count("fail"), 1)
+
+
+@override_settings(ORDER_STOCK_STRATEGY="conditional")
+class ConditionalStockConcurrencyTest(StockConcurrencyTest):
+    pass
@@ -0,0 +1,136 @@
+import shutil
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.core.signals import request_started
+from django.test import SimpleTestCase, override_settings
+
+from shop.cache_backends import SharedFileCache
+
+CACHE_DIR = tempfile.mkdtemp()
+
+
+def worker(name, **options):
+    return {
+        'BACKEND': 'shop.cache_backends.TwoTierCache',
+        'LOCATION': name,
+        'OPTIONS': {'SHARED': 'shared', 'EPOCH_INTERVAL': 3600, 'BYPASS_PREFIXES': ['throttle_'], **options},
+    }
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'shop.cache_backends.SharedFileCache', 'LOCATION': CACHE_DIR},
+    # Dos "workers" con L1 propio sobre la misma caché compartida
+    'a': worker('worker-a'),
+    'b': worker('worker-b', MAX_ENTRIES=2),
+})
+class TwoTierCacheTest(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.a, self.b, self.shared = caches['a'], caches['b'], caches['shared']
+        self.a.clear()
+        self.b.clear()
+        self.next_request()
+
+    def next_request(self):
+        request_started.send(sender=None)
+
+    def test_hits_served_from_local_tier(self):
+        self.a.set('config', {'shipping_cost': '5.00'})
+        self.shared.delete('config')  # sin aviso: el L1 sigue respondiendo
+        self.assertEqual(self.a.get('config'), {'shipping_cost': '5.00'})
+        self.assertIsNone(self.b.get('config'))
+
+    def test_aget_served_from_local_tier(self):
+        self.a.set('config', 'local')
+        self.shared.set('config', 'shared')
+        self.assertEqual(async_to_sync(self.a.aget)('config'), 'local')
+        self.assertEqual(async_to_sync(self.b.aget)('config'), 'shared')
+        self.assertIsNone(async_to_sync(self.b.aget)('missing'))
+
+    def test_local_values_are_copies(self):
+        self.a.set('data', {'items': [1]})
+        self.a.get('data')['items'].append(2)
+        self.assertEqual(self.a.get('data'), {'items': [1]})
+
+    def test_delete_reaches_other_workers_on_next_request(self):
+        self.a.set('site_config', 'old')
+        self.assertEqual(self.b.get('site_config'), 'old')
+        self.a.delete('site_config')
+        # Dentro del mismo request el epoch no se vuelve a consultar
+        self.assertEqual(self.b.get('site_config'), 'old')
+        self.next_request()
+        self.assertIsNone(self.b.get('site_config'))
+
+    def test_generation_bump_reaches_other_workers(self):
+        self.a.add('generation:catalog', 10, None)
+        self.assertEqual(self.b.get('generation:catalog'), 10)
+        self.assertEqual(self.a.incr('generation:catalog'), 11)
+        self.assertEqual(self.a.get('generation:catalog'), 11)
+        self.next_request()
+        self.assertEqual(self.b.get('generation:catalog'), 11)
+
+    def test_own_writes_keep_local_tier(self):
+        self.a.set('kept', 1)
+        self.a.delete('other')
+        self.shared.delete('kept')
+        self.assertEqual(self.a.get('kept'), 1)
+
+    def test_local_copy_expires_with_shared_entry(self):
+        self.a.set('boundary', 'value', 30)
+        self.assertEqual(self.b.get('boundary'), 'value')
+        with patch('shop.cache_backends.time.time', return_value=time.time() + 31):
+            self.assertIsNone(self.b.get('boundary'))
+
+    def test_local_tier_is_bounded(self):
+        self.b.set_many({'k1': 1, 'k2': 2, 'k3': 3})
+        self.assertEqual(len(self.b.store.data), 2)
+        self.assertEqual(self.b.get_many(['k1', 'k2', 'k3']), {'k1': 1, 'k2': 2, 'k3': 3})
+
+    def test_bypassed_keys_only_in_shared_tier(self):
+        self.a.set('throttle_orders_1', [1.0])
+        self.assertEqual(self.shared.get('throttle_orders_1'), [1.0])
+        self.assertFalse(any('throttle' in key for key in self.a.store.data))
+        epoch = self.shared.get(self.a.epoch_key)
+        self.a.delete('throttle_orders_1')
+        self.assertEqual(self.shared.get(self.a.epoch_key), epoch)
+
+
+class SharedFileCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.cache = SharedFileCache(self.dir, {})
+
+    def test_incr_is_atomic_across_threads(self):
+        self.cache.add('counter', 0, None)
+
+        def bump():
+            # Instancia propia por hilo, como procesos distintos sobre el mismo directorio
+            cache = SharedFileCache(self.dir, {})
+            for _ in range(50):
+                cache.incr('counter')
+
+        threads = [threading.Thread(target=bump) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get('counter'), 300)
+
+    def test_incr_keeps_expiry(self):
+        self.cache.set('hits', 1, 30)
+        self.cache.incr('hits')
+        with patch('time.time', return_value=time.time() + 31):
+            self.assertIsNone(self.cache.get('hits'))
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
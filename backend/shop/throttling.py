@@ -0,0 +1,72 @@
+"""Sliding-window rate limiting on the cache shared by every worker.
+
+DRF's ``ScopedRateThrottle`` keeps a list of timestamps per client in the
+default cache and rewrites it on each request. ``SlidingWindowThrottle``
+keeps two integer counters per client instead: the current fixed window
+and the previous one. The request rate is estimated as
+``previous * (1 - elapsed / duration) + current``, and every request costs
+a read and an atomic ``incr``, whatever the rate. The counter is
+incremented before checking the limit, so concurrent requests on different
+workers can never be admitted beyond it.
+"""
+from django.core.cache import caches
+from rest_framework.throttling import ScopedRateThrottle
+
+
+class SlidingWindowThrottle(ScopedRateThrottle):
+    """Drop-in replacement for ``ScopedRateThrottle`` (same ``throttle_scope`` and rates)."""
+    cache_alias = 'shared'
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.elapsed = self.now - window * self.duration
+        current_key = f'{self.key}:{window}'
+        self.previous = self.cache.get(f'{self.key}:{window - 1}', 0)
+        self.current = self.increment(current_key)
+        if self.estimate(self.current) > self.num_requests:
+            # Los rechazos no cuentan: solo ocupan la ventana los admitidos
+            self.cache.decr(current_key)
+            self.current -= 1
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def increment(self, key):
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # La ventana dura dos períodos: uno como actual y otro como anterior
+            self.cache.add(key, 0, self.duration * 2)
+            return self.cache.incr(key)
+
+    def estimate(self, current):
+        return self.previous * (1 - self.elapsed / self.duration) + current
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        """Seconds until one more request fits in the window."""
+        limit = self.num_requests - 1
+        if self.current <= limit:
+            # Alcanza con que pese menos la ventana anterior
+            weight = (limit - self.current) / self.previous if self.previous else 1
+            return max(0.0, self.duration * (1 - weight) - self.elapsed)
+        # La ventana actual ya está llena: esperar a que pase a ser la anterior
+        weight = limit / self.current
+        return self.duration - self.elapsed + self.duration * (1 - weight)
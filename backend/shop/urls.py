@@ -1,15 +1,46 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, ProductViewSet, SiteConfigViewSet, OrderViewSet, CouponValidateView, AnnouncementViewSet
+from .views import (
+    CategoryViewSet,
+    ProductViewSet,
+    SiteConfigViewSet,
+    OrderViewSet,
+    OrderTicketViewSet,
+    CouponValidateView,
+    CartQuoteView,
+    AnnouncementViewSet,
+    BootstrapViewSet,
+    CatalogSnapshotView,
+    MetricsView,
+)
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'products', ProductViewSet, basename='product')
 router.register(r'config', SiteConfigViewSet, basename='config')
 router.register(r'orders', OrderViewSet, basename='order')
+router.register(r'order-tickets', OrderTicketViewSet, basename='order-ticket')
 router.register(r'announcements', AnnouncementViewSet, basename='announcement')
+router.register(r'bootstrap', BootstrapViewSet, basename='bootstrap')
+
+# Lecturas async en las mismas URLs, antes que las del router (ver settings.ASYNC_READS)
+async_urlpatterns = [
+    # Mismos nombres que las rutas del router (etiquetas de /api/metrics/)
+    path('products/', async_views.products, name='product-list'),
+    path('products/<int:pk>/', async_views.products, name='product-detail'),
+    path('categories/', async_views.categories, name='category-list'),
+    path('config/', async_views.config, name='config-list'),
+    path('announcements/', async_views.announcements, name='announcement-list'),
+]
 
 urlpatterns = [
+    *(async_urlpatterns if settings.ASYNC_READS else []),
     path('', include(router.urls)),
     path('coupons/validate/', CouponValidateView.as_view(), name='coupon-validate'),
+    path('cart/quote/', CartQuoteView.as_view(), name='cart-quote'),
+    path('catalog/snapshot/', CatalogSnapshotView.as_view(), name='catalog-snapshot'),
+    path('catalog/snapshot/<str:digest>/', CatalogSnapshotView.as_view(), name='catalog-snapshot-blob'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
@@ -1,92 +1,347 @@
 from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, BasePermission, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from rest_framework.pagination import PageNumberPagination
 from django.db import models
 from django.utils import timezone
-from rest_framework.throttling import ScopedRateThrottle
+from django.conf import settings
 from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.urls import get_script_prefix, reverse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date, quote_etag, urlencode
+import hashlib
+import io
 
 from .models import (
     Category,
     Product,
-    SiteConfig,
     Order,
-    Coupon,
+    OrderTicket,
     Announcement,
-    SITE_CONFIG_CACHE_KEY,
-    SITE_CONFIG_CACHE_TIMEOUT,
+    CATALOG_GENERATION,
+    ANNOUNCEMENT_GENERATION,
+    COUPON_GENERATION,
+    get_generation,
+    stock_window,
 )
+from . import idempotency, metrics, order_queue
+from .coupons import get_valid_rule
+from .filters import ProductFilterSet, ProductSearchFilter, ProductOrderingFilter
+from .pagination import ProductPagination, ProductKeysetPagination
+from .pricing import quote_carts
+from .schedule import boundary_version, cache_until, next_boundary
+from .snapshot import get_snapshot
+from .suggest import suggest as suggest_names
+from .throttling import SlidingWindowThrottle
 from .serializers import (
     CategorySerializer,
+    CategoryFacetSerializer,
     ProductSerializer,
-    SiteConfigSerializer,
+    ProductValuesSerializer,
     OrderSerializer,
+    CartQuoteSerializer,
+    QuoteSerializer,
     AnnouncementSerializer,
+    get_category_facets,
+    get_site_config_data,
 )
 
 
-class CategoryViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+class NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """Strong ETag / Last-Modified validators from a cheap per-resource version.
+
+    The check runs in ``initial()``, so a matching ``If-None-Match`` (or
+    ``If-Modified-Since``) is answered with 304 before the handler builds any
+    queryset or serializer. ``get_etag_version`` must not hit the database.
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def get_etag_version(self, request):
+        return None
+
+    def get_last_modified(self, request):
+        return None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._etag = self._last_modified = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+        if getattr(self, 'action', None) not in self.conditional_actions:
+            return
+        version = self.get_etag_version(request)
+        if version is None:
+            return
+        self._etag = quote_etag(f'{version}-{request.accepted_renderer.format}')
+        self._last_modified = self.get_last_modified(request)
+        response = get_conditional_response(
+            request._request, etag=self._etag, last_modified=self._last_modified
+        )
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, '_etag', None) and response.status_code in (200, 304):
+            response['ETag'] = self._etag
+            if self._last_modified is not None:
+                response['Last-Modified'] = http_date(self._last_modified)
+        return response
+
+
+class CategoryViewSet(ConditionalGetMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
 
+    def get_etag_version(self, request):
+        return f'categories-{get_generation(CATALOG_GENERATION)}'
+
+    def with_counts(self):
+        return self.request.query_params.get('with_counts') in ('1', 'true')
 
-class ProductPagination(PageNumberPagination):
-    page_size = 20
-    page_size_query_param = 'page_size'
+    def get_serializer_class(self):
+        # ?with_counts=1 agrega cantidad de productos y rango de precios por categoría
+        if self.request is not None and self.with_counts():
+            return CategoryFacetSerializer
+        return super().get_serializer_class()
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request is not None and self.with_counts():
+            context['facets'] = get_category_facets()
+        return context
 
-class ProductViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
-    queryset = Product.objects.filter(is_active=True).annotate(
-        has_offer=models.Case(
-            models.When(offer_price__isnull=False, then=models.Value(0)),
-            default=models.Value(1),
-            output_field=models.IntegerField(),
+
+class CatalogCacheMixin:
+    """Cache list/retrieve payloads keyed by query params and catalog generation.
+
+    Only the params in ``cache_params`` take part in the key, so unrelated
+    params (cache busters, tracking) do not fragment the cache.
+    """
+    cache_params = ()
+    cache_timeout = 60 * 10
+    cache_generation = CATALOG_GENERATION
+
+    def get_cache_key(self, request):
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, '')
+        digest = self.cache_digest(request, self.basename, self.action, lookup, request.accepted_renderer.format)
+        return f'{self.basename}:{self.get_cache_version(request)}:{digest}'
+
+    @classmethod
+    def cache_digest(cls, request, basename, action, lookup, renderer_format):
+        """Digest of everything but the version; also used by ``shop.async_views``."""
+        params = sorted(
+            (name, value)
+            for name in cls.cache_params
+            for value in request.GET.getlist(name)
         )
-    ).select_related('category')
+        raw = '|'.join([
+            basename,
+            action,
+            str(lookup),
+            # Las URLs absolutas (imágenes, next/previous) dependen del host
+            request.scheme,
+            request.get_host(),
+            renderer_format,
+            urlencode(params),
+        ])
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def get_cache_version(self, request):
+        return get_generation(self.cache_generation)
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(key, data, self.cache_timeout)
+        return Response(data)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+
+class ProductViewSet(ConditionalGetMixin, CatalogCacheMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    queryset = Product.objects.filter(is_active=True).select_related('category')
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['category', 'promoted']
-    search_fields = ['name', 'description']
-    ordering_fields = ['name', 'price', 'offer_price', 'created_at', 'has_offer']
-    ordering = ('has_offer', 'offer_price')
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, ProductOrderingFilter]
+    filterset_class = ProductFilterSet
+    ordering_fields = [
+        'name', 'price', 'offer_price', 'effective_price', 'created_at', 'has_offer', 'relevance',
+    ]
+    ordering = ('-has_offer', 'offer_price')
     pagination_class = ProductPagination
+    cache_params = (
+        'page', 'page_size', 'search', 'ordering', 'category', 'promoted', 'pagination', 'cursor',
+    )
 
+    @property
+    def paginator(self):
+        # ?pagination=cursor activa el modo keyset (sin COUNT, costo constante por página)
+        if not hasattr(self, '_paginator'):
+            if self.request is not None and self.request.query_params.get('pagination') == 'cursor':
+                self._paginator = ProductKeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_cache_version(self, request):
+        # El vencimiento de una promoción cambia ?promoted= sin tocar la generación;
+        # el stock, que cambia con cada pedido, se refresca por ventana
+        generation = get_generation(CATALOG_GENERATION)
+        boundary = next_boundary(*self.promotion_boundary(generation))
+        return f'{generation}-{boundary_version(boundary)}-{stock_window()}'
+
+    @staticmethod
+    def promotion_boundary(generation):
+        """``next_boundary`` arguments for the promotions of ``generation``."""
+        return (
+            f'products:promo_boundary:{generation}',
+            Product.objects.filter(is_active=True, promoted=True),
+            ['promoted_until'],
+        )
+
+    def get_etag_version(self, request):
+        return f'products-{self.get_cache_version(request)}'
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, self.list_from_values)
 
-class SiteConfigViewSet(viewsets.ViewSet):
+    def list_from_values(self, request, *args, **kwargs):
+        """``list()`` rendered from ``.values()`` rows via ``ProductValuesSerializer``."""
+        queryset = self.filter_queryset(self.get_queryset())
+        # Las columnas de orden hacen falta para armar el cursor keyset
+        ordering = [term.lstrip('-') for term in queryset.query.order_by if isinstance(term, str)]
+        rows = queryset.values(*dict.fromkeys([*ProductValuesSerializer.value_fields, *ordering]))
+        page = self.paginate_queryset(rows)
+        context = self.get_serializer_context()
+        if page is not None:
+            return self.get_paginated_response(ProductValuesSerializer(page, context=context).data)
+        return Response(ProductValuesSerializer(rows, context=context).data)
+
+    @action(detail=False, pagination_class=None, filter_backends=[])
+    def suggest(self, request):
+        """Typeahead: ``?q=`` prefix matches from the in-memory index (no DB query)."""
+        try:
+            limit = int(request.query_params.get('limit', 8))
+        except ValueError:
+            limit = 8
+        return Response(suggest_names(request.query_params.get('q', ''), limit, request))
+
+
+class SiteConfigViewSet(ConditionalGetMixin, viewsets.ViewSet):
     permission_classes = [AllowAny]
+
+    def get_etag_version(self, request):
+        return self.config_version(get_site_config_data())
+
+    def get_last_modified(self, request):
+        return self.config_last_modified(get_site_config_data())
+
+    @staticmethod
+    def config_version(data):
+        digest = hashlib.md5(str(data['updated_at']).encode('utf-8')).hexdigest()[:16]
+        return f'config-{digest}'
+
+    @staticmethod
+    def config_last_modified(data):
+        updated_at = data['updated_at']
+        return int(parse_datetime(updated_at).timestamp()) if updated_at else None
+
     def list(self, request):
-        data = cache.get(SITE_CONFIG_CACHE_KEY)
-        if data is None:
-            cfg = SiteConfig.objects.first()
-            if cfg:
-                data = SiteConfigSerializer(cfg).data
-            else:
-                data = {
-                    'whatsapp_phone': '',
-                    'alias_or_cbu': '',
-                    'shipping_cost': '0.00',
-                    'updated_at': None,
-                }
-            cache.set(SITE_CONFIG_CACHE_KEY, data, SITE_CONFIG_CACHE_TIMEOUT)
-        return Response(data)
+        return Response(get_site_config_data())
 
 
 class OrderViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingWindowThrottle]
     throttle_scope = 'orders'
 
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(idempotency.HEADER)
+        if not key:
+            return self.create_order(request, *args, **kwargs)
+        if len(key) > idempotency.MAX_KEY_LENGTH:
+            return Response({'detail': 'Idempotency-Key inválida'}, status=status.HTTP_400_BAD_REQUEST)
+
+        request_hash = idempotency.fingerprint(request.data)
+        record, created = idempotency.claim(key, request_hash)
+        if not created:
+            # Reintento: devolver la respuesta guardada sin tocar stock ni cupones
+            return idempotency.replay(record, request_hash)
+        try:
+            response = self.create_order(request, *args, **kwargs)
+        except Exception as exc:
+            try:
+                response = self.handle_exception(exc)
+            except Exception:
+                idempotency.release(record)
+                raise
+        idempotency.store(record, response)
+        return response
+
+    def create_order(self, request, *args, **kwargs):
+        if settings.ORDER_INTAKE_MODE != 'queue':
+            return super().create(request, *args, **kwargs)
+        # Modo cola: validar, encolar y responder 202; un worker crea el pedido
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ticket = order_queue.enqueue(serializer.initial_data)
+        return Response(
+            {
+                'ticket': str(ticket.pk),
+                'status': ticket.status,
+                'status_url': request.build_absolute_uri(reverse('order-ticket-detail', args=[ticket.pk])),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class OrderTicketViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Status of a queued order: ``pending``/``processing``, ``done`` or ``rejected``."""
+    queryset = OrderTicket.objects.all()
+    permission_classes = [AllowAny]
+
+    def retrieve(self, request, *args, **kwargs):
+        ticket = self.get_object()
+        data = {'ticket': str(ticket.pk), 'status': ticket.status}
+        if ticket.status == OrderTicket.STATUS_DONE:
+            data['order'] = ticket.result
+        elif ticket.status == OrderTicket.STATUS_REJECTED:
+            data['errors'] = ticket.result
+        return Response(data)
+
 
 class CouponValidateView(APIView):
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingWindowThrottle]
     throttle_scope = 'coupon_validate'
     permission_classes = [AllowAny]
 
@@ -94,23 +349,10 @@ class CouponValidateView(APIView):
         code = request.data.get('code', '').strip()[:40]
         if not code:
             return Response({'detail': 'Código requerido'}, status=status.HTTP_400_BAD_REQUEST)
-        now = timezone.now()
-        c = (
-            Coupon.objects.filter(code__iexact=code, active=True)
-            .filter(
-                models.Q(expires_at__isnull=True) | models.Q(expires_at__gt=now),
-                models.Q(usage_limit__isnull=True) | models.Q(used_count__lt=models.F('usage_limit')),
-            )
-            .first()
-        )
+        # Reglas desde el índice en memoria; solo el límite de usos va a la base
+        c = get_valid_rule(code)
         if not c:
             return Response({'valid': False}, status=status.HTTP_200_OK)
-        now = timezone.now()
-        if (
-            (c.expires_at and c.expires_at < now)
-            or (c.usage_limit is not None and c.used_count >= c.usage_limit)
-        ):
-            return Response({'valid': False}, status=status.HTTP_200_OK)
 
         data = {
             'valid': True,
@@ -123,16 +365,224 @@ class CouponValidateView(APIView):
         return Response(data)
 
 
-class AnnouncementViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class CartQuoteView(APIView):
+    """Price a cart (or ``{"carts": [...]}``, up to ``max_carts``) without placing an order.
+
+    Quotes are cached per cart within the catalog and coupon generations and
+    the stock window, so stock warnings lag orders by at most
+    ``STOCK_CACHE_WINDOW`` seconds (checkout checks stock again).
+    """
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = 'cart_quote'
+    permission_classes = [AllowAny]
+    max_carts = 50
+    cache_timeout = 60
+
+    def post(self, request):
+        many = isinstance(request.data, dict) and 'carts' in request.data
+        payload = request.data['carts'] if many else request.data
+        if many and (not isinstance(payload, list) or len(payload) > self.max_carts):
+            return Response(
+                {'carts': f'Se esperaba una lista de hasta {self.max_carts} carritos'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = CartQuoteSerializer(data=payload, many=many)
+        serializer.is_valid(raise_exception=True)
+        carts = serializer.validated_data if many else [serializer.validated_data]
+
+        config = get_site_config_data()
+        version = '-'.join([
+            str(get_generation(CATALOG_GENERATION)),
+            str(get_generation(COUPON_GENERATION)),
+            str(stock_window()),
+            str(config['updated_at']),
+        ])
+        keys = [f'cart_quote:{version}:{self.cart_hash(cart)}' for cart in carts]
+        cached = cache.get_many(keys)
+        missing = [(key, cart) for key, cart in zip(keys, carts) if key not in cached]
+        if missing:
+            # Todos los carritos sin caché en una sola consulta de productos
+            quotes = quote_carts([cart for _, cart in missing], config['shipping_cost'])
+            fresh = {key: QuoteSerializer(quote).data for (key, _), quote in zip(missing, quotes)}
+            cache.set_many(fresh, self.cache_timeout)
+            cached.update(fresh)
+        data = [cached[key] for key in keys]
+        return Response({'quotes': data} if many else data[0])
+
+    @staticmethod
+    def cart_hash(cart):
+        raw = '|'.join([
+            ','.join(f'{pid}:{qty}' for pid, qty in sorted(cart['items'].items())),
+            cart['coupon_code'],
+            cart['delivery_method'],
+        ])
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+class AnnouncementViewSet(ConditionalGetMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     serializer_class = AnnouncementSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = []
 
     def get_queryset(self):
-        from django.utils import timezone
         now = timezone.now()
         qs = Announcement.objects.filter(active=True)
         # Ventana de tiempo opcional: si start/end están definidos, respetarlos
         qs = qs.filter(models.Q(start_at__isnull=True) | models.Q(start_at__lte=now))
-        qs = qs.filter(models.Q(end_at__isnull=True) | models.Q(end_at__gte=now))
+        qs = qs.filter(models.Q(end_at__isnull=True) | models.Q(end_at__gt=now))
         return qs
+
+    def get_schedule(self):
+        """``(generation, next start_at/end_at boundary)`` of the visible set."""
+        generation = get_generation(ANNOUNCEMENT_GENERATION)
+        return generation, next_boundary(*self.visibility_boundary(generation))
+
+    @staticmethod
+    def visibility_boundary(generation):
+        """``next_boundary`` arguments for the announcements of ``generation``."""
+        return (
+            f'announcements:boundary:{generation}',
+            Announcement.objects.filter(active=True),
+            ['start_at', 'end_at'],
+        )
+
+    def get_etag_version(self, request):
+        generation, boundary = self.get_schedule()
+        return f'announcements-{generation}-{boundary_version(boundary)}'
+
+    def list(self, request, *args, **kwargs):
+        # Entre dos límites el conjunto visible no cambia: se sirve desde caché
+        generation, boundary = self.get_schedule()
+        key = f'announcements:list:{generation}:{boundary_version(boundary)}'
+        handler = super().list
+        data = cache_until(key, boundary, lambda: handler(request, *args, **kwargs).data)
+        return Response(data)
+
+
+class BootstrapViewSet(ConditionalGetMixin, viewsets.ViewSet):
+    """Everything the storefront needs for first paint, in one response.
+
+    Each part is the response of the regular endpoint, dispatched in-process
+    with the same query params the SPA would send, so the per-endpoint caches
+    are shared. The whole payload is cached under a composite version of the
+    catalog, announcements and config, which is also the ETag.
+    """
+    permission_classes = [AllowAny]
+    cache_timeout = 60 * 10
+    parts = (
+        ('categories', CategoryViewSet, 'category', {'with_counts': '1'}),
+        ('announcements', AnnouncementViewSet, 'announcement', {}),
+        ('products', ProductViewSet, 'product', {'page': '1', 'page_size': '20'}),
+        ('promoted', ProductViewSet, 'product', {'page': '1', 'promoted': 'true'}),
+    )
+
+    def get_etag_version(self, request):
+        catalog = ProductViewSet().get_cache_version(request)
+        generation, boundary = AnnouncementViewSet().get_schedule()
+        config = SiteConfigViewSet().get_etag_version(request)
+        return f'bootstrap-{catalog}-{generation}-{boundary_version(boundary)}-{config}'
+
+    def list(self, request):
+        raw = '|'.join([self._etag, request.scheme, request.get_host()])
+        key = f'bootstrap:{hashlib.md5(raw.encode("utf-8")).hexdigest()}'
+        data = cache.get(key)
+        if data is None:
+            data = {'config': get_site_config_data()}
+            for name, viewset, basename, params in self.parts:
+                data[name] = self.dispatch_part(request, viewset, basename, params)
+            cache.set(key, data, self.cache_timeout)
+        return Response(data)
+
+    # Sin validadores condicionales (la parte siempre tiene que venir completa)
+    # ni credenciales: todas las partes son públicas
+    part_excluded_headers = (
+        'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_COOKIE', 'HTTP_AUTHORIZATION',
+    )
+
+    def dispatch_part(self, request, viewset, basename, params):
+        """Run ``viewset``'s list on a new GET request built from ``request``'s host and headers."""
+        environ = {
+            key: value for key, value in request.META.items()
+            if key.startswith('HTTP_') and key not in self.part_excluded_headers
+        }
+        prefix = get_script_prefix()
+        environ.update({
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': prefix.rstrip('/'),
+            'PATH_INFO': '/' + reverse(f'{basename}-list')[len(prefix):],
+            'QUERY_STRING': urlencode(params),
+            'SERVER_NAME': request.META.get('SERVER_NAME', 'localhost'),
+            'SERVER_PORT': str(request.META.get('SERVER_PORT', '80')),
+            'wsgi.url_scheme': request.scheme,
+            'wsgi.input': io.BytesIO(),
+        })
+        return viewset.as_view({'get': 'list'}, basename=basename)(WSGIRequest(environ)).data
+
+
+class CatalogSnapshotView(APIView):
+    """Serve the prebuilt catalog snapshot (see ``shop.snapshot``).
+
+    ``/catalog/snapshot/`` redirects to the content-addressed URL of the
+    current snapshot, which is immutable and cacheable for a year.
+    """
+    permission_classes = [AllowAny]
+    encodings = ('br', 'gzip')
+
+    def get(self, request, digest=None):
+        if digest is None:
+            response = redirect('catalog-snapshot-blob', digest=get_snapshot()['hash'])
+            response['Cache-Control'] = 'no-cache'
+            return response
+
+        blob = get_snapshot(digest)
+        if blob is None:
+            current = get_snapshot()
+            if current['hash'] != digest:
+                return redirect('catalog-snapshot-blob', digest=current['hash'])
+            blob = current
+
+        accepted = self.accepted_encodings(request)
+        encoding = next((e for e in self.encodings if e in accepted and e in blob), None)
+        response = HttpResponse(blob[encoding or 'identity'], content_type='application/json')
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Vary'] = 'Accept-Encoding'
+        response['ETag'] = quote_etag(digest)
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
+    @staticmethod
+    def accepted_encodings(request):
+        accepted = set()
+        for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+            name, *params = part.split(';')
+            quality = 1.0
+            for param in params:
+                key, _, value = param.strip().partition('=')
+                if key == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            if quality > 0:
+                accepted.add(name.strip().lower())
+        return accepted
+
+
+class IsStaffOrMetricsToken(BasePermission):
+    """Staff users, or ``Authorization: Bearer <METRICS_TOKEN>`` when the token is set."""
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        token = settings.METRICS_TOKEN
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        return bool(token) and constant_time_compare(header, f'Bearer {token}')
+
+
+class MetricsView(APIView):
+    """Per-endpoint metrics of every worker in Prometheus text format (see ``shop.metrics``)."""
+    permission_classes = [IsStaffOrMetricsToken]
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
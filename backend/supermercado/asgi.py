@@ -2,6 +2,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'supermercado.settings')
+# Bajo ASGI las lecturas del catálogo usan las vistas async (ver shop/async_views.py)
+os.environ.setdefault('DJANGO_ASYNC_READS', 'True')
 
 application = get_asgi_application()
 
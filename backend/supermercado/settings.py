@@ -1,6 +1,8 @@
 from pathlib import Path
 import os
+import tempfile
 import dj_database_url
+from corsheaders.defaults import default_headers
 from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -37,9 +39,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'shop.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'shop.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -67,24 +70,43 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'supermercado.wsgi.application'
+ASGI_APPLICATION = 'supermercado.asgi.application'
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
+# Conexiones persistentes: segundos que cada hilo reutiliza su conexión (0 = una por request)
+DB_CONN_MAX_AGE = int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', 600))
+DB_CONN_HEALTH_CHECKS = os.environ.get('DJANGO_DB_CONN_HEALTH_CHECKS', 'True').lower() in ('1', 'true', 'yes')
+# Pool de psycopg por proceso (solo PostgreSQL); reemplaza a las conexiones persistentes
+DB_POOL = os.environ.get('DJANGO_DB_POOL', 'False').lower() in ('1', 'true', 'yes')
+
 if DATABASE_URL:
     DATABASES = {
         "default": dj_database_url.config(
             default=DATABASE_URL,
 
-            conn_max_age=600,
+            conn_max_age=0 if DB_POOL else DB_CONN_MAX_AGE,
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
 
             ssl_require=not DEBUG,
         )
     }
+    if DB_POOL:
+        DATABASES["default"]["ENGINE"] = "shop.db_backends.postgresql_pool"
+        DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+            "min_size": int(os.environ.get('DJANGO_DB_POOL_MIN_SIZE', 2)),
+            "max_size": int(os.environ.get('DJANGO_DB_POOL_MAX_SIZE', 10)),
+            "max_lifetime": float(os.environ.get('DJANGO_DB_POOL_MAX_LIFETIME', 60 * 60)),
+            "max_idle": float(os.environ.get('DJANGO_DB_POOL_MAX_IDLE', 10 * 60)),
+            "timeout": float(os.environ.get('DJANGO_DB_POOL_TIMEOUT', 30)),
+        }
 else:
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
         }
     }
 
@@ -115,6 +137,35 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Caché en dos niveles (shop/cache_backends.py): LRU por proceso delante de una
+# caché compartida por todos los workers. Con DJANGO_REDIS_URL (requiere el
+# paquete redis) la compartida es Redis; si no, archivos en DJANGO_CACHE_DIR.
+if os.getenv('DJANGO_REDIS_URL'):
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('DJANGO_REDIS_URL'),
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'shop.cache_backends.SharedFileCache',
+        'LOCATION': os.getenv('DJANGO_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'supermercado-cache')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'shop.cache_backends.TwoTierCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'MAX_ENTRIES': int(os.getenv('DJANGO_LOCAL_CACHE_ENTRIES', 1000)),
+            # Los contadores de throttling cambian en cada request: solo en la compartida
+            'BYPASS_PREFIXES': ['throttle_'],
+        },
+    },
+    'shared': SHARED_CACHE,
+}
+
 # Asegurar UTF-8 en respuestas
 DEFAULT_CHARSET = 'utf-8'
 
@@ -132,9 +183,44 @@ REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {
         'coupon_validate': '5/min',
         'orders': '10/min',
+        'cart_quote': '60/min',
     },
 }
 
+# Regenerar el snapshot del catálogo en segundo plano al cambiar la generación
+CATALOG_SNAPSHOT_BACKGROUND = os.environ.get('DJANGO_CATALOG_SNAPSHOT_BACKGROUND', 'True').lower() in (
+    '1', 'true', 'yes'
+)
+# Segundos mínimos entre rebuilds del snapshot, en todo el cluster (ver shop/snapshot.py)
+CATALOG_SNAPSHOT_MIN_INTERVAL = float(os.environ.get('DJANGO_CATALOG_SNAPSHOT_MIN_INTERVAL', '30'))
+
+# Los pedidos no invalidan el catálogo: el stock publicado (listado de productos,
+# cotizaciones, snapshot) se refresca por ventanas de estos segundos
+STOCK_CACHE_WINDOW = int(os.environ.get('DJANGO_STOCK_CACHE_WINDOW', '30'))
+
+# Reserva de stock al crear pedidos: 'lock' (SELECT FOR UPDATE) o
+# 'conditional' (UPDATE con guarda stock >= cantidad, sin lock previo)
+ORDER_STOCK_STRATEGY = os.environ.get('DJANGO_ORDER_STOCK_STRATEGY', 'lock').lower()
+
+# Lecturas del catálogo con vistas async (shop/async_views.py); activo por defecto bajo ASGI
+ASYNC_READS = os.environ.get('DJANGO_ASYNC_READS', 'False').lower() in ('1', 'true', 'yes')
+
+# Métricas por endpoint (/api/metrics/): cada worker vuelca sus totales en este directorio
+METRICS_DIR = os.getenv('DJANGO_METRICS_DIR', os.path.join(tempfile.gettempdir(), 'supermercado-metrics'))
+METRICS_FLUSH_INTERVAL = float(os.getenv('DJANGO_METRICS_FLUSH_INTERVAL', 5))
+# Token opcional para que Prometheus lea /api/metrics/ sin sesión de staff
+METRICS_TOKEN = os.getenv('DJANGO_METRICS_TOKEN', '')
+
+# Recepción de pedidos: 'sync' (se crean en el request) o 'queue' (202 + ticket,
+# los procesa `manage.py process_order_queue`)
+ORDER_INTAKE_MODE = os.environ.get('DJANGO_ORDER_INTAKE_MODE', 'sync').lower()
+
+# Vigencia (segundos) de las claves Idempotency-Key de pedidos
+ORDER_IDEMPOTENCY_TTL = int(os.environ.get('DJANGO_ORDER_IDEMPOTENCY_TTL', 60 * 60 * 24))
+
+# Fragmentos del contador de usos de cada cupón con límite (menos contención)
+COUPON_USAGE_SHARDS = int(os.environ.get('DJANGO_COUPON_USAGE_SHARDS', 8))
+
 # CORS allowed origins; override in production via
 # DJANGO_CORS_ALLOWED_ORIGINS env variable
 CORS_ALLOWED_ORIGINS = [
@@ -146,6 +232,7 @@ CORS_ALLOWED_ORIGINS = [
     if origin.strip()
 ]
 CORS_ALLOW_CREDENTIALS = False
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 # Security settings (tune via environment variables)
 SECURE_SSL_REDIRECT = os.environ.get('DJANGO_SECURE_SSL_REDIRECT', 'False').lower() in ('1', 'true', 'yes')
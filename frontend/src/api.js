@@ -4,45 +4,128 @@ const API_URL =
     ? 'https://marketonline-production.up.railway.app/api'
     : 'http://localhost:8000/api')
 
-export async function getCategories() {
-  const r = await fetch(`${API_URL}/categories/`)
-  if (!r.ok) throw new Error('Error al cargar categorías')
-  return r.json()
+// Primer render en una sola petición: cada parte se usa una vez y las
+// llamadas siguientes van al endpoint normal (datos frescos)
+let bootstrap = null
+
+export function getBootstrap() {
+  if (!bootstrap) bootstrap = fetchJson(`${API_URL}/bootstrap/`, 'Error al cargar la tienda')
+  return bootstrap
+}
+
+async function fromBootstrap(part, load) {
+  try {
+    const data = await getBootstrap()
+    if (part in data) {
+      const value = data[part]
+      delete data[part]
+      return value
+    }
+  } catch {
+    // si falla, cada parte se pide por separado
+  }
+  return load()
 }
 
-export async function getProducts({ page = 1, search = '', ordering = '', category, page_size, promoted } = {}) {
+export async function getCategories({ withCounts = false } = {}) {
+  // withCounts: agrega product_count, offer_count, min_price y max_price
+  const load = async () => {
+    const r = await fetch(`${API_URL}/categories/${withCounts ? '?with_counts=1' : ''}`)
+    if (!r.ok) throw new Error('Error al cargar categorías')
+    return r.json()
+  }
+  return withCounts ? fromBootstrap('categories', load) : load()
+}
+
+export async function getProducts({ page = 1, search = '', ordering = '', category, page_size, promoted, keyset = false } = {}) {
   const url = new URL(`${API_URL}/products/`)
-  if (page) url.searchParams.set('page', page)
+  // keyset: paginado por cursor (scroll infinito); seguir con getMoreProducts(data.next)
+  if (keyset) url.searchParams.set('pagination', 'cursor')
+  else if (page) url.searchParams.set('page', page)
   if (search) url.searchParams.set('search', search)
   if (ordering) url.searchParams.set('ordering', ordering)
   if (category) url.searchParams.set('category', category)
   if (page_size) url.searchParams.set('page_size', page_size)
   if (promoted) url.searchParams.set('promoted', promoted)
-  const r = await fetch(url)
-  if (!r.ok) throw new Error('Error al cargar productos')
+  const load = () => fetchJson(url, 'Error al cargar productos')
+  // Primera página por defecto y destacados vienen en /bootstrap/
+  if (!keyset && page === 1 && !search && !ordering && !category) {
+    if (promoted && !page_size) return fromBootstrap('promoted', load)
+    if (!promoted && page_size === 20) return fromBootstrap('products', load)
+  }
+  return load()
+}
+
+// Autocompletado: { categories, products } desde el índice en memoria del backend
+export async function suggestProducts(q, { limit, signal } = {}) {
+  const url = new URL(`${API_URL}/products/suggest/`)
+  url.searchParams.set('q', q)
+  if (limit) url.searchParams.set('limit', limit)
+  const r = await fetch(url, { signal })
+  if (!r.ok) throw new Error('Error al cargar sugerencias')
   return r.json()
 }
 
-export async function getSiteConfig() {
-  const r = await fetch(`${API_URL}/config/`)
-  if (!r.ok) throw new Error('Error al cargar configuración')
+export async function getMoreProducts(next) {
+  return fetchJson(next, 'Error al cargar productos')
+}
+
+async function fetchJson(url, message) {
+  const r = await fetch(url)
+  if (!r.ok) throw new Error(message)
   return r.json()
 }
 
-export async function createOrder(payload) {
-  const r = await fetch(`${API_URL}/orders/`, {
-    method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify(payload),
+export async function getSiteConfig() {
+  return fromBootstrap('config', async () => {
+    const r = await fetch(`${API_URL}/config/`)
+    if (!r.ok) throw new Error('Error al cargar configuración')
+    return r.json()
   })
+}
+
+// Cada pedido lleva una Idempotency-Key: si la red falla se reintenta con la
+// misma clave y el backend devuelve el pedido ya creado en vez de duplicarlo
+export async function createOrder(payload, { retries = 2 } = {}) {
+  const key = crypto.randomUUID()
+  let r
+  for (let attempt = 0; ; attempt++) {
+    try {
+      r = await fetch(`${API_URL}/orders/`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Idempotency-Key': key },
+        body: JSON.stringify(payload),
+      })
+      // 409: el intento anterior sigue en curso en el servidor
+      if (r.status !== 409 || attempt >= retries) break
+    } catch (e) {
+      if (attempt >= retries) throw e
+    }
+    await new Promise(resolve => setTimeout(resolve, 1000 * (attempt + 1)))
+  }
   if (!r.ok) {
     let err
     try { err = await r.json() } catch { err = { detail: 'Error al crear pedido' } }
     throw new Error(err.detail || JSON.stringify(err))
   }
+  if (r.status === 202) return waitForOrder(await r.json())
   return r.json()
 }
 
+// Modo cola: el backend responde 202 con un ticket; consultar hasta que se confirme
+async function waitForOrder(ticket, { interval = 1000, attempts = 60 } = {}) {
+  for (let i = 0; i < attempts; i++) {
+    await new Promise(resolve => setTimeout(resolve, interval))
+    const data = await fetchJson(ticket.status_url, 'Error al consultar el pedido')
+    if (data.status === 'done') return data.order
+    if (data.status === 'rejected') {
+      const errors = data.errors || {}
+      throw new Error(errors.detail || JSON.stringify(errors))
+    }
+  }
+  throw new Error('El pedido sigue en proceso, intentá de nuevo en unos minutos')
+}
+
 export async function validateCoupon(code) {
   const r = await fetch(`${API_URL}/coupons/validate/`, {
     method: 'POST',
@@ -65,8 +148,27 @@ export async function validateCoupon(code) {
   }
 }
 
-export async function getAnnouncements() {
-  const r = await fetch(`${API_URL}/announcements/`)
-  if (!r.ok) throw new Error('Error al cargar anuncios')
+// Precio autoritativo del carrito (mismo cálculo que el pedido), sin crearlo
+export async function quoteCart({ items, coupon_code = '', delivery_method = 'delivery' }, { signal } = {}) {
+  const r = await fetch(`${API_URL}/cart/quote/`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ items, coupon_code, delivery_method }),
+    signal,
+  })
+  if (!r.ok) throw new Error('No se pudo calcular el total')
   return r.json()
 }
+
+export async function getAnnouncements() {
+  return fromBootstrap('announcements', async () => {
+    const r = await fetch(`${API_URL}/announcements/`)
+    if (!r.ok) throw new Error('Error al cargar anuncios')
+    return r.json()
+  })
+}
+
+export async function getCatalogSnapshot() {
+  // Redirige a una URL con hash de contenido, cacheable de forma inmutable
+  return fetchJson(`${API_URL}/catalog/snapshot/`, 'Error al cargar catálogo')
+}
@@ -66,6 +66,9 @@ export default function CategoryDropdown({ categories = [], selected = null, onS
                     onClick={() => handleSelect(c.id)}
                   >
                     {c.name}
+                    {c.product_count != null && (
+                      <span className="ml-1 opacity-70">({c.product_count})</span>
+                    )}
                   </button>
                 ))}
               </div>
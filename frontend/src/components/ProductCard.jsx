@@ -33,7 +33,7 @@ export default function ProductCard({ product }) {
       <div className="w-full aspect-[4/3] rounded-xl mb-3 overflow-hidden bg-gray-100 dark:bg-gray-700 flex items-center justify-center">
         {product.image ? (
           <img
-            src={product.image}
+            src={product.thumbnail || product.image}
             alt={product.name}
             className="w-full h-full object-cover object-center"
           />
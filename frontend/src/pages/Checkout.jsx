@@ -1,7 +1,7 @@
 // src/pages/Checkout.jsx
 import React, { useEffect, useMemo, useState } from 'react'
 import { useCart } from '../store/cart.jsx'
-import { createOrder, getSiteConfig, validateCoupon } from '../api.js'
+import { createOrder, getSiteConfig, quoteCart, validateCoupon } from '../api.js'
 import { toast } from 'sonner'
 import ButtonAnimatedGradient from '../components/ui/ButtonAnimatedGradient.jsx'
 import CartGrouped from '../components/cart/CartGrouped.jsx'
@@ -26,8 +26,25 @@ export default function Checkout() {
   // Modal transferencia
   const [showTransferModal, setShowTransferModal] = useState(false)
 
+  // Cotización del backend; mientras no llega se muestra la estimación local
+  const [quote, setQuote] = useState(null)
+
   useEffect(() => { getSiteConfig().then(setCfg).catch(() => {}) }, [])
 
+  useEffect(() => {
+    setQuote(null)
+    if (items.length === 0) return
+    const ctrl = new AbortController()
+    const t = setTimeout(() => {
+      quoteCart({
+        items: items.map(it => ({ product_id: it.product.id, quantity: Number(it.quantity || 1) })),
+        coupon_code: couponInfo?.valid ? coupon.trim() : '',
+        delivery_method: form.delivery_method,
+      }, { signal: ctrl.signal }).then(setQuote).catch(() => {})
+    }, 300)
+    return () => { clearTimeout(t); ctrl.abort() }
+  }, [items, couponInfo, form.delivery_method])
+
   useEffect(() => {
     if (form.delivery_method === 'pickup' && form.address !== '') {
       setForm(prev => ({ ...prev, address: '' }))
@@ -35,12 +52,14 @@ export default function Checkout() {
   }, [form.delivery_method])
 
   const effectiveShipping = useMemo(() => {
+    if (quote) return Number(quote.shipping_cost)
     if (form.delivery_method === 'pickup') return 0
     if (couponInfo?.valid && couponInfo.type === 'free_shipping' && subtotal >= Number(couponInfo.min_subtotal || 0)) return 0
     return Number(cfg.shipping_cost || 0)
-  }, [form.delivery_method, couponInfo, subtotal, cfg])
+  }, [quote, form.delivery_method, couponInfo, subtotal, cfg])
 
   const estDiscount = useMemo(() => {
+    if (quote) return Number(quote.discount)
     if (!couponInfo?.valid) return 0
     if (subtotal < Number(couponInfo.min_subtotal || 0)) return 0
     if (couponInfo.type === 'fixed') return Math.min(Number(couponInfo.amount || 0), subtotal)
@@ -50,11 +69,16 @@ export default function Checkout() {
       return cap > 0 ? Math.min(raw, cap) : raw
     }
     return 0
-  }, [couponInfo, subtotal])
+  }, [quote, couponInfo, subtotal])
 
   const estTotal = useMemo(
-    () => Math.max(0, subtotal - estDiscount + effectiveShipping),
-    [subtotal, estDiscount, effectiveShipping]
+    () => quote ? Number(quote.total) : Math.max(0, subtotal - estDiscount + effectiveShipping),
+    [quote, subtotal, estDiscount, effectiveShipping]
+  )
+
+  const stockWarnings = useMemo(
+    () => (quote?.warnings || []).filter(w => w.code === 'insufficient_stock' || w.code === 'unavailable'),
+    [quote]
   )
 
   // Desglose de descuentos
@@ -282,6 +306,14 @@ export default function Checkout() {
             )}
           </div>
 
+          {stockWarnings.length > 0 && (
+            <div className="mt-3 space-y-1 px-2">
+              {stockWarnings.map((w, i) => (
+                <div key={`stock-warn-${i}`} className="text-xs text-red-700">{w.detail}</div>
+              ))}
+            </div>
+          )}
+
           {/* TOTAL */}
           <div className="mt-4 pt-3 border-t border-slate-200 dark:border-slate-700/40 px-2">
             <div className="grid grid-cols-2 items-center">
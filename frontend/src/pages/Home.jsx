@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react'
 import { useLocation, useNavigate } from 'react-router-dom'
-import { getCategories, getProducts } from '../api.js'
+import { getCategories, getProducts, suggestProducts } from '../api.js'
 // import CategoryList from '../components/CategoryList.jsx'
 import CategoryDropdown from '../components/CategoryDropdown.jsx'
 import SortDropdown from '../components/SortDropdown.jsx'
@@ -20,6 +20,7 @@ export default function Home() {
   const [query, setQuery] = useState('')
   const [search, setSearch] = useState('')
   const [overlayOpen, setOverlayOpen] = useState(false)
+  const [suggestions, setSuggestions] = useState({ categories: [], products: [] })
   const [category, setCategory] = useState(null)
   const [sort, setSort] = useState('relevance')
   const [page, setPage] = useState(1)
@@ -34,8 +35,18 @@ export default function Home() {
     return () => document.removeEventListener('keydown', onKey)
   }, [overlayOpen])
 
+  // Sugerencias mientras se escribe (se cancela la consulta anterior)
   useEffect(() => {
-    getCategories()
+    if (!search || search === query) return
+    const controller = new AbortController()
+    suggestProducts(search, { signal: controller.signal })
+      .then(setSuggestions)
+      .catch(() => {})
+    return () => controller.abort()
+  }, [search, query])
+
+  useEffect(() => {
+    getCategories({ withCounts: true })
       .then(setCategories)
       .catch(() => setError('No se pudo cargar el catálogo'))
   }, [])
@@ -45,8 +56,8 @@ export default function Home() {
     const orderingMap = {
       recent: '-created_at',
       discount: 'has_offer,offer_price',
-      price_high: '-price',
-      price_low: 'price',
+      price_high: '-effective_price',
+      price_low: 'effective_price',
       name_az: 'name',
       name_za: '-name',
     }
@@ -135,9 +146,7 @@ export default function Home() {
               <div>
                 <div className="text-xl font-bold text-orange-600 mb-2">Sugerencias</div>
                 <ul className="space-y-1">
-                  {categories
-                    .filter(c => c.name?.toLowerCase()?.includes(search.toLowerCase()))
-                    .slice(0, 8)
+                  {suggestions.categories
                     .map(c => (
                       <li key={c.id}>
                         <button
@@ -149,7 +158,7 @@ export default function Home() {
                         </button>
                       </li>
                     ))}
-                  {categories.filter(c => c.name?.toLowerCase()?.includes(search.toLowerCase())).length === 0 && (
+                  {suggestions.categories.length === 0 && (
                     <li className="text-slate-500">Sin sugerencias</li>
                   )}
                 </ul>
@@ -159,8 +168,7 @@ export default function Home() {
               <div className="md:col-span-2">
                 <div className="text-xl font-bold text-orange-600 mb-2">Productos para "{search}"</div>
                 <div className="grid grid-cols-2 md:grid-cols-3 gap-3">
-                  {products
-                    .filter(p => (p.name + ' ' + (p.description || '')).toLowerCase().includes(search.toLowerCase()))
+                  {suggestions.products
                     .slice(0, 3)
                     .map(p => (
                       <button
@@ -170,13 +178,13 @@ export default function Home() {
                         className="text-left rounded-lg border border-orange-600/40 bg-white dark:bg-[#020617] p-2 hover:shadow-md hover:border-orange-600 transition"
                       >
                         <div className="aspect-[4/3] rounded-md overflow-hidden bg-gray-100 dark:bg-gray-700 mb-2">
-                          {p.image ? <img src={p.image} alt={p.name} className="w-full h-full object-cover" /> : null}
+                          {p.thumbnail ? <img src={p.thumbnail} alt={p.name} className="w-full h-full object-cover" /> : null}
                         </div>
                         <div className="text-sm font-semibold truncate">{p.name}</div>
                         <div className={["text-xs", p.offer_price && Number(p.offer_price) < Number(p.price) ? 'text-red-600 dark:text-red-500' : 'text-slate-500'].join(' ')}>${Number(p.offer_price ?? p.price).toFixed(2)}</div>
                       </button>
                     ))}
-                  {products.filter(p => (p.name + ' ' + (p.description || '')).toLowerCase().includes(search.toLowerCase())).length === 0 && (
+                  {suggestions.products.length === 0 && (
                     <div className="col-span-full text-slate-500">Escribe para ver coincidencias…</div>
                   )}
                 </div>